@@ -11,6 +11,7 @@ pokemon_mode = None
 run_count = None
 user_to_challenge = None
 gambit_exe_path = ""
+equilibrium_solver = 'linear_program'
 greeting_message = 'hf'
 battle_ending_message = 'gg'
 room_name = None
@@ -18,6 +19,31 @@ room_name = None
 use_relative_weights = False
 damage_calc_type = 'average'
 search_depth = 2
+search_time_ms = None
+search_processes = 1
+transposition_table_size = 100000
+instruction_cache_size = 20000
+mcts_iterations = 1000
+
+# the opponent's possible sets are searched from most to least likely
+# searching stops at this many sets, or once the sets searched make up this fraction of the sets' total probability
+max_determinizations = None
+determinization_probability_mass = 1.0
+
+# overrides the bounds of the evaluation used to stop searching a move's random outcomes early
+# the default bounds are guaranteed to hold, and only stop early on the least likely outcomes
+# tighter bounds prune more, but the search may choose a different move if a state is evaluated outside of them
+evaluation_lower_bound = None
+evaluation_upper_bound = None
+
+# decisions are made in a pool that is started once and kept for every battle
+# "process" makes them in another process that can be stopped if they take too long. "thread" makes them in this process
+# either way, what a bot learns while making a decision is kept on the battle, e.g. the safest bot's history table
+# the history table is only learned from searches in the decision's own process, so it is not kept when search_processes > 1
+decision_executor = 'process'
+
+# if a decision takes longer than this the bot's first option is used instead. A decision process is stopped, a thread is left to finish
+decision_timeout_ms = None
 
 save_replay = False
 
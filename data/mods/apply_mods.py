@@ -6,6 +6,7 @@ import data
 from data import all_move_json
 from data import pokedex
 from showdown.engine import damage_calculator
+from showdown.engine.move_table import compile_move_table
 
 logger = logging.getLogger(__name__)
 
@@ -121,3 +122,6 @@ def apply_mods(game_mode):
     if str(CURRENT_GEN) not in game_mode[:4]:
         set_random_battle_sets(7)  # use random battle sets from gen7 if we are not in gen8
         damage_calculator.TERRAIN_DAMAGE_BOOST = 1.5  # terrain gave a 1.5x damage boost prior to gen8
+
+    # the engine's move table is compiled from the modified move data
+    compile_move_table()
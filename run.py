@@ -11,6 +11,8 @@ import logging
 
 from teams import load_team
 from showdown.run_battle import pokemon_battle
+from showdown.decision_pool import start_decision_pool
+from showdown.decision_pool import shutdown_decision_pool
 from showdown.websocket_client import PSWebsocketClient
 
 from data import all_move_json
@@ -29,7 +31,19 @@ def parse_configs():
     config.save_replay = env.bool("SAVE_REPLAY", config.save_replay)
     config.use_relative_weights = env.bool("USE_RELATIVE_WEIGHTS", config.use_relative_weights)
     config.gambit_exe_path = env("GAMBIT_PATH", config.gambit_exe_path)
+    config.equilibrium_solver = env("EQUILIBRIUM_SOLVER", config.equilibrium_solver)
     config.search_depth = int(env("MAX_SEARCH_DEPTH", config.search_depth))
+    config.transposition_table_size = int(env("TRANSPOSITION_TABLE_SIZE", config.transposition_table_size))
+    config.instruction_cache_size = int(env("INSTRUCTION_CACHE_SIZE", config.instruction_cache_size))
+    config.search_time_ms = env.int("SEARCH_TIME_MS", config.search_time_ms)
+    config.search_processes = env.int("SEARCH_PROCESSES", config.search_processes)
+    config.mcts_iterations = env.int("MCTS_ITERATIONS", config.mcts_iterations)
+    config.max_determinizations = env.int("MAX_DETERMINIZATIONS", config.max_determinizations)
+    config.determinization_probability_mass = env.float("DETERMINIZATION_PROBABILITY_MASS", config.determinization_probability_mass)
+    config.decision_executor = env("DECISION_EXECUTOR", config.decision_executor)
+    config.decision_timeout_ms = env.int("DECISION_TIMEOUT_MS", config.decision_timeout_ms)
+    config.evaluation_lower_bound = env.float("EVALUATION_LOWER_BOUND", config.evaluation_lower_bound)
+    config.evaluation_upper_bound = env.float("EVALUATION_UPPER_BOUND", config.evaluation_upper_bound)
     config.greeting_message = env("GREETING_MESSAGE", config.greeting_message)
     config.battle_ending_message = env("BATTLE_OVER_MESSAGE", config.battle_ending_message)
     config.websocket_uri = env("WEBSOCKET_URI", "sim.smogon.com:8000")
@@ -74,6 +88,9 @@ async def showdown():
     original_pokedex = deepcopy(pokedex)
     original_move_json = deepcopy(all_move_json)
 
+    # the decision pool is started after the mods are applied so that it uses the same data
+    start_decision_pool()
+
     ps_websocket_client = await PSWebsocketClient.create(config.username, config.password, config.websocket_uri)
     await ps_websocket_client.login()
 
@@ -106,6 +123,8 @@ async def showdown():
         if battles_run >= config.run_count:
             break
 
+    shutdown_decision_pool()
+
 
 if __name__ == "__main__":
     asyncio.get_event_loop().run_until_complete(showdown())
@@ -1,8 +1,8 @@
+import pickle
 import itertools
 from collections import defaultdict
 from collections import namedtuple
 from copy import copy
-from copy import deepcopy
 from abc import ABC
 from abc import abstractmethod
 
@@ -45,6 +45,227 @@ LastUsedMove = namedtuple('LastUsedMove', ['pokemon_name', 'move', 'turn'])
 DamageDealt = namedtuple('DamageDealt', ['attacker', 'defender', 'move', 'percent_damage', 'crit'])
 
 
+def usage_probability(usage, choice):
+    # attributes that have been revealed, and the guesses used when nothing is likely enough, are not in the usage
+    # they are certain as far as the determinizations are concerned
+    return usage.get(choice, 100) / 100
+
+
+def rank_by_weight(weights):
+    # ties keep their original order
+    return sorted(range(len(weights)), key=lambda x: weights[x], reverse=True)
+
+
+def select_determinizations(weights, max_battles=None, probability_mass=1, ranking=None):
+    """
+    Picks the most likely of the possible determinizations of a battle
+    :param weights: the weight of each determinization
+    :param max_battles: the most determinizations that may be picked, or None for no limit
+    :param probability_mass: once the picked determinizations make up this fraction of the total weight no more are picked
+    :param ranking: the indices of `weights` from most to least likely, if they are already known
+    :return: the indices of the picked determinizations in their original order
+    """
+    if ranking is None:
+        ranking = rank_by_weight(weights)
+
+    total_weight = sum(weights)
+    selected = list()
+    selected_weight = 0
+    for i in ranking:
+        if max_battles is not None and len(selected) >= max_battles:
+            break
+        if probability_mass < 1 and selected and selected_weight >= probability_mass * total_weight:
+            break
+        selected.append(i)
+        selected_weight += weights[i]
+
+    return sorted(selected)
+
+
+class PossibleSets:
+    """Memoized filtering of the sets that one of the opponent's pokemon could have
+    One is made when the pokemon is first seen and is kept, and shared by clones of the pokemon, for the rest of the battle
+    The usage statistics are only sorted once. Each part of the sets is only filtered again
+    when what has been revealed about that part of the pokemon changes, i.e. when a move, item or ability is revealed
+    or when `battle_modifier` rules an item out from the speed order or the damage done
+    The sets are weighted by their usage alone - what is observed during the battle only rules sets out"""
+
+    def __init__(self, pokemon_name):
+        pokemon_sets = get_pokemon_sets(pokemon_name)
+        self.pokemon_name = pokemon_name
+
+        self.spreads = sorted(pokemon_sets[SPREADS_STRING], key=lambda x: x[2], reverse=True)
+        self.abilities = sorted(pokemon_sets[ABILITY_STRING], key=lambda x: x[1], reverse=True)
+        self.items = sorted(pokemon_sets[ITEM_STRING], key=lambda x: x[1], reverse=True)
+        self.moves = sorted(pokemon_sets[MOVES_STRING], key=lambda x: x[1], reverse=True)
+
+        self.spread_usage = {(s[0], s[1]): s[2] for s in self.spreads}
+        self.item_usage = dict(self.items)
+        self.ability_usage = dict(self.abilities)
+        self.move_usage = dict(self.moves)
+
+        # each part's result is kept along with what had been revealed when it was worked out
+        # the results are shared so they must never be modified
+        self._results = dict()
+
+    def __getstate__(self):
+        # the results are not sent to other processes - they are quick to work out again compared to sending them
+        state = self.__dict__.copy()
+        state['_results'] = dict()
+        return state
+
+    def _get_result(self, part, revealed, work_out):
+        result = self._results.get(part)
+        if result is None or result[0] != revealed:
+            result = self._results[part] = revealed, work_out()
+        return result[1]
+
+    @staticmethod
+    def revealed_item(pkmn):
+        return (
+            pkmn.item,
+            pkmn.can_have_choice_item,
+            pkmn.can_have_life_orb,
+            pkmn.can_have_assaultvest,
+            pkmn.can_have_heavydutyboots,
+            pkmn.can_not_have_band,
+            pkmn.can_not_have_specs
+        )
+
+    @staticmethod
+    def revealed_moves(pkmn, battle_type):
+        return tuple(m.name for m in pkmn.moves), battle_type
+
+    def get_spreads(self, pkmn):
+        return self._get_result('spreads', None, lambda: pkmn.get_possible_spreads(self.spreads))
+
+    def get_items(self, pkmn):
+        return self._get_result('items', self.revealed_item(pkmn), lambda: pkmn.get_possible_items(self.items))
+
+    def get_abilities(self, pkmn):
+        return self._get_result('abilities', pkmn.ability, lambda: pkmn.get_possible_abilities(self.abilities))
+
+    def get_moves(self, pkmn, battle_type):
+        return self._get_result('moves', self.revealed_moves(pkmn, battle_type), lambda: pkmn.get_possible_moves(self.moves, battle_type))
+
+    def get_ranked_sets(self, pkmn, battle_type, join_moves_together):
+        """
+        :return: (expected_moves, possible_sets, weights, ranking)
+                 each possible set is a (spread/item/ability/chance-moves combination, all of the moves)
+                 `ranking` is the indices of the possible sets from most to least likely
+        """
+        revealed = (self.revealed_item(pkmn), pkmn.ability, self.revealed_moves(pkmn, battle_type), join_moves_together)
+        return self._get_result('ranked_sets', revealed, lambda: self._rank_sets(pkmn, battle_type, join_moves_together))
+
+    def _rank_sets(self, pkmn, battle_type, join_moves_together):
+        spreads = self.get_spreads(pkmn)
+        items = self.get_items(pkmn)
+        abilities = self.get_abilities(pkmn)
+        expected_moves, chance_moves = self.get_moves(pkmn, battle_type)
+
+        if join_moves_together:
+            chance_move_combinations = [chance_moves]
+        else:
+            number_of_unknown_moves = max(4 - len(pkmn.moves) - len(expected_moves), 0)
+            chance_move_combinations = list(itertools.combinations(chance_moves, number_of_unknown_moves))
+
+        possible_sets = list()
+        weights = list()
+        for c in itertools.product(spreads, items, abilities, chance_move_combinations):
+            all_moves = [m.name for m in pkmn.moves]
+            all_moves += expected_moves
+            all_moves += c[3]
+            all_moves = [Move(m) for m in all_moves]
+
+            if join_moves_together or set_makes_sense(c[0][0], c[0][1], c[1], c[2], all_moves):
+                weight = usage_probability(self.spread_usage, tuple(c[0])) * usage_probability(self.item_usage, c[1]) * usage_probability(self.ability_usage, c[2])
+                if not join_moves_together:
+                    for m in chance_moves:
+                        move_probability = usage_probability(self.move_usage, m)
+                        weight *= move_probability if m in c[3] else 1 - move_probability
+
+                possible_sets.append((c, all_moves))
+                weights.append(weight)
+
+        return expected_moves, possible_sets, weights, rank_by_weight(weights)
+
+
+class Determinizations:
+    """The battles made from a battle by giving the opponent's active pokemon each of its possible sets
+    A battle is only created when it is reached while iterating, so they never all have to exist at the same time
+    When there are no possible sets the battle itself is the only one"""
+
+    def __init__(self, battle, expected_moves, possible_sets):
+        self.battle = battle
+        self.expected_moves = expected_moves
+
+        # (spread/item/ability/chance-moves combination, all of the moves, probability) for each set
+        self.possible_sets = possible_sets
+
+    @property
+    def probabilities(self):
+        if not self.possible_sets:
+            return [self.battle.probability]
+        return [probability for _, _, probability in self.possible_sets]
+
+    def create_opponent(self, combination, all_moves, probability):
+        # only the active pokemon is cloned - the reserve pokemon are shared with the battle
+        opponent = self.battle.opponent.clone(clone_reserve=False)
+
+        opponent.active.set_spread(combination[0][0], combination[0][1])
+        if opponent.active.name == 'ditto':
+            opponent.active.stats = self.battle.opponent.active.stats
+        opponent.active.item = combination[1]
+        opponent.active.ability = combination[2]
+        for m in self.expected_moves:
+            opponent.active.add_move(m)
+        for m in combination[3]:
+            opponent.active.add_move(m)
+
+        logger.debug("Possible set for opponent's {}:\t{} {} {} {} {} ({:.3f})".format(self.battle.opponent.active.name, combination[0][0], combination[0][1], combination[1], combination[2], all_moves, probability))
+        opponent.lock_moves()
+        return opponent
+
+    def create_battle(self, combination, all_moves, probability):
+        new_battle = copy(self.battle)
+        new_battle.opponent = self.create_opponent(combination, all_moves, probability)
+        new_battle.probability = probability
+        return new_battle
+
+    def create_searches(self):
+        """
+        Yields the (State, user_options, opponent_options) of each battle, in the same order as iterating over them
+        The battle's State is only created once - each State yielded gets its own opponent's active pokemon
+        and shares everything else with the others, so a State must be put back the way it was
+        before the next one is searched. Searches always undo the changes they make
+        """
+        base_state = self.battle.create_state()
+        if not self.possible_sets:
+            yield (base_state, *self.battle.get_all_options())
+            return
+
+        battle = copy(self.battle)
+        for possible_set in self.possible_sets:
+            battle.opponent = self.create_opponent(*possible_set)
+            opponent = Side(
+                TransposePokemon.from_state_pokemon_dict(battle.opponent.active.to_dict()),
+                base_state.opponent.reserve,
+                base_state.opponent.wish,
+                base_state.opponent.side_conditions
+            )
+            state = State(base_state.self, opponent, base_state.weather, base_state.field, base_state.trick_room)
+            yield (state, *battle.get_all_options())
+
+    def __iter__(self):
+        if not self.possible_sets:
+            yield self.battle
+        for possible_set in self.possible_sets:
+            yield self.create_battle(*possible_set)
+
+    def __len__(self):
+        return len(self.possible_sets) or 1
+
+
 class Battle(ABC):
 
     def __init__(self, battle_tag):
@@ -69,6 +290,10 @@ class Battle(ABC):
 
         self.request_json = None
 
+        # the chance of this battle's guesses about the opponent being right
+        # this is relative to the other battles returned by the same call to `prepare_battles`
+        self.probability = 1
+
     def initialize_team_preview(self, user_json, opponent_pokemon):
         self.user.from_json(user_json, first_turn=True)
         self.user.reserve.insert(0, self.user.active)
@@ -91,14 +316,42 @@ class Battle(ABC):
         self.started = True
         self.rqid = user_json[constants.RQID]
 
+    def clone(self):
+        """Returns a copy of this battle that can be modified without affecting this one
+        Only the mutable parts of each Battler and Pokemon are copied
+        Everything else, e.g. `request_json` and the pokedex data of each pokemon, is shared"""
+        battle = copy(self)
+        battle.user = self.user.clone()
+        battle.opponent = self.opponent.clone()
+        return battle
+
+    def snapshot(self):
+        """Returns the battle serialized so that it can be sent to another process
+        Nothing in the snapshot is shared with this battle - see `from_snapshot`"""
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def from_snapshot(snapshot):
+        return pickle.loads(snapshot)
+
     def mega_evolve_possible(self):
         return any(g in self.generation for g in constants.MEGA_EVOLVE_GENERATIONS) or 'nationaldex' in config.pokemon_mode
 
-    def prepare_battles(self, guess_mega_evo_opponent=True, join_moves_together=False):
+    def prepare_battles(self, guess_mega_evo_opponent=True, join_moves_together=False, max_battles=None, probability_mass=1):
         """Returns a list of battles based on this one
         The battles have the opponent's reserve pokemon's unknowns filled in
-        The opponent's active pokemon in each of the battles has a different set"""
-        battle_copy = deepcopy(self)
+        The opponent's active pokemon in each of the battles has a different set
+        Only the opponent's active pokemon is copied for each battle - everything else is shared between them
+
+        Each set is weighted by how often its spread, item, ability and moves are used
+        Only the most likely sets are kept - see `select_determinizations` for `max_battles` and `probability_mass`
+        The `probability` of each battle returned is its set's weight relative to the other battles"""
+        return list(self.generate_battles(guess_mega_evo_opponent, join_moves_together, max_battles, probability_mass))
+
+    def generate_battles(self, guess_mega_evo_opponent=True, join_moves_together=False, max_battles=None, probability_mass=1):
+        """The same as `prepare_battles`, but each battle is only created when it is reached while iterating
+        The sets are chosen immediately, so the number of battles is known up-front"""
+        battle_copy = self.clone()
         battle_copy.opponent.lock_moves()
         battle_copy.user.lock_active_pkmn_first_turn_moves()
 
@@ -117,57 +370,29 @@ class Battle(ABC):
             pkmn.guess_most_likely_attributes()
 
         try:
-            pokemon_sets = get_pokemon_sets(battle_copy.opponent.active.name)
+            opponent_sets = battle_copy.opponent.active.get_possible_sets()
         except KeyError:
             logger.warning("No sets for {}, trying to find most likely attributes".format(battle_copy.opponent.active.name))
             battle_copy.opponent.active.guess_most_likely_attributes()
-            return [battle_copy]
-
-        possible_spreads = sorted(pokemon_sets[SPREADS_STRING], key=lambda x: x[2], reverse=True)
-        possible_abilities = sorted(pokemon_sets[ABILITY_STRING], key=lambda x: x[1], reverse=True)
-        possible_items = sorted(pokemon_sets[ITEM_STRING], key=lambda x: x[1], reverse=True)
-        possible_moves = sorted(pokemon_sets[MOVES_STRING], key=lambda x: x[1], reverse=True)
-
-        spreads = battle_copy.opponent.active.get_possible_spreads(possible_spreads)
-        items = battle_copy.opponent.active.get_possible_items(possible_items)
-        abilities = battle_copy.opponent.active.get_possible_abilities(possible_abilities)
-        expected_moves, chance_moves = battle_copy.opponent.active.get_possible_moves(possible_moves, battle_copy.battle_type)
+            return Determinizations(battle_copy, [], [])
 
-        if join_moves_together:
-            chance_move_combinations = [chance_moves]
-        else:
-            number_of_unknown_moves = max(4 - len(battle_copy.opponent.active.moves) - len(expected_moves), 0)
-            chance_move_combinations = list(itertools.combinations(chance_moves, number_of_unknown_moves))
+        expected_moves, possible_sets, weights, ranking = opponent_sets.get_ranked_sets(battle_copy.opponent.active, battle_copy.battle_type, join_moves_together)
 
-        combinations = list(itertools.product(spreads, items, abilities, chance_move_combinations))
+        selected = select_determinizations(weights, max_battles=max_battles, probability_mass=probability_mass, ranking=ranking)
+        if len(selected) < len(possible_sets):
+            logger.debug("Using {} of the {} possible sets for opponent's {}".format(len(selected), len(possible_sets), battle_copy.opponent.active.name))
+        total_weight = sum(weights[i] for i in selected)
 
-        # create battle clones for each of the combinations
-        battles = list()
-        for c in combinations:
-            new_battle = deepcopy(battle_copy)
-
-            all_moves = [m.name for m in new_battle.opponent.active.moves]
-            all_moves += expected_moves
-            all_moves += c[3]
-            all_moves = [Move(m) for m in all_moves]
-
-            if join_moves_together or set_makes_sense(c[0][0], c[0][1], c[1], c[2], all_moves):
-                new_battle.opponent.active.set_spread(c[0][0], c[0][1])
-                if new_battle.opponent.active.name == 'ditto':
-                    new_battle.opponent.active.stats = battle_copy.opponent.active.stats
-                new_battle.opponent.active.item = c[1]
-                new_battle.opponent.active.ability = c[2]
-                for m in expected_moves:
-                    new_battle.opponent.active.add_move(m)
-                for m in c[3]:
-                    new_battle.opponent.active.add_move(m)
-
-                logger.debug("Possible set for opponent's {}:\t{} {} {} {} {}".format(battle_copy.opponent.active.name, c[0][0], c[0][1], c[1], c[2], all_moves))
-                battles.append(new_battle)
-
-            new_battle.opponent.lock_moves()
+        selected_sets = list()
+        for i in selected:
+            c, all_moves = possible_sets[i]
+            if total_weight:
+                probability = weights[i] / total_weight
+            else:
+                probability = 1 / len(selected)
+            selected_sets.append((c, all_moves, probability))
 
-        return battles if battles else [battle_copy]
+        return Determinizations(battle_copy, expected_moves, selected_sets)
 
     def create_state(self):
         user_active = TransposePokemon.from_state_pokemon_dict(self.user.active.to_dict())
@@ -231,6 +456,33 @@ class Battle(ABC):
 
         return user_options, opponent_options
 
+    # the attributes that a bot keeps on the battle between its decisions, see `get_decision_state`
+    decision_state_attributes = ()
+
+    def get_possible_sets_formes(self):
+        # the formes that each of the opponent's pokemon already has possible sets for
+        return [set(pkmn.possible_sets) for pkmn in self.opponent.pokemon()]
+
+    def get_decision_state(self, known_formes):
+        """What a bot learned while making a decision on this battle that it keeps for its next decision
+        Decisions are made on a copy of the battle, possibly in another process, so this is set on the battle afterwards
+        It is the attributes in `decision_state_attributes` and the possible sets of the opponent's pokemon's formes
+        that are not in `known_formes`, i.e. the ones that were first seen or guessed while making the decision"""
+        return {
+            'attributes': {attribute: getattr(self, attribute) for attribute in self.decision_state_attributes},
+            'possible_sets': [
+                {forme: possible_sets for forme, possible_sets in pkmn.possible_sets.items() if forme not in formes}
+                for pkmn, formes in zip(self.opponent.pokemon(), known_formes)
+            ]
+        }
+
+    def set_decision_state(self, decision_state):
+        for attribute, value in decision_state['attributes'].items():
+            setattr(self, attribute, value)
+        for pkmn, new_possible_sets in zip(self.opponent.pokemon(), decision_state['possible_sets']):
+            for forme, possible_sets in new_possible_sets.items():
+                pkmn.possible_sets.setdefault(forme, possible_sets)
+
     @abstractmethod
     def find_best_move(self):
         ...
@@ -241,7 +493,7 @@ class Battler:
     def __init__(self):
         self.active = None
         self.reserve = []
-        self.side_conditions = defaultdict(lambda: 0)
+        self.side_conditions = defaultdict(int)
 
         self.name = None
         self.trapped = False
@@ -251,6 +503,22 @@ class Battler:
 
         self.last_used_move = LastUsedMove('', '', 0)
 
+    def clone(self, clone_reserve=True):
+        battler = copy(self)
+        battler.active = self.active.clone() if self.active is not None else None
+        if clone_reserve:
+            battler.reserve = [p.clone() for p in self.reserve]
+        else:
+            battler.reserve = list(self.reserve)
+        battler.side_conditions = copy(self.side_conditions)
+        return battler
+
+    def pokemon(self):
+        # the active pokemon, if there is one, followed by the reserve
+        if self.active is None:
+            return list(self.reserve)
+        return [self.active] + self.reserve
+
     def mega_revealed(self):
         return self.active.is_mega or any(p.is_mega for p in self.reserve)
 
@@ -415,7 +683,7 @@ class Pokemon:
         self.moves = []
         self.status = None
         self.volatile_statuses = []
-        self.boosts = defaultdict(lambda: 0)
+        self.boosts = defaultdict(int)
         self.can_mega_evo = False
         self.can_ultra_burst = False
         self.can_dynamax = False
@@ -427,17 +695,33 @@ class Pokemon:
         self.can_have_life_orb = True
         self.can_have_heavydutyboots = True
 
+        # the PossibleSets of each forme this pokemon has been seen or guessed to be in
+        # only the opponent's pokemon have their possible sets tracked
+        self.possible_sets = dict()
+
+    def clone(self):
+        # names, types, base-stats and evs are replaced rather than modified so they can be shared
+        # every attribute of a move is immutable so a shallow copy of each move is enough
+        pkmn = copy(self)
+        pkmn.stats = copy(self.stats)
+        pkmn.boosts = copy(self.boosts)
+        pkmn.volatile_statuses = copy(self.volatile_statuses)
+        pkmn.moves = [copy(m) for m in self.moves]
+        return pkmn
+
     def forme_change(self, new_pkmn_name):
         hp_percent = float(self.hp) / self.max_hp
         moves = self.moves
         boosts = self.boosts
         status = self.status
+        possible_sets = self.possible_sets
 
         self.__init__(new_pkmn_name, self.level)
         self.hp = round(hp_percent * self.max_hp)
         self.moves = moves
         self.boosts = boosts
         self.status = status
+        self.possible_sets = possible_sets
 
     def try_convert_to_mega(self, check_in_sets=False):
         if self.item != constants.UNKNOWN_ITEM:
@@ -452,6 +736,17 @@ class Pokemon:
     def is_alive(self):
         return self.hp > 0
 
+    def get_possible_sets(self):
+        """The PossibleSets of this pokemon's current forme, which are kept for the rest of the battle
+           The dictionary they are kept in is shared with clones of this pokemon, so the sets of a forme
+           that is only guessed on a clone, i.e. a mega-evolution, are kept as well
+           Raises a KeyError if there are no sets for this pokemon"""
+        possible_sets = self.possible_sets.get(self.name)
+        if possible_sets is None:
+            possible_sets = PossibleSets(self.name)
+            self.possible_sets[self.name] = possible_sets
+        return possible_sets
+
     @classmethod
     def from_switch_string(cls, switch_string):
         details = switch_string.split(',')
@@ -221,8 +221,8 @@ class BattleBot(Battle):
 
     # Use the safest move logic to choose a move
     def pick_safest_move(self):
-        battles = self.prepare_battles(join_moves_together=True)
-        safest_move = pick_safest_move_from_battles(battles)
+        determinizations = self.generate_battles(join_moves_together=True, max_battles=config.max_determinizations, probability_mass=config.determinization_probability_mass)
+        safest_move = pick_safest_move_from_battles(determinizations)
         return safest_move
 
     # Use the most damaging move logic to choose a move
@@ -241,18 +241,18 @@ class BattleBot(Battle):
     
     # Use the opponent safest move logic to determine the opponent's safest move
     def pick_opponent_safest_move(self):
-        battles = self.prepare_battles(join_moves_together=True)
-        opponent_move = pick_opponent_safest_move_from_battles(battles)
+        determinizations = self.generate_battles(join_moves_together=True, max_battles=config.max_determinizations, probability_mass=config.determinization_probability_mass)
+        opponent_move = pick_opponent_safest_move_from_battles(determinizations)
         return opponent_move
 
     # Use the punish opponent logic to choose a move
     def pick_punishing_move(self):
-        battles = self.prepare_battles(join_moves_together=True)
-        safest_move = punish_pick_safest_move_from_battles(battles, list(), lookup_depth=config.search_depth)
+        determinizations = self.generate_battles(join_moves_together=True, max_battles=config.max_determinizations, probability_mass=config.determinization_probability_mass)
+        safest_move = punish_pick_safest_move_from_battles(determinizations, list(), lookup_depth=config.search_depth)
         safest_move_list = [safest_move]
-        opponent_move = pick_opponent_safest_move_from_battles(battles, safest_move_list)
+        opponent_move = pick_opponent_safest_move_from_battles(determinizations, safest_move_list)
         opponent_move_list = [opponent_move]
-        most_punishing_move = punish_pick_safest_move_from_battles(battles, opponent_move_list, lookup_depth=config.search_depth)
+        most_punishing_move = punish_pick_safest_move_from_battles(determinizations, opponent_move_list, lookup_depth=config.search_depth)
         return most_punishing_move
 
     # Determine whether it is safe to use Volt Switch
@@ -0,0 +1,215 @@
+import math
+import time
+import random
+import logging
+from collections import defaultdict
+
+import constants
+import config
+from showdown.battle import Battle
+from showdown.engine.objects import StateMutator
+from showdown.engine.find_state_instructions import get_all_state_instructions
+from showdown.engine.find_state_instructions import InstructionCache
+
+from ..helpers import format_decision
+
+
+logger = logging.getLogger(__name__)
+
+
+# balances trying the options with the best average result against trying the options that have been visited the least
+EXPLORATION_CONSTANT = 0.7
+
+# the difference in evaluation from the root state that maps to a result of ~0.73 (or ~0.27 when negative)
+EVALUATION_SCALE = 100
+
+
+class MCTSNode:
+    """A state in the search tree
+       Each side chooses its option independently using only its own statistics (decoupled UCT)
+       Children are keyed by the pair of options chosen and the index of the random outcome that happened"""
+
+    __slots__ = (
+        'user_options',
+        'opponent_options',
+        'user_visits',
+        'user_totals',
+        'opponent_visits',
+        'opponent_totals',
+        'visits',
+        'children'
+    )
+
+    def __init__(self, user_options, opponent_options):
+        self.user_options = user_options
+        self.opponent_options = opponent_options
+        self.user_visits = defaultdict(int)
+        self.user_totals = defaultdict(float)
+        self.opponent_visits = defaultdict(int)
+        self.opponent_totals = defaultdict(float)
+        self.visits = 0
+        self.children = dict()
+
+    def select_option(self, options, visits, totals, maximize):
+        # every option is tried once before any of them are tried twice
+        for option in options:
+            if not visits[option]:
+                return option
+
+        log_visits = math.log(self.visits)
+        best_option = None
+        best_value = float('-inf')
+        for option in options:
+            average = totals[option] / visits[option]
+            if not maximize:
+                average = 1 - average
+            value = average + EXPLORATION_CONSTANT * math.sqrt(log_visits / visits[option])
+            if value > best_value:
+                best_option = option
+                best_value = value
+
+        return best_option
+
+    def update(self, user_option, opponent_option, result):
+        self.visits += 1
+        self.user_visits[user_option] += 1
+        self.user_totals[user_option] += result
+        self.opponent_visits[opponent_option] += 1
+        self.opponent_totals[opponent_option] += result
+
+
+def sample_instructions(state_instructions):
+    # each possible outcome is chosen with the probability that it happens
+    r = random.random()
+    for i, instructions in enumerate(state_instructions):
+        r -= instructions.percentage
+        if r < 0:
+            return i, instructions
+
+    return len(state_instructions) - 1, state_instructions[-1]
+
+
+def result_from_evaluation(evaluation, root_evaluation):
+    # a result between 0 and 1 for the bot - the opponent's result is the opposite
+    return 1 / (1 + math.exp(-(evaluation - root_evaluation) / EVALUATION_SCALE))
+
+
+def create_node(mutator):
+    """Returns None for the same states that `get_terminal_payoff_matrix` does not search through"""
+    if mutator.state.battle_is_finished():
+        return None
+
+    user_options, opponent_options = mutator.state.get_all_options()
+    if opponent_options == [constants.DO_NOTHING_MOVE] and mutator.state.opponent.active.hp == 0:
+        return None
+
+    return MCTSNode(user_options, opponent_options)
+
+
+def leaf_result(mutator, root_evaluation):
+    winner = mutator.state.battle_is_finished()
+    if winner:
+        return 1.0 if winner == 1 else 0.0
+    return result_from_evaluation(mutator.evaluation, root_evaluation)
+
+
+def run_iteration(mutator, node, root_evaluation, instruction_cache):
+    user_option = node.select_option(node.user_options, node.user_visits, node.user_totals, maximize=True)
+    opponent_option = node.select_option(node.opponent_options, node.opponent_visits, node.opponent_totals, maximize=False)
+
+    state_instructions = get_all_state_instructions(mutator, user_option, opponent_option, instruction_cache=instruction_cache)
+    index, instructions = sample_instructions(state_instructions)
+    mutator.apply(instructions.instructions)
+
+    key = (user_option, opponent_option, index)
+    if key not in node.children:
+        # a new state is scored using the evaluation instead of playing the rest of the battle out
+        node.children[key] = create_node(mutator)
+        result = leaf_result(mutator, root_evaluation)
+    elif node.children[key] is None:
+        result = leaf_result(mutator, root_evaluation)
+    else:
+        result = run_iteration(mutator, node.children[key], root_evaluation, instruction_cache)
+
+    mutator.reverse(instructions.instructions)
+    node.update(user_option, opponent_option, result)
+    return result
+
+
+def monte_carlo_tree_search(mutator, user_options, opponent_options, iterations=None, deadline=None):
+    """
+    Searches the game-tree using decoupled UCT
+    Random outcomes are sampled using the percentages from `get_all_state_instructions`
+    :param mutator: a StateMutator object representing the state of the battle
+    :param user_options: options for the bot
+    :param opponent_options: options for the opponent
+    :param iterations: the number of iterations to run
+    :param deadline: a time.time() value - no iterations are started after it
+    :return: the root MCTSNode of the search
+    """
+    if iterations is None and deadline is None:
+        raise ValueError("Either iterations or deadline must be given")
+
+    root = MCTSNode(user_options, opponent_options)
+    root_evaluation = mutator.evaluation
+    instruction_cache = InstructionCache(config.instruction_cache_size)
+
+    iteration = 0
+    while (iterations is None or iteration < iterations) and (deadline is None or time.time() < deadline or iteration == 0):
+        run_iteration(mutator, root, root_evaluation, instruction_cache)
+        iteration += 1
+
+    logger.debug("Completed {} iterations".format(iteration))
+    return root
+
+
+def pick_move_from_battles(determinizations, iterations=None, time_budget=None):
+    # the visits of every determinization are added together - the most visited option is chosen
+    # each determinization gets a share of the budget in proportion to its probability
+    user_visits = defaultdict(int)
+    decision_deadline = time.time() + time_budget if time_budget is not None else None
+    probabilities = determinizations.probabilities
+    total_probability = sum(probabilities)
+    remaining_probability = total_probability
+    for i, ((state, user_options, opponent_options), probability) in enumerate(zip(determinizations.create_searches(), probabilities)):
+        mutator = StateMutator(state)
+
+        if decision_deadline is not None:
+            if remaining_probability > 0:
+                share_of_remaining_time = probability / remaining_probability
+            else:
+                share_of_remaining_time = 1 / (len(determinizations) - i)
+            deadline = time.time() + (decision_deadline - time.time()) * share_of_remaining_time
+        else:
+            deadline = None
+        remaining_probability -= probability
+
+        if iterations is not None:
+            if total_probability > 0:
+                battle_iterations = max(1, int(iterations * probability / total_probability))
+            else:
+                battle_iterations = max(1, iterations // len(determinizations))
+        else:
+            battle_iterations = None
+
+        root = monte_carlo_tree_search(mutator, user_options, opponent_options, iterations=battle_iterations, deadline=deadline)
+        for option, visits in root.user_visits.items():
+            user_visits[option] += visits
+
+    bot_choice = max(user_visits, key=user_visits.get)
+    logger.debug("Visits: {}".format(dict(user_visits)))
+    logger.debug("Most visited: {}".format(bot_choice))
+    return bot_choice
+
+
+class BattleBot(Battle):
+    def __init__(self, *args, **kwargs):
+        super(BattleBot, self).__init__(*args, **kwargs)
+
+    def find_best_move(self):
+        determinizations = self.generate_battles(join_moves_together=True, max_battles=config.max_determinizations, probability_mass=config.determinization_probability_mass)
+        if config.search_time_ms is not None:
+            best_move = pick_move_from_battles(determinizations, time_budget=config.search_time_ms / 1000)
+        else:
+            best_move = pick_move_from_battles(determinizations, iterations=config.mcts_iterations)
+        return format_decision(self, best_move)
@@ -10,17 +10,24 @@ from nashpy import Game
 import config
 from showdown.battle import Battle
 from showdown.engine.select_best_move import remove_guaranteed_opponent_moves
-from showdown.engine.objects import StateMutator
 from showdown.engine.select_best_move import pick_safest
-from showdown.engine.select_best_move import get_payoff_matrix
+from showdown.engine.search_pool import iter_search_states
 
-from ..safest.main import pick_safest_move_from_battles
 from ..helpers import format_decision
 
 
 logger = logging.getLogger(__name__)
 
 
+GAMBIT_SOLVER = 'gambit'
+LINEAR_PROGRAM_SOLVER = 'linear_program'
+
+# values closer to 0 than this are treated as 0 by the simplex method
+SIMPLEX_TOLERANCE = 1e-9
+
+# the most of the opponent's possible sets that an equilibrium is found for when MAX_DETERMINIZATIONS is not set
+MAX_BATTLES = 7
+
 NFG_FORMAT_BASE = """NFG 1 R ""
 { "Player 1" "Player 2" } { %s %s }
 
@@ -102,6 +109,58 @@ def find_all_equilibria(matrix):
     return np.array(equilibria)
 
 
+def solve_zero_sum_game(matrix):
+    """
+    Finds an equilibrium of a zero-sum game by solving it as a linear program with the simplex method
+    In a zero-sum game every equilibrium has the same payoff, so there is no need to find all of them
+    :param matrix: the payoffs of the row player - the column player's payoffs are the negatives of these
+    :return: the row player's percentages, the column player's percentages, and the row player's payoff
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    num_rows, num_cols = matrix.shape
+
+    # every payoff is made positive so that the value of the game is positive
+    # the column player's problem is then: maximize sum(y) subject to matrix @ y <= 1 and y >= 0
+    # the percentages are y / sum(y) and the value of the game is 1 / sum(y)
+    shift = 1 - matrix.min()
+    tableau = np.zeros((num_rows + 1, num_cols + num_rows + 1))
+    tableau[:num_rows, :num_cols] = matrix + shift
+    tableau[:num_rows, num_cols:num_cols + num_rows] = np.eye(num_rows)
+    tableau[:num_rows, -1] = 1
+    tableau[-1, :num_cols] = -1
+    basis = list(range(num_cols, num_cols + num_rows))
+
+    while True:
+        # the lowest-index column that improves the objective is used so that the method cannot cycle
+        entering_columns = np.flatnonzero(tableau[-1, :-1] < -SIMPLEX_TOLERANCE)
+        if not len(entering_columns):
+            break
+        column = entering_columns[0]
+
+        candidate_rows = np.flatnonzero(tableau[:num_rows, column] > SIMPLEX_TOLERANCE)
+        ratios = tableau[candidate_rows, -1] / tableau[candidate_rows, column]
+        tied_rows = candidate_rows[ratios <= ratios.min() + SIMPLEX_TOLERANCE]
+        row = min(tied_rows, key=lambda x: basis[x])
+
+        tableau[row] /= tableau[row, column]
+        pivot_column = tableau[:, column].copy()
+        pivot_column[row] = 0
+        tableau -= np.outer(pivot_column, tableau[row])
+        basis[row] = column
+
+    col_solution = np.zeros(num_cols + num_rows)
+    col_solution[basis] = tableau[:num_rows, -1]
+    col_solution = col_solution[:num_cols]
+
+    # the row player's solution is the dual, which is left in the objective row under the slack columns
+    row_solution = tableau[-1, num_cols:num_cols + num_rows]
+
+    # rounding can leave percentages that are slightly below 0
+    total = tableau[-1, -1]
+    value = 1 / total - shift
+    return np.maximum(row_solution / total, 0), np.maximum(col_solution / total, 0), value
+
+
 def find_nash_equilibrium(score_lookup):
     modified_score_lookup = remove_guaranteed_opponent_moves(score_lookup)
     if not modified_score_lookup:
@@ -109,10 +168,13 @@ def find_nash_equilibrium(score_lookup):
 
     df = pd.Series(modified_score_lookup).unstack()
 
-    equilibria = find_all_equilibria(df)
-    best_eq, score = find_best_nash_equilibrium(equilibria, df)
-    bot_percentages = best_eq[0]
-    opponent_percentages = best_eq[1]
+    if config.equilibrium_solver == GAMBIT_SOLVER:
+        equilibria = find_all_equilibria(df)
+        best_eq, score = find_best_nash_equilibrium(equilibria, df)
+        bot_percentages = best_eq[0]
+        opponent_percentages = best_eq[1]
+    else:
+        bot_percentages, opponent_percentages, score = solve_zero_sum_game(df.values)
 
     bot_choices = df.index
     opponent_choices = df.columns
@@ -132,26 +194,29 @@ def log_nash_equilibria(bot_choices, opponent_choices, bot_percentages, opponent
             opponent_options.append((opponent_choices[i], percentage))
 
 
-def get_weighted_choices_from_multiple_score_lookups(score_lookups):
+def get_weighted_choices_from_multiple_score_lookups(score_lookups, weights=None):
+    # by default every score lookup is equally likely
+    if weights is None:
+        weights = [1 / len(score_lookups)] * len(score_lookups)
+
     bot_choice_percentages = defaultdict(lambda: 0)
-    number_of_score_lookups = len(score_lookups)
-    for sl in score_lookups:
+    for sl, weight in zip(score_lookups, weights):
         eq = find_nash_equilibrium(sl)
         log_nash_equilibria(*eq)
         for i, bot_choice in enumerate(eq[0]):
-            bot_choice_percentages[bot_choice] += eq[2][i]/number_of_score_lookups
+            bot_choice_percentages[bot_choice] += eq[2][i] * weight
 
     return list(bot_choice_percentages.items())
 
 
-def pick_move_in_equilibrium_from_multiple_score_lookups(score_lookups):
+def pick_move_in_equilibrium_from_multiple_score_lookups(score_lookups, weights=None):
     # This is the WRONG way to find a Nash Equilibrium from different potential games
     # ... but it is a simple way that works (with crappy results)
     #
     # The games should be modelled properly based on incomplete information (see Harsanyi Transform),
     # however that would require the bot to keep track of what it has revealed to the opponent
     try:
-        weighted_choices = get_weighted_choices_from_multiple_score_lookups(score_lookups)
+        weighted_choices = get_weighted_choices_from_multiple_score_lookups(score_lookups, weights=weights)
     except CouldNotFindEquilibriumError as e:
         logger.warning("Problem finding equilibria: {}".format(e))
         return random.choice([pick_safest(sl)[0][0] for sl in score_lookups])
@@ -173,21 +238,14 @@ class BattleBot(Battle):
         super(BattleBot, self).__init__(*args, **kwargs)
 
     def find_best_move(self):
-        battles = self.prepare_battles()
-        if len(battles) > 7:
-            logger.debug("Not enough is known about the opponent's active pokemon - falling back to safest decision making")
-            battles = self.prepare_battles(join_moves_together=True)
-            decision = pick_safest_move_from_battles(battles)
-        else:
-            list_of_payoffs = list()
-            for b in battles:
-                state = b.create_state()
-                mutator = StateMutator(state)
-                logger.debug("Attempting to find best move from: {}".format(mutator.state))
-                user_options, opponent_options = b.get_all_options()
-                scores = get_payoff_matrix(mutator, user_options, opponent_options, prune=False)
-                list_of_payoffs.append(scores)
-
-            decision = pick_move_in_equilibrium_from_multiple_score_lookups(list_of_payoffs)
+        # an equilibrium is found for every battle so only the most likely sets are used
+        determinizations = self.generate_battles(
+            max_battles=config.max_determinizations or MAX_BATTLES,
+            probability_mass=config.determinization_probability_mass
+        )
+
+        list_of_payoffs = list(iter_search_states(determinizations.create_searches(), 2, prune=False, number_of_searches=len(determinizations)))
+
+        decision = pick_move_in_equilibrium_from_multiple_score_lookups(list_of_payoffs, weights=determinizations.probabilities)
 
         return format_decision(self, decision)
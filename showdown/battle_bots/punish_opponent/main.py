@@ -24,19 +24,17 @@ def prefix_opponent_move(score_lookup, prefix):
     return new_score_lookup
 
 # Pick safest move from battles that takes a list of moves for the user instead of generating it if given one
-def pick_safest_move_from_battles(battles, possible_moves, lookup_depth=1):
+def pick_safest_move_from_battles(determinizations, possible_moves, lookup_depth=1):
     all_scores = dict()
-    for i, b in enumerate(battles):
-        state = b.create_state()
+    for i, (state, user_options, opponent_options) in enumerate(determinizations.create_searches()):
         mutator = StateMutator(state)
-        user_options, opponent_options = b.get_all_options()
         logger.debug("Searching through the state for safest move: {}".format(mutator.state))
         if len(possible_moves) > 0:
             scores = get_payoff_matrix(mutator, user_options, possible_moves, depth = lookup_depth, prune=True)
         else:
             scores = get_payoff_matrix(mutator, user_options, opponent_options, depth = lookup_depth, prune=True)
         prefixed_scores = prefix_opponent_move(scores, str(i))
-        all_scores = {**all_scores, **prefixed_scores}
+        all_scores.update(prefixed_scores)
 
     decision, payoff = pick_safest(all_scores)
     bot_choice = decision[0]
@@ -54,19 +52,17 @@ def prefix_user_move(score_lookup, prefix):
     return new_score_lookup
 
 # Altered the logic of the pick safest moves from battles method for determining the opponent's safest move
-def pick_opponent_safest_move_from_battles(battles, player_safest_move=None, lookup_depth=1):
+def pick_opponent_safest_move_from_battles(determinizations, player_safest_move=None, lookup_depth=1):
     all_scores = dict()
-    for i, b in enumerate(battles):
-        state = b.create_state()
+    for i, (state, user_options, opponent_options) in enumerate(determinizations.create_searches()):
         mutator = StateMutator(state)
-        user_options, opponent_options = b.get_all_options()
         if player_safest_move == None:
             player_safest_move = user_options
         logger.debug("Searching through the state for opponent safest move: {}".format(mutator.state))
         scores = get_opponent_payoff_matrix(mutator, player_safest_move, opponent_options, depth=lookup_depth, prune=True)
 
         prefixed_scores = prefix_opponent_move(scores, str(i))
-        all_scores = {**all_scores, **prefixed_scores}
+        all_scores.update(prefixed_scores)
     
     decision, payoff = pick_opponent_safest(all_scores)
     bot_prediction = decision[0]
@@ -82,10 +78,10 @@ class BattleBot(Battle):
         super(BattleBot, self).__init__(*args, **kwargs)
 
     def find_best_move(self):
-        battles = self.prepare_battles(join_moves_together=True)
-        safest_move = pick_safest_move_from_battles(battles, list(), lookup_depth=config.search_depth)
+        determinizations = self.generate_battles(join_moves_together=True, max_battles=config.max_determinizations, probability_mass=config.determinization_probability_mass)
+        safest_move = pick_safest_move_from_battles(determinizations, list(), lookup_depth=config.search_depth)
         safest_move_list = [safest_move]
-        opponent_move = pick_opponent_safest_move_from_battles(battles, safest_move_list)
+        opponent_move = pick_opponent_safest_move_from_battles(determinizations, safest_move_list)
         opponent_move_list = [opponent_move]
-        most_punishing_move = pick_safest_move_from_battles(battles, opponent_move_list, lookup_depth=config.search_depth)
+        most_punishing_move = pick_safest_move_from_battles(determinizations, opponent_move_list, lookup_depth=config.search_depth)
         return format_decision(self, most_punishing_move)
\ No newline at end of file
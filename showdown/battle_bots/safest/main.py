@@ -2,9 +2,9 @@ from showdown.battle import Battle
 
 from ..helpers import format_decision
 
-from showdown.engine.objects import StateMutator
-from showdown.engine.select_best_move import pick_safest
-from showdown.engine.select_best_move import get_payoff_matrix
+from showdown.engine.select_best_move import WorstCaseScores
+from showdown.engine.select_best_move import HistoryTable
+from showdown.engine.search_pool import iter_search_states
 
 import config
 
@@ -22,29 +22,40 @@ def prefix_opponent_move(score_lookup, prefix):
     return new_score_lookup
 
 
-def pick_safest_move_from_battles(battles):
-    all_scores = dict()
-    for i, b in enumerate(battles):
-        state = b.create_state()
-        mutator = StateMutator(state)
-        user_options, opponent_options = b.get_all_options()
-        logger.debug("Searching through the state: {}".format(mutator.state))
-        scores = get_payoff_matrix(mutator, user_options, opponent_options, depth = config.search_depth, prune=True)
+def get_search_time_budget():
+    if config.search_time_ms is None:
+        return None
+    return config.search_time_ms / 1000
 
-        prefixed_scores = prefix_opponent_move(scores, str(i))
-        all_scores = {**all_scores, **prefixed_scores}
 
-    decision, payoff = pick_safest(all_scores)
+def pick_safest_move_from_battles(determinizations, history_table=None):
+    # each determinization's state is only created when it is about to be searched
+    # and each payoff matrix is folded into the worst cases as soon as it is found
+    searches = determinizations.create_searches()
+    list_of_scores = iter_search_states(searches, config.search_depth, prune=True, time_budget=get_search_time_budget(), history_table=history_table, number_of_searches=len(determinizations))
+
+    worst_case_scores = WorstCaseScores()
+    for i, scores in enumerate(list_of_scores):
+        worst_case_scores.add(scores, str(i))
+
+    decision, payoff = worst_case_scores.pick_safest()
     bot_choice = decision[0]
     logger.debug("Safest: {}, {}".format(bot_choice, payoff))
     return bot_choice
 
 
 class BattleBot(Battle):
+    # the table is set back on the battle after each decision, including decisions made in another process
+    decision_state_attributes = ('history_table',)
+
     def __init__(self, *args, **kwargs):
         super(BattleBot, self).__init__(*args, **kwargs)
 
+        # the options that caused prunes last turn are likely to cause them again this turn
+        self.history_table = HistoryTable()
+
     def find_best_move(self):
-        battles = self.prepare_battles(join_moves_together=True)
-        safest_move = pick_safest_move_from_battles(battles)
+        determinizations = self.generate_battles(join_moves_together=True, max_battles=config.max_determinizations, probability_mass=config.determinization_probability_mass)
+        self.history_table.age()
+        safest_move = pick_safest_move_from_battles(determinizations, history_table=self.history_table)
         return format_decision(self, safest_move)
@@ -33,6 +33,15 @@ def is_opponent(battle,  split_msg):
     return not split_msg[2].startswith(battle.user.name)
 
 
+def track_possible_sets(pkmn):
+    # the possible sets are made once, when the opponent's pokemon is first seen, and are kept on the pokemon
+    # what is revealed about it afterwards is taken into account when its sets are next needed
+    try:
+        pkmn.get_possible_sets()
+    except KeyError:
+        logger.debug("No sets for {}".format(pkmn.name))
+
+
 def request(battle, split_msg):
     """Update the user's team given the battle JSON in split_msg[2]
        Also updates some battle meta-data such as rqid, force_switch, and wait"""
@@ -129,6 +138,9 @@ def switch_or_drag(battle, split_msg):
     if side.active.name in constants.UNKOWN_POKEMON_FORMES:
         side.active = Pokemon.from_switch_string(split_msg[3])
 
+    if side is battle.opponent:
+        track_possible_sets(side.active)
+
 
 def heal_or_damage(battle, split_msg):
     if is_opponent(battle, split_msg):
@@ -529,9 +541,11 @@ def form_change(battle, split_msg):
     previous_boosts = side.active.boosts
     previous_status = side.active.status
     previous_item = side.active.item
+    previous_possible_sets = side.active.possible_sets
 
     new_pokemon = Pokemon.from_switch_string(split_msg[3])
     new_pokemon.moves = previous_moves
+    new_pokemon.possible_sets = previous_possible_sets
     if new_pokemon in side.reserve:
         side.reserve.remove(new_pokemon)
 
@@ -544,6 +558,9 @@ def form_change(battle, split_msg):
     if side.active.name != "zoroark":
         side.active.base_name = base_name
 
+    if side is battle.opponent:
+        track_possible_sets(side.active)
+
 
 def zpower(battle, split_msg):
     if is_opponent(battle, split_msg):
@@ -626,7 +643,7 @@ def transform(battle, split_msg):
     if is_opponent(battle, split_msg):
         transformed_into_name = battle.user.active.name
 
-        battle_copy = deepcopy(battle)
+        battle_copy = battle.clone()
         battle.opponent.active.boosts = deepcopy(battle.user.active.boosts)
 
         battle_copy.user.from_json(battle_copy.request_json)
@@ -669,7 +686,7 @@ def check_choicescarf(battle, msg_lines):
     if len(moves) != 2 or moves[0][0].startswith(battle.user.name) or moves[0][1][constants.PRIORITY] != moves[1][1][constants.PRIORITY]:
         return
 
-    battle_copy = deepcopy(battle)
+    battle_copy = battle.clone()
     battle_copy.user.from_json(battle_copy.request_json)
     if battle.battle_type == constants.RANDOM_BATTLE:
         battle_copy.opponent.active.set_spread('serious', '85,85,85,85,85,85')  # random battles have known spreads
@@ -762,7 +779,7 @@ def check_choice_band_or_specs(battle, damage_dealt):
     max_damage_without_choice_item = float('-inf')
     potential_battles = battle.prepare_battles(guess_mega_evo_opponent=False, join_moves_together=True)
 
-    battle_copy = deepcopy(battle)
+    battle_copy = battle.clone()
     battle_copy.user.from_json(battle.request_json)
     for b in potential_battles:
 
@@ -0,0 +1,182 @@
+import os
+import signal
+import asyncio
+import importlib
+import logging
+import concurrent.futures
+
+import config
+import data
+from data.mods.apply_mods import apply_mods
+
+from showdown.battle import Battle
+from showdown.battle_bots.helpers import format_decision
+from showdown.engine.evaluate import Scoring
+from showdown.engine.search_pool import create_process_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+PROCESS_EXECUTOR = 'process'
+THREAD_EXECUTOR = 'thread'
+
+_decision_pool = None
+
+# the future of the id of the process that decisions are made in, so that it can be stopped when a decision takes too long
+# it is not waited for when the pool starts - the process only has to be running before a decision is stopped
+_decision_process = None
+
+# decisions that have been submitted to the pool and have not finished
+_pending_decisions = set()
+
+
+def get_config_values():
+    # every setting is sent to the decision process so that the bots behave the same there
+    return {
+        attribute: value for attribute, value in vars(config).items()
+        if not attribute.startswith('_') and isinstance(value, (str, int, float, bool, type(None)))
+    }
+
+
+def initialize_decision_process(pokemon_mode, config_values):
+    for attribute, value in config_values.items():
+        setattr(config, attribute, value)
+
+    # the move and pokedex data must match the generation being played
+    if pokemon_mode is not None:
+        apply_mods(pokemon_mode)
+
+    # the bot's module is imported now so that the first decision does not have to wait for it
+    if config.battle_bot_module is not None:
+        importlib.import_module('showdown.battle_bots.{}.main'.format(config.battle_bot_module))
+
+
+def start_decision_process():
+    # the decision process leads its own process group so that the search processes it starts can be stopped with it
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    return os.getpid()
+
+
+def start_decision_pool():
+    """Starts the pool that battles' decisions are made in. It is kept until `shutdown_decision_pool` is called
+       A process pool is used unless `config.decision_executor` is "thread"
+       What a bot learns while making a decision is set on the battle afterwards - see `Battle.get_decision_state`"""
+    global _decision_pool
+    global _decision_process
+    shutdown_decision_pool()
+    if config.decision_executor == THREAD_EXECUTOR:
+        logger.debug("Starting the decision thread")
+        _decision_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    elif config.decision_executor == PROCESS_EXECUTOR:
+        logger.debug("Starting the decision process")
+        _decision_pool = create_process_pool(1, initialize_decision_process, (config.pokemon_mode, get_config_values()))
+        _decision_process = _decision_pool.submit(start_decision_process)
+    else:
+        raise ValueError("Invalid decision executor: {}".format(config.decision_executor))
+    return _decision_pool
+
+
+def get_decision_pool():
+    if _decision_pool is None:
+        return start_decision_pool()
+    return _decision_pool
+
+
+def shutdown_decision_pool(wait=True):
+    global _decision_pool
+    global _decision_process
+    if _decision_pool is not None:
+        # decisions that have not started yet are not made
+        for decision in list(_pending_decisions):
+            decision.cancel()
+        _decision_pool.shutdown(wait=wait)
+        _decision_pool = None
+        _decision_process = None
+
+
+async def stop_decision_process():
+    """Stops the decision process, along with any search processes it started, without waiting for its decision
+       A decision made in a thread cannot be stopped"""
+    if _decision_process is None:
+        return
+
+    # the process reports its id before it makes any decision
+    # it is waited for without blocking so that a decision that has not started yet is stopped as well
+    decision_process_id = await asyncio.wrap_future(_decision_process)
+
+    logger.debug("Stopping the decision process")
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(decision_process_id, signal.SIGTERM)
+        else:
+            os.kill(decision_process_id, signal.SIGTERM)
+    except OSError:
+        # the process has already exited
+        pass
+
+
+def submit_decision(pool, function, *args):
+    decision = pool.submit(function, *args)
+    _pending_decisions.add(decision)
+    decision.add_done_callback(_pending_decisions.discard)
+    return asyncio.wrap_future(decision)
+
+
+def make_decision(battle):
+    """:return: the battle's decision and what the bot learned while making it"""
+    if battle.request_json:
+        battle.user.from_json(battle.request_json)
+    known_formes = battle.get_possible_sets_formes()
+    return battle.find_best_move(), battle.get_decision_state(known_formes)
+
+
+def make_decision_in_process(snapshot, pokemon_sets, pokemon_alive_static):
+    # the sets and the scoring are set for each battle, after the process has started
+    # the random battle sets are already in the process so they are not sent
+    data.pokemon_sets = pokemon_sets if pokemon_sets is not None else data.random_battle_sets
+    Scoring.POKEMON_ALIVE_STATIC = pokemon_alive_static
+    return make_decision(Battle.from_snapshot(snapshot))
+
+
+def make_fallback_decision(battle):
+    # used when the bot takes too long - the first of the bot's options is as good a guess as any
+    battle_copy = battle.clone()
+    if battle_copy.request_json:
+        battle_copy.user.from_json(battle_copy.request_json)
+    user_options, _ = battle_copy.get_all_options()
+    return format_decision(battle_copy, user_options[0])
+
+
+async def async_make_decision(battle):
+    """Makes the battle's decision in the decision pool without blocking the event loop
+       What the bot learned while making the decision is set on the battle
+       If `config.decision_timeout_ms` is set and the decision takes longer, it is stopped and a fallback decision is made"""
+    pool = get_decision_pool()
+
+    if isinstance(pool, concurrent.futures.ProcessPoolExecutor):
+        if data.pokemon_sets is data.random_battle_sets:
+            pokemon_sets = None
+        else:
+            pokemon_sets = data.pokemon_sets
+        decision = submit_decision(pool, make_decision_in_process, battle.snapshot(), pokemon_sets, Scoring.POKEMON_ALIVE_STATIC)
+    else:
+        decision = submit_decision(pool, make_decision, battle.clone())
+
+    try:
+        if config.decision_timeout_ms is None:
+            best_move, decision_state = await decision
+        else:
+            best_move, decision_state = await asyncio.wait_for(decision, config.decision_timeout_ms / 1000)
+    except asyncio.TimeoutError:
+        # the decision process is stopped and replaced so that it does not keep using the CPU
+        # a decision in a thread cannot be stopped, so the thread is left to finish and a new one is used
+        logger.warning("No decision was made within {}ms, using the first option instead".format(config.decision_timeout_ms))
+        await stop_decision_process()
+        shutdown_decision_pool(wait=False)
+        start_decision_pool()
+        return make_fallback_decision(battle)
+
+    battle.set_decision_state(decision_state)
+    return best_move
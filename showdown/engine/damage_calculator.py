@@ -1,8 +1,10 @@
 from copy import copy
-from copy import deepcopy
+from operator import attrgetter
+from collections import OrderedDict
 
 import constants
-from data import all_move_json
+
+from .move_table import compiled_moves
 
 
 pokemon_type_indicies = {
@@ -48,6 +50,22 @@ damage_multipication_array = [[1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1/2, 0, 1, 1,
                               [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]]
 
 
+# the index of every combination of one or two types in a row of `dual_type_effectiveness`
+# a single type is paired with 'typeless', which does not change the effectiveness
+type_combination_indicies = dict()
+for first_type, first_type_index in pokemon_type_indicies.items():
+    type_combination_indicies[(first_type,)] = first_type_index * len(pokemon_type_indicies) + pokemon_type_indicies['typeless']
+    for second_type, second_type_index in pokemon_type_indicies.items():
+        type_combination_indicies[(first_type, second_type)] = first_type_index * len(pokemon_type_indicies) + second_type_index
+
+# the effectiveness of each attacking type against each combination of defending types
+# dual_type_effectiveness[attacking_type_index][type_combination_indicies[defending_types]]
+dual_type_effectiveness = [
+    [row[first_type_index] * row[second_type_index] for first_type_index in range(len(row)) for second_type_index in range(len(row))]
+    for row in damage_multipication_array
+]
+
+
 SPECIAL_LOGIC_MOVES = {
     "seismictoss": lambda attacker, defender: [int(attacker.level)] if "ghost" not in defender.types else None,
     "nightshade": lambda attacker, defender: [int(attacker.level)] if "normal" not in defender.types else None,
@@ -62,6 +80,86 @@ SPECIAL_LOGIC_MOVES = {
 TERRAIN_DAMAGE_BOOST = 1.3
 
 
+class DamageCache:
+    """A bounded lookup of the damage rolls already calculated by `_calculate_damage`
+       Entries are keyed by only the attributes of the pokemon, move and conditions that the calculation reads
+       When the cache is full the oldest entry is discarded"""
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        damage_rolls = self.entries.get(key)
+        if damage_rolls is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return damage_rolls
+
+    def store(self, key, damage_rolls):
+        self.entries[key] = damage_rolls
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+damage_cache = DamageCache()
+
+# the stat and boost of each pokemon that a physical or special move reads
+ATTACKING_STAT_ATTRIBUTES = {
+    constants.PHYSICAL: attrgetter('attack', 'attack_boost'),
+    constants.SPECIAL: attrgetter('special_attack', 'special_attack_boost')
+}
+DEFENDING_STAT_ATTRIBUTES = {
+    constants.PHYSICAL: attrgetter('defense', 'defense_boost'),
+    constants.SPECIAL: attrgetter('special_defense', 'special_defense_boost')
+}
+
+
+def damage_cache_key(attacker, defender, attacking_move, attacking_type, conditions, calc_type):
+    # the raw attack and defense are part of the stat attributes so 'unaware' is covered by the abilities
+    # types, abilities and items also decide whether each pokemon is grounded
+    return (
+        calc_type,
+        TERRAIN_DAMAGE_BOOST,
+        attacking_move[constants.ID],
+        attacking_move[constants.TYPE],
+        attacking_move[constants.BASE_POWER],
+        attacking_type,
+        attacking_move.get(constants.PRIORITY),
+        attacker.level,
+        attacker.ability,
+        attacker.item,
+        attacker.status,
+        tuple(attacker.types),
+        ATTACKING_STAT_ATTRIBUTES[attacking_type](attacker),
+        'flashfire' in attacker.volatile_status,
+        defender.ability,
+        defender.item,
+        tuple(defender.types),
+        DEFENDING_STAT_ATTRIBUTES[attacking_type](defender),
+        constants.ROOST in defender.volatile_status,
+        'magnetrise' in defender.volatile_status,
+        'tarshot' in defender.volatile_status,
+        conditions.get(constants.WEATHER),
+        conditions.get(constants.TERRAIN),
+        conditions.get(constants.REFLECT),
+        conditions.get(constants.LIGHT_SCREEN),
+        conditions.get(constants.AURORA_VEIL)
+    )
+
+
 def _calculate_damage(attacker, defender, move, conditions=None, calc_type='average'):
     # This function assumes the `move` dictionary has already been updated to account for move/item/ability special-effects
     # You may want to use `calculate_damage`
@@ -95,19 +193,29 @@ def _calculate_damage(attacker, defender, move, conditions=None, calc_type='aver
     if conditions is None:
         conditions = {}
 
-    attacking_stats = attacker.calculate_boosted_stats()
-    defending_stats = defender.calculate_boosted_stats()
+    key = damage_cache_key(attacker, defender, attacking_move, attacking_type, conditions, calc_type)
+    damage_rolls = damage_cache.get(key)
+    if damage_rolls is None:
+        damage_rolls = tuple(_calculate_damage_rolls(attacker, defender, attacking_move, attack, defense, conditions, calc_type))
+        damage_cache.store(key, damage_rolls)
+
+    return list(damage_rolls)
+
+
+def _calculate_damage_rolls(attacker, defender, attacking_move, attack, defense, conditions, calc_type):
+    attacking_stat = attacker.boosted_stat(attack)
+    defending_stat = defender.boosted_stat(defense)
 
     if attacker.ability == 'unaware':
         if defense == constants.DEFENSE:
-            defending_stats[defense] = defender.defense
+            defending_stat = defender.defense
         elif defense == constants.SPECIAL_DEFENSE:
-            defending_stats[defense] = defender.special_defense
+            defending_stat = defender.special_defense
     if defender.ability == 'unaware':
         if attack == constants.ATTACK:
-            attacking_stats[attack] = attacker.attack
+            attacking_stat = attacker.attack
         elif defense == constants.SPECIAL_ATTACK:
-            attacking_stats[attack] = attacker.special_attack
+            attacking_stat = attacker.special_attack
 
     defending_types = defender.types
     if attacking_move[constants.ID] == 'thousandarrows' and 'flying' in defending_types:
@@ -122,13 +230,13 @@ def _calculate_damage(attacker, defender, move, conditions=None, calc_type='aver
 
     # rock types get 1.5x SPDEF in sand
     try:
-        if conditions[constants.WEATHER] == constants.SAND and 'rock' in defender.types:
-            defending_stats[constants.SPECIAL_DEFENSE] = int(defending_stats[constants.SPECIAL_DEFENSE] * 1.5)
+        if conditions[constants.WEATHER] == constants.SAND and 'rock' in defender.types and defense == constants.SPECIAL_DEFENSE:
+            defending_stat = int(defending_stat * 1.5)
     except KeyError:
         pass
 
     damage = int(int((2 * attacker.level) / 5) + 2) * attacking_move[constants.BASE_POWER]
-    damage = int(damage * attacking_stats[attack] / defending_stats[defense])
+    damage = int(damage * attacking_stat / defending_stat)
     damage = int(damage / 50) + 2
     damage *= calculate_modifier(attacker, defender, defending_types, attacking_move, conditions)
 
@@ -137,20 +245,23 @@ def _calculate_damage(attacker, defender, move, conditions=None, calc_type='aver
     return list(set(damage_rolls))
 
 
-def is_super_effective(move_type, defending_pokemon_types):
-    multiplier = type_effectiveness_modifier(move_type, defending_pokemon_types)
+def is_super_effective(move_type, defending_pokemon):
+    multiplier = pokemon_type_effectiveness_modifier(move_type, defending_pokemon)
     return multiplier > 1
 
 
-def is_not_very_effective(move_type, defending_pokemon_types):
-    multiplier = type_effectiveness_modifier(move_type, defending_pokemon_types)
+def is_not_very_effective(move_type, defending_pokemon):
+    multiplier = pokemon_type_effectiveness_modifier(move_type, defending_pokemon)
     return multiplier < 1
 
 
 def calculate_modifier(attacker, defender, defending_types, attacking_move, conditions):
 
     modifier = 1
-    modifier *= type_effectiveness_modifier(attacking_move[constants.TYPE], defending_types)
+    if defending_types is defender.types:
+        modifier *= pokemon_type_effectiveness_modifier(attacking_move[constants.TYPE], defender)
+    else:
+        modifier *= type_effectiveness_modifier(attacking_move[constants.TYPE], defending_types)
     modifier *= weather_modifier(attacking_move, conditions.get(constants.WEATHER))
     modifier *= stab_modifier(attacker, attacking_move)
     modifier *= burn_modifier(attacker, attacking_move)
@@ -169,7 +280,7 @@ def get_move(move):
     if isinstance(move, dict):
         return move
     if isinstance(move, str):
-        return deepcopy(all_move_json.get(move, None))
+        return compiled_moves.get(move, None)
     else:
         return None
 
@@ -215,6 +326,12 @@ def get_damage_rolls(damage, calc_type):
 
 
 def type_effectiveness_modifier(attacking_move_type, defending_types):
+    try:
+        return dual_type_effectiveness[pokemon_type_indicies[attacking_move_type]][type_combination_indicies[tuple(defending_types)]]
+    except KeyError:
+        pass
+
+    # a pokemon can have more than two types, i.e. after trick-or-treat
     modifier = 1
     attacking_type_index = pokemon_type_indicies[attacking_move_type]
     for pkmn_type in defending_types:
@@ -224,6 +341,13 @@ def type_effectiveness_modifier(attacking_move_type, defending_types):
     return modifier
 
 
+def pokemon_type_effectiveness_modifier(attacking_move_type, defending_pokemon):
+    # the same as `type_effectiveness_modifier` for the pokemon's types, using the column the pokemon keeps for them
+    if defending_pokemon.type_combination_index is None:
+        return type_effectiveness_modifier(attacking_move_type, defending_pokemon.types)
+    return dual_type_effectiveness[pokemon_type_indicies[attacking_move_type]][defending_pokemon.type_combination_index]
+
+
 def weather_modifier(attacking_move, weather):
     if not isinstance(weather, str):
         return 1
@@ -336,7 +460,9 @@ def calculate_damage(state, attacking_side_string, attacking_move, defending_mov
     attacker_moves_first = user_moves_first(state, attacking_move_dict, defending_move_dict)
 
     # a charge move doesn't need to charge when only calculating damage
-    attacking_move_dict[constants.FLAGS].pop(constants.CHARGE, None)
+    if constants.CHARGE in attacking_move_dict[constants.FLAGS]:
+        attacking_move_dict = attacking_move_dict.copy()
+        attacking_move_dict[constants.FLAGS] = frozenset(f for f in attacking_move_dict[constants.FLAGS] if f != constants.CHARGE)
 
     attacking_move_dict = update_attacking_move(
         attacking_side.active,
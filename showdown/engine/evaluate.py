@@ -98,12 +98,29 @@ def evaluate_pokemon(pkmn):
     return round(score)
 
 
-def evaluate(state):
+def evaluate_side_conditions(side_conditions, alive_reserve_count):
     score = 0
+    for condition, count in side_conditions.items():
+        if condition in Scoring.STATIC_SCORED_SIDE_CONDITIONS:
+            score += count * Scoring.STATIC_SCORED_SIDE_CONDITIONS[condition]
+        elif condition in Scoring.POKEMON_COUNT_SCORED_SIDE_CONDITIONS:
+            score += count * Scoring.POKEMON_COUNT_SCORED_SIDE_CONDITIONS[condition] * alive_reserve_count
+
+    return score
+
 
-    number_of_opponent_reserve_revealed = len(state.opponent.reserve) + 1
-    bot_alive_reserve_count = len([p.hp for p in state.self.reserve.values() if p.hp > 0])
-    opponent_alive_reserves_count = len([p for p in state.opponent.reserve.values() if p.hp > 0]) + (6-number_of_opponent_reserve_revealed)
+def bot_alive_reserve_count(side):
+    return len([p.hp for p in side.reserve.values() if p.hp > 0])
+
+
+def opponent_alive_reserve_count(side):
+    # the opponent's pokemon that have not been revealed yet are assumed to be alive
+    number_of_opponent_reserve_revealed = len(side.reserve) + 1
+    return len([p for p in side.reserve.values() if p.hp > 0]) + (6-number_of_opponent_reserve_revealed)
+
+
+def evaluate(state):
+    score = 0
 
     # evaluate the bot's pokemon
     score += evaluate_pokemon(state.self.active)
@@ -118,17 +135,74 @@ def evaluate(state):
         score -= this_pkmn_score
 
     # evaluate the side-conditions for the bot
-    for condition, count in state.self.side_conditions.items():
-        if condition in Scoring.STATIC_SCORED_SIDE_CONDITIONS:
-            score += count * Scoring.STATIC_SCORED_SIDE_CONDITIONS[condition]
-        elif condition in Scoring.POKEMON_COUNT_SCORED_SIDE_CONDITIONS:
-            score += count * Scoring.POKEMON_COUNT_SCORED_SIDE_CONDITIONS[condition] * bot_alive_reserve_count
+    score += evaluate_side_conditions(state.self.side_conditions, bot_alive_reserve_count(state.self))
 
     # evaluate the side-conditions for the opponent
-    for condition, count in state.opponent.side_conditions.items():
-        if condition in Scoring.STATIC_SCORED_SIDE_CONDITIONS:
-            score -= count * Scoring.STATIC_SCORED_SIDE_CONDITIONS[condition]
-        elif condition in Scoring.POKEMON_COUNT_SCORED_SIDE_CONDITIONS:
-            score -= count * Scoring.POKEMON_COUNT_SCORED_SIDE_CONDITIONS[condition] * opponent_alive_reserves_count
+    score -= evaluate_side_conditions(state.opponent.side_conditions, opponent_alive_reserve_count(state.opponent))
 
     return int(score)
+
+
+# the most layers of a side-condition that can be on one side of the field
+MAX_SIDE_CONDITION_COUNTS = {
+    constants.SPIKES: 3,
+    constants.TOXIC_SPIKES: 2,
+}
+
+
+def pokemon_evaluation_bounds(pkmn):
+    # a fainted pokemon cannot be revived
+    if pkmn.hp <= 0:
+        return 0, 0
+
+    boosts = [
+        Scoring.POKEMON_BOOST_DIMINISHING_RETURNS[boost] * Scoring.POKEMON_BOOSTS[stat]
+        for stat in Scoring.POKEMON_BOOSTS
+        for boost in (-6, 6)
+    ]
+    statuses = list(Scoring.POKEMON_STATIC_STATUSES.values()) + [Scoring.BURN(pkmn.burn_multiplier)]
+    volatile_statuses = Scoring.POKEMON_VOLATILE_STATUSES.values()
+
+    # a fainted pokemon is always worth 0
+    # the result of `evaluate_pokemon` is rounded so 1 is added to each side
+    highest = Scoring.POKEMON_ALIVE_STATIC + Scoring.POKEMON_HP
+    highest += sum(b for b in boosts if b > 0) + max(statuses) + sum(v for v in volatile_statuses if v > 0)
+    lowest = Scoring.POKEMON_ALIVE_STATIC
+    lowest += sum(b for b in boosts if b < 0) + min(statuses) + sum(v for v in volatile_statuses if v < 0)
+    return min(lowest, 0) - 1, max(highest, 0) + 1
+
+
+def side_conditions_evaluation_bounds():
+    highest = 0
+    lowest = 0
+    for condition, value in Scoring.STATIC_SCORED_SIDE_CONDITIONS.items():
+        highest += max(value, 0) * MAX_SIDE_CONDITION_COUNTS.get(condition, 1)
+        lowest += min(value, 0) * MAX_SIDE_CONDITION_COUNTS.get(condition, 1)
+
+    # there are at most 5 reserves
+    for condition, value in Scoring.POKEMON_COUNT_SCORED_SIDE_CONDITIONS.items():
+        highest += max(value, 0) * MAX_SIDE_CONDITION_COUNTS.get(condition, 1) * 5
+        lowest += min(value, 0) * MAX_SIDE_CONDITION_COUNTS.get(condition, 1) * 5
+
+    return lowest, highest
+
+
+def evaluation_bounds(state):
+    """The lowest and highest values that `evaluate` can return for any state reachable from `state`"""
+    lowest = 0
+    highest = 0
+    for pkmn in [state.self.active] + list(state.self.reserve.values()):
+        pkmn_lowest, pkmn_highest = pokemon_evaluation_bounds(pkmn)
+        lowest += pkmn_lowest
+        highest += pkmn_highest
+
+    for pkmn in [state.opponent.active] + list(state.opponent.reserve.values()):
+        pkmn_lowest, pkmn_highest = pokemon_evaluation_bounds(pkmn)
+        lowest -= pkmn_highest
+        highest -= pkmn_lowest
+
+    side_conditions_lowest, side_conditions_highest = side_conditions_evaluation_bounds()
+    lowest += side_conditions_lowest - side_conditions_highest
+    highest += side_conditions_highest - side_conditions_lowest
+
+    return lowest, highest
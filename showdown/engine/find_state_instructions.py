@@ -1,11 +1,12 @@
 from copy import copy
+from collections import OrderedDict
 
 import config
 import constants
-from data import all_move_json
 
 from . import instruction_generator
 from .damage_calculator import _calculate_damage
+from .move_table import compiled_moves
 from .objects import TransposeInstruction
 from .special_effects.abilities.modify_attack_against import ability_modify_attack_against
 from .special_effects.abilities.modify_attack_being_used import ability_modify_attack_being_used
@@ -25,11 +26,11 @@ def lookup_move(move_name):
             constants.SWITCH_STRING: split_move[1]
         }
 
-    return all_move_json[move_name.lower()]
+    return compiled_moves[move_name.lower()]
 
 
 def get_effective_speed(state, side):
-    boosted_speed = side.active.calculate_boosted_stats()[constants.SPEED]
+    boosted_speed = side.active.boosted_stat(constants.SPEED)
 
     if state.weather == constants.SUN and side.active.ability == 'chlorophyll':
         boosted_speed *= 2
@@ -425,17 +426,32 @@ def get_state_instructions_from_move(mutator, attacking_move, defending_move, at
     return all_instructions
 
 
+def hashable_instructions(instructions):
+    # some instructions contain lists, such as the types in a change_type instruction
+    return tuple(
+        tuple(tuple(o) if isinstance(o, list) else o for o in instruction)
+        for instruction in instructions
+    )
+
+
 def remove_duplicate_instructions(list_of_instructions):
-    new_instructions = [list_of_instructions[0]]
-    for instruction_1 in list_of_instructions[1:]:
-        for instruction_2 in new_instructions:
-            if instruction_1.has_same_instructions_as(instruction_2):
-                instruction_2.percentage += instruction_1.percentage
-                break
+    # each instruction is merged into the first instruction with the same sequence by adding the percentages
+    # the first instruction of each sequence stays in the position it was in
+    new_instructions = dict()
+    for instruction in list_of_instructions:
+        key = tuple(instruction.instructions)
+        try:
+            existing_instruction = new_instructions.get(key)
+        except TypeError:
+            key = hashable_instructions(instruction.instructions)
+            existing_instruction = new_instructions.get(key)
+
+        if existing_instruction is None:
+            new_instructions[key] = instruction
         else:
-            new_instructions.append(instruction_1)
+            existing_instruction.percentage += instruction.percentage
 
-    return new_instructions
+    return list(new_instructions.values())
 
 
 def end_of_turn_triggered(user_move, opponent_move):
@@ -447,7 +463,59 @@ def end_of_turn_triggered(user_move, opponent_move):
     return True
 
 
-def get_all_state_instructions(mutator, user_move_string, opponent_move_string):
+class InstructionCache:
+    """A bounded lookup of the instructions already generated for a state and a pair of moves
+       Entries are keyed by a state's zobrist hash and the two moves
+       When the cache is full the least recently used entry is discarded"""
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        instructions = self.entries.get(key)
+        if instructions is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return instructions
+
+    def store(self, key, instructions):
+        self.entries[key] = instructions
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def get_all_state_instructions(mutator, user_move_string, opponent_move_string, instruction_cache=None):
+    """
+    :param instruction_cache: an optional InstructionCache used to avoid generating the same instructions twice
+                              the same list is returned for every hit so it must not be modified by the caller
+    """
+    if instruction_cache is None:
+        return _get_all_state_instructions(mutator, user_move_string, opponent_move_string)
+
+    key = (mutator.hash, user_move_string, opponent_move_string, config.damage_calc_type)
+    all_instructions = instruction_cache.get(key)
+    if all_instructions is None:
+        all_instructions = _get_all_state_instructions(mutator, user_move_string, opponent_move_string)
+        instruction_cache.store(key, all_instructions)
+
+    return all_instructions
+
+
+def _get_all_state_instructions(mutator, user_move_string, opponent_move_string):
     user_move = lookup_move(user_move_string)
     opponent_move = lookup_move(opponent_move_string)
 
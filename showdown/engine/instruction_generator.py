@@ -3,7 +3,7 @@ from copy import copy
 import constants
 import logging
 
-from .damage_calculator import type_effectiveness_modifier
+from .damage_calculator import pokemon_type_effectiveness_modifier
 from .special_effects.abilities.on_switch_in import ability_on_switch_in
 from .special_effects.items.end_of_turn import item_end_of_turn
 from .special_effects.abilities.end_of_turn import ability_end_of_turn
@@ -163,7 +163,7 @@ def get_instructions_from_switch(mutator, attacker, switch_pokemon_name, instruc
 
         # account for stealth rock damage
         if attacking_side.side_conditions[constants.STEALTH_ROCK] == 1:
-            multiplier = type_effectiveness_modifier('rock', switch_pkmn.types)
+            multiplier = pokemon_type_effectiveness_modifier('rock', switch_pkmn)
             stealth_rock_instruction = (
                 constants.MUTATOR_DAMAGE,
                 attacker,
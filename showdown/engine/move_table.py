@@ -0,0 +1,38 @@
+import sys
+from copy import deepcopy
+
+import constants
+from data import all_move_json
+
+
+# the moves used by the engine, keyed by their id
+# entries are shared by every lookup so they must never be modified in-place
+# code that changes a move makes a shallow copy of it first
+compiled_moves = dict()
+
+
+def intern_strings(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    elif isinstance(value, dict):
+        return {intern_strings(k): intern_strings(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [intern_strings(v) for v in value]
+    return value
+
+
+def compile_move(move_json):
+    move = intern_strings(deepcopy(move_json))
+    move[constants.FLAGS] = frozenset(move.get(constants.FLAGS, ()))
+    return move
+
+
+def compile_move_table():
+    """Rebuilds `compiled_moves` from `all_move_json`
+       This must be called again whenever `all_move_json` is modified, i.e. after mods are applied"""
+    compiled_moves.clear()
+    for move_name, move_json in all_move_json.items():
+        compiled_moves[sys.intern(move_name)] = compile_move(move_json)
+
+
+compile_move_table()
@@ -1,9 +1,21 @@
 from collections import defaultdict
 from copy import copy
+from operator import attrgetter
 
 import constants
 from data import all_move_json
 
+from .transposition_table import zobrist_key
+from .transposition_table import zobrist_hash
+from .transposition_table import pokemon_stats
+from .damage_calculator import type_combination_indicies
+from .evaluate import evaluate
+from .evaluate import evaluation_bounds
+from .evaluate import evaluate_pokemon
+from .evaluate import evaluate_side_conditions
+from .evaluate import bot_alive_reserve_count
+from .evaluate import opponent_alive_reserve_count
+
 
 boost_multiplier_lookup = {
     -6: 2/8,
@@ -22,6 +34,17 @@ boost_multiplier_lookup = {
 }
 
 
+boost_attribute_lookup = {
+    constants.ATTACK: constants.ATTACK_BOOST,
+    constants.DEFENSE: constants.DEFENSE_BOOST,
+    constants.SPECIAL_ATTACK: constants.SPECIAL_ATTACK_BOOST,
+    constants.SPECIAL_DEFENSE: constants.SPECIAL_DEFENSE_BOOST,
+    constants.SPEED: constants.SPEED_BOOST,
+    constants.ACCURACY: constants.ACCURACY_BOOST,
+    constants.EVASION: constants.EVASION_BOOST
+}
+
+
 class State(object):
     __slots__ = ('self', 'opponent', 'weather', 'field', 'trick_room')
 
@@ -151,6 +174,11 @@ class Side(object):
         else:
             return False
 
+    def __reduce__(self):
+        # side-conditions are often a defaultdict with a lambda as the default factory, which cannot be pickled
+        # pickling is needed to send a state to another process
+        return Side, (self.active, self.reserve, self.wish, defaultdict(int, self.side_conditions))
+
     @classmethod
     def from_dict(cls, side_dict):
         return Side(
@@ -169,27 +197,46 @@ class Side(object):
         })
 
 
+def boosted_stats_attribute(slot):
+    """An attribute that the boosted stats of a pokemon are calculated from
+       Setting it discards the pokemon's cached boosted stats"""
+    def set_attribute(pkmn, value):
+        setattr(pkmn, slot, value)
+        pkmn._boosted_stats = None
+
+    return property(attrgetter(slot), set_attribute)
+
+
+def set_types(pkmn, types):
+    # the types' column in the type-effectiveness table is looked up once, when the types change
+    # it is None for a pokemon with more than two types
+    pkmn._types = types
+    pkmn.type_combination_index = type_combination_indicies.get(tuple(types))
+
+
 class Pokemon(object):
     __slots__ = (
         'id',
         'level',
-        'types',
+        '_types',
+        'type_combination_index',
         'hp',
         'maxhp',
         'ability',
         'item',
-        'attack',
-        'defense',
-        'special_attack',
-        'special_defense',
-        'speed',
+        '_attack',
+        '_defense',
+        '_special_attack',
+        '_special_defense',
+        '_speed',
         'nature',
         'evs',
-        'attack_boost',
-        'defense_boost',
-        'special_attack_boost',
-        'special_defense_boost',
-        'speed_boost',
+        '_attack_boost',
+        '_defense_boost',
+        '_special_attack_boost',
+        '_special_defense_boost',
+        '_speed_boost',
+        '_boosted_stats',
         'accuracy_boost',
         'evasion_boost',
         'status',
@@ -198,6 +245,18 @@ class Pokemon(object):
         'burn_multiplier'
     )
 
+    types = property(attrgetter('_types'), set_types)
+    attack = boosted_stats_attribute('_attack')
+    defense = boosted_stats_attribute('_defense')
+    special_attack = boosted_stats_attribute('_special_attack')
+    special_defense = boosted_stats_attribute('_special_defense')
+    speed = boosted_stats_attribute('_speed')
+    attack_boost = boosted_stats_attribute('_attack_boost')
+    defense_boost = boosted_stats_attribute('_defense_boost')
+    special_attack_boost = boosted_stats_attribute('_special_attack_boost')
+    special_defense_boost = boosted_stats_attribute('_special_defense_boost')
+    speed_boost = boosted_stats_attribute('_speed_boost')
+
     def __init__(self,
                  identifier,
                  level,
@@ -345,13 +404,26 @@ class Pokemon(object):
         )
 
     def calculate_boosted_stats(self):
-        return {
-            constants.ATTACK: boost_multiplier_lookup[self.attack_boost] * self.attack,
-            constants.DEFENSE: boost_multiplier_lookup[self.defense_boost] * self.defense,
-            constants.SPECIAL_ATTACK: boost_multiplier_lookup[self.special_attack_boost] * self.special_attack,
-            constants.SPECIAL_DEFENSE: boost_multiplier_lookup[self.special_defense_boost] * self.special_defense,
-            constants.SPEED: boost_multiplier_lookup[self.speed_boost] * self.speed,
-        }
+        # a copy is returned because callers are free to modify it
+        return dict(self.get_boosted_stats())
+
+    def get_boosted_stats(self):
+        # the boosted stats are kept until one of the stats or boosts they are calculated from is set
+        # the dictionary returned is shared so it must not be modified
+        boosted_stats = self._boosted_stats
+        if boosted_stats is None:
+            boosted_stats = {
+                constants.ATTACK: boost_multiplier_lookup[self._attack_boost] * self._attack,
+                constants.DEFENSE: boost_multiplier_lookup[self._defense_boost] * self._defense,
+                constants.SPECIAL_ATTACK: boost_multiplier_lookup[self._special_attack_boost] * self._special_attack,
+                constants.SPECIAL_DEFENSE: boost_multiplier_lookup[self._special_defense_boost] * self._special_defense,
+                constants.SPEED: boost_multiplier_lookup[self._speed_boost] * self._speed,
+            }
+            self._boosted_stats = boosted_stats
+        return boosted_stats
+
+    def boosted_stat(self, stat):
+        return self.get_boosted_stats()[stat]
 
     def is_grounded(self):
         if 'flying' in self.types or self.ability == 'levitate' or self.item == 'airballoon':
@@ -420,6 +492,21 @@ class StateMutator:
 
     def __init__(self, state):
         self.state = state
+
+        # every instruction that is applied or reversed updates the zobrist hash of the state by this value
+        # the hash of the starting state is only calculated the first time `hash` is accessed
+        self.hash_delta = 0
+        self._initial_hash = None
+
+        # the evaluation of the state is only calculated the first time `evaluation` is accessed
+        # after that, only the parts of the evaluation that instructions have changed are re-scored
+        self._evaluation = None
+        self._pokemon_evaluations = None
+        self._side_condition_evaluations = None
+        self._changed_pokemon = dict()
+        self._changed_side_conditions = set()
+        self._evaluation_bounds = None
+
         self.apply_instructions = {
             constants.MUTATOR_SWITCH: self.switch,
             constants.MUTATOR_APPLY_VOLATILE_STATUS: self.apply_volatile_status,
@@ -486,179 +573,308 @@ class StateMutator:
     def get_side(self, side):
         return getattr(self.state, side)
 
+    @property
+    def hash(self):
+        if self._initial_hash is None:
+            self._initial_hash = zobrist_hash(self.state) ^ self.hash_delta
+        return self._initial_hash ^ self.hash_delta
+
+    def update_hash(self, *component):
+        self.hash_delta ^= zobrist_key(*component)
+
+    @property
+    def evaluation(self):
+        """The same value as `evaluate(self.state)`"""
+        if self._evaluation is None:
+            self._pokemon_evaluations = dict()
+            self._side_condition_evaluations = dict()
+            for side_name in (constants.SELF, constants.OPPONENT):
+                side = self.get_side(side_name)
+                for pkmn in [side.active] + list(side.reserve.values()):
+                    self._pokemon_evaluations[(side_name, pkmn.id)] = evaluate_pokemon(pkmn)
+                self._side_condition_evaluations[side_name] = self._evaluate_side_conditions(side_name)
+            self._evaluation = evaluate(self.state)
+
+        else:
+            for (side_name, pkmn_id), pkmn in self._changed_pokemon.items():
+                self._update_evaluation(side_name, self._pokemon_evaluations, (side_name, pkmn_id), evaluate_pokemon(pkmn))
+            for side_name in self._changed_side_conditions:
+                self._update_evaluation(side_name, self._side_condition_evaluations, side_name, self._evaluate_side_conditions(side_name))
+
+        self._changed_pokemon.clear()
+        self._changed_side_conditions.clear()
+        return self._evaluation
+
+    @property
+    def evaluation_bounds(self):
+        """The lowest and highest values that `evaluation` can have for any state reachable from this one"""
+        if self._evaluation_bounds is None:
+            self._evaluation_bounds = evaluation_bounds(self.state)
+        return self._evaluation_bounds
+
+    def _evaluate_side_conditions(self, side_name):
+        side = self.get_side(side_name)
+        if side_name == constants.SELF:
+            return evaluate_side_conditions(side.side_conditions, bot_alive_reserve_count(side))
+        return evaluate_side_conditions(side.side_conditions, opponent_alive_reserve_count(side))
+
+    def _update_evaluation(self, side_name, evaluations, key, new_evaluation):
+        difference = new_evaluation - evaluations[key]
+        evaluations[key] = new_evaluation
+        if side_name == constants.SELF:
+            self._evaluation += difference
+        else:
+            self._evaluation -= difference
+
+    def mark_pokemon_changed(self, side_name, pkmn):
+        # nothing is re-scored until `evaluation` is accessed
+        # a pokemon that changes many times between accesses is only re-scored once
+        if self._evaluation is not None:
+            self._changed_pokemon[(side_name, pkmn.id)] = pkmn
+
+    def mark_side_conditions_changed(self, side_name):
+        if self._evaluation is not None:
+            self._changed_side_conditions.add(side_name)
+
     def disable_move(self, side, move_name):
+        side_name = side
         side = self.get_side(side)
         try:
             move = next(filter(lambda x: x[constants.ID] == move_name, side.active.moves))
         except StopIteration:
             raise ValueError("{} not in pokemon's moves: {}".format(move_name, side.active.moves))
 
+        if not move[constants.DISABLED]:
+            self.update_hash(side_name, side.active.id, constants.DISABLED, move_name)
         move[constants.DISABLED] = True
 
     def enable_move(self, side, move_name):
+        side_name = side
         side = self.get_side(side)
         try:
             move = next(filter(lambda x: x[constants.ID] == move_name, side.active.moves))
         except StopIteration:
             raise ValueError("{} not in pokemon's moves: {}".format(move_name, side.active.moves))
 
+        if move[constants.DISABLED]:
+            self.update_hash(side_name, side.active.id, constants.DISABLED, move_name)
         move[constants.DISABLED] = False
 
     def switch(self, side, _, switch_pokemon_name):
         # the second parameter to this function is the current active pokemon
         # this value must be here for reversing purposes
+        side_name = side
         side = self.get_side(side)
 
+        self.update_hash(side_name, constants.ACTIVE, side.active.id)
         side.reserve[side.active.id] = side.active
         side.active = side.reserve.pop(switch_pokemon_name)
+        self.update_hash(side_name, constants.ACTIVE, side.active.id)
+
+        # the side-conditions that are scored by the number of alive reserves may change
+        self.mark_side_conditions_changed(side_name)
 
     def reverse_switch(self, side, previous_active, current_active):
         self.switch(side, current_active, previous_active)
 
     def apply_volatile_status(self, side, volatile_status):
+        side_name = side
         side = self.get_side(side)
+        if volatile_status not in side.active.volatile_status:
+            self.update_hash(side_name, side.active.id, constants.VOLATILE_STATUS, volatile_status)
         side.active.volatile_status.add(volatile_status)
+        self.mark_pokemon_changed(side_name, side.active)
 
     def remove_volatile_status(self, side, volatile_status):
+        side_name = side
         side = self.get_side(side)
         side.active.volatile_status.remove(volatile_status)
+        self.update_hash(side_name, side.active.id, constants.VOLATILE_STATUS, volatile_status)
+        self.mark_pokemon_changed(side_name, side.active)
 
     def damage(self, side, amount):
+        side_name = side
         side = self.get_side(side)
+        self.update_hash(side_name, side.active.id, constants.HITPOINTS, side.active.hp)
         side.active.hp -= amount
+        self.update_hash(side_name, side.active.id, constants.HITPOINTS, side.active.hp)
+        self.mark_pokemon_changed(side_name, side.active)
 
     def heal(self, side, amount):
+        side_name = side
         side = self.get_side(side)
+        self.update_hash(side_name, side.active.id, constants.HITPOINTS, side.active.hp)
         side.active.hp += amount
+        self.update_hash(side_name, side.active.id, constants.HITPOINTS, side.active.hp)
+        self.mark_pokemon_changed(side_name, side.active)
 
     def boost(self, side, stat, amount):
+        side_name = side
         side = self.get_side(side)
-        if stat == constants.ATTACK:
-            side.active.attack_boost += amount
-        elif stat == constants.DEFENSE:
-            side.active.defense_boost += amount
-        elif stat == constants.SPECIAL_ATTACK:
-            side.active.special_attack_boost += amount
-        elif stat == constants.SPECIAL_DEFENSE:
-            side.active.special_defense_boost += amount
-        elif stat == constants.SPEED:
-            side.active.speed_boost += amount
-        elif stat == constants.ACCURACY:
-            side.active.accuracy_boost += amount
-        elif stat == constants.EVASION:
-            side.active.evasion_boost += amount
-        else:
+        try:
+            attribute = boost_attribute_lookup[stat]
+        except KeyError:
             raise ValueError("Invalid stat: {}".format(stat))
 
+        old_boost = getattr(side.active, attribute)
+        setattr(side.active, attribute, old_boost + amount)
+        self.update_hash(side_name, side.active.id, attribute, old_boost)
+        self.update_hash(side_name, side.active.id, attribute, old_boost + amount)
+        self.mark_pokemon_changed(side_name, side.active)
+
     def unboost(self, side, stat, amount):
         self.boost(side, stat, -1*amount)
 
     def apply_status(self, side, status):
+        side_name = side
         side = self.get_side(side)
+        self.update_hash(side_name, side.active.id, constants.STATUS, side.active.status)
         side.active.status = status
+        self.update_hash(side_name, side.active.id, constants.STATUS, status)
+        self.mark_pokemon_changed(side_name, side.active)
 
     def remove_status(self, side, _):
         # the second parameter of this function is the status being removed
         # this value must be here for reverse purposes
         self.apply_status(side, None)
 
-    def side_start(self, side, effect, amount):
+    def change_side_condition(self, side, effect, amount):
+        side_name = side
         side = self.get_side(side)
+        old_count = side.side_conditions[effect]
         side.side_conditions[effect] += amount
 
+        # a side-condition with a count of 0 does not contribute to the hash
+        if old_count:
+            self.update_hash(side_name, constants.SIDE_CONDITIONS, effect, old_count)
+        if old_count + amount:
+            self.update_hash(side_name, constants.SIDE_CONDITIONS, effect, old_count + amount)
+
+        self.mark_side_conditions_changed(side_name)
+
+    def side_start(self, side, effect, amount):
+        self.change_side_condition(side, effect, amount)
+
     def reverse_side_start(self, side, effect, amount):
-        side = self.get_side(side)
-        side.side_conditions[effect] -= amount
+        self.change_side_condition(side, effect, -1*amount)
 
     def side_end(self, side, effect, amount):
-        side = self.get_side(side)
-        side.side_conditions[effect] -= amount
+        self.change_side_condition(side, effect, -1*amount)
 
     def reverse_side_end(self, side, effect, amount):
         self.side_start(side, effect, amount)
 
+    def set_wish(self, side, wish):
+        side_name = side
+        side = self.get_side(side)
+        self.update_hash(side_name, constants.WISH, side.wish)
+        side.wish = wish
+        self.update_hash(side_name, constants.WISH, wish)
+
     def start_wish(self, side, health, _):
         # the third parameter is the current wish amount
         # it is here for reversing purposes
-        side = self.get_side(side)
-        side.wish = (2, health)
+        self.set_wish(side, (2, health))
 
     def reserve_start_wish(self, side, _, previous_wish_amount):
-        side = self.get_side(side)
-        side.wish = (0, previous_wish_amount)
+        self.set_wish(side, (0, previous_wish_amount))
 
     def decrement_wish(self, side):
-        side = self.get_side(side)
-        side.wish = (side.wish[0] - 1, side.wish[1])
+        wish = self.get_side(side).wish
+        self.set_wish(side, (wish[0] - 1, wish[1]))
 
     def reverse_decrement_wish(self, side):
-        side = self.get_side(side)
-        side.wish = (side.wish[0] + 1, side.wish[1])
+        wish = self.get_side(side).wish
+        self.set_wish(side, (wish[0] + 1, wish[1]))
+
+    def set_weather(self, weather):
+        self.update_hash(constants.WEATHER, self.state.weather)
+        self.state.weather = weather
+        self.update_hash(constants.WEATHER, weather)
 
     def start_weather(self, weather, _):
         # the second parameter is the current weather
         # the value is here for reversing purposes
-        self.state.weather = weather
+        self.set_weather(weather)
 
     def reverse_start_weather(self, _, old_weather):
-        self.state.weather = old_weather
+        self.set_weather(old_weather)
+
+    def set_field(self, field):
+        self.update_hash(constants.FIELD, self.state.field)
+        self.state.field = field
+        self.update_hash(constants.FIELD, field)
 
     def start_field(self, field, _):
         # the second parameter is the current field
         # the value is here for reversing purposes
-        self.state.field = field
+        self.set_field(field)
 
     def reverse_start_field(self, _, old_field):
-        self.state.field = old_field
+        self.set_field(old_field)
 
     def end_field(self, _):
         # the second parameter is the current field
         # the value is here for reversing purposes
-        self.state.field = None
+        self.set_field(None)
 
     def reverse_end_field(self, old_field):
-        self.state.field = old_field
+        self.set_field(old_field)
 
     def toggle_trickroom(self):
         self.state.trick_room ^= True
+        self.update_hash(constants.TRICK_ROOM)
+
+    def set_types(self, side, types):
+        side_name = side
+        side = self.get_side(side)
+        self.update_hash(side_name, side.active.id, constants.TYPES, tuple(side.active.types))
+        side.active.types = types
+        self.update_hash(side_name, side.active.id, constants.TYPES, tuple(types))
 
     def change_types(self, side, new_types, _):
         # the third parameter is the current types of the active pokemon
         # they must be here for reversing purposes
-        side = self.get_side(side)
-        side.active.types = new_types
+        self.set_types(side, new_types)
 
     def reverse_change_types(self, side, _, old_types):
+        self.set_types(side, old_types)
+
+    def set_item(self, side, item):
+        side_name = side
         side = self.get_side(side)
-        side.active.types = old_types
+        self.update_hash(side_name, side.active.id, constants.ITEM, side.active.item)
+        side.active.item = item
+        self.update_hash(side_name, side.active.id, constants.ITEM, item)
 
     def change_item(self, side, new_item, _):
         # the third parameter is the current item
         # it must be here for reversing purposes
-        side = self.get_side(side)
-        side.active.item = new_item
+        self.set_item(side, new_item)
 
     def reverse_change_item(self, side, _, old_item):
+        self.set_item(side, old_item)
+
+    def set_stats(self, side, stats):
+        side_name = side
         side = self.get_side(side)
-        side.active.item = old_item
+        self.update_hash(side_name, side.active.id, constants.STATS, pokemon_stats(side.active))
+        side.active.maxhp = stats[0]
+        side.active.attack = stats[1]
+        side.active.defense = stats[2]
+        side.active.special_attack = stats[3]
+        side.active.special_defense = stats[4]
+        side.active.speed = stats[5]
+        self.update_hash(side_name, side.active.id, constants.STATS, pokemon_stats(side.active))
+
+        # the hp part of the evaluation depends on the max hp
+        self.mark_pokemon_changed(side_name, side.active)
 
     def change_stats(self, side, new_stats, _):
         # the third parameter is the old stats
         # is must be here for reversing purposes
-        side = self.get_side(side)
-        side.active.maxhp = new_stats[0]
-        side.active.attack = new_stats[1]
-        side.active.defense = new_stats[2]
-        side.active.special_attack = new_stats[3]
-        side.active.special_defense = new_stats[4]
-        side.active.speed = new_stats[5]
+        self.set_stats(side, new_stats)
 
     def reverse_change_stats(self, side, _, old_stats):
         # the second parameter are the new stats
-        side = self.get_side(side)
-        side.active.maxhp = old_stats[0]
-        side.active.attack = old_stats[1]
-        side.active.defense = old_stats[2]
-        side.active.special_attack = old_stats[3]
-        side.active.special_defense = old_stats[4]
-        side.active.speed = old_stats[5]
+        self.set_stats(side, old_stats)
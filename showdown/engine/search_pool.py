@@ -0,0 +1,275 @@
+import time
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+from collections import deque
+
+import config
+from data.mods.apply_mods import apply_mods
+
+from .evaluate import Scoring
+from .objects import StateMutator
+from .find_state_instructions import InstructionCache
+from .damage_calculator import damage_cache
+from .select_best_move import get_payoff_matrix
+from .select_best_move import get_payoff_row
+from .select_best_move import get_terminal_payoff_matrix
+from .select_best_move import resolve_score_bounds
+from .select_best_move import search_chance_node
+from .select_best_move import iterative_deepening_payoff_matrix
+from .select_best_move import search_statistics
+from .select_best_move import HistoryTable
+from .select_best_move import ScoreBound
+from .transposition_table import TranspositionTable
+
+
+logger = logging.getLogger(__name__)
+
+
+# configuration values that a search process needs to produce the same results as this process
+SEARCH_CONFIG_ATTRIBUTES = [
+    'damage_calc_type',
+    'transposition_table_size',
+    'instruction_cache_size',
+    'evaluation_lower_bound',
+    'evaluation_upper_bound'
+]
+
+_search_pool = None
+
+# the values the search pool's processes were started with
+_search_pool_configuration = None
+
+# the best worst-case score found so far in a root-split search
+# it is shared between all of the search processes so that they can prune using each other's results
+_shared_bound = None
+
+# only one root-split search can use the shared bound at a time
+_root_split_lock = threading.Lock()
+
+
+def initialize_search_process(pokemon_mode, config_values, pokemon_alive_static, shared_bound):
+    global _shared_bound
+    _shared_bound = shared_bound
+
+    for attribute, value in config_values.items():
+        setattr(config, attribute, value)
+    Scoring.POKEMON_ALIVE_STATIC = pokemon_alive_static
+
+    # the move and pokedex data must match the generation being played
+    if pokemon_mode is not None:
+        apply_mods(pokemon_mode)
+
+
+def create_process_pool(max_workers, initializer, initargs):
+    """Creates a ProcessPoolExecutor whose processes run `initializer(*initargs)` when they start
+       Python 3.6 has no initializer, but its processes are forked from this one when the first task is submitted,
+       so they already have this process's configuration, data and module-level values"""
+    try:
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+    except TypeError:
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+
+def get_search_pool_configuration():
+    return (
+        config.search_processes,
+        config.pokemon_mode,
+        tuple(getattr(config, attribute) for attribute in SEARCH_CONFIG_ATTRIBUTES),
+        Scoring.POKEMON_ALIVE_STATIC
+    )
+
+
+def get_search_pool():
+    # the pool is created the first time it is needed so that it picks up the battle's configuration
+    # its processes only get the configuration when they start, so the pool is started again if it has changed
+    global _search_pool
+    global _search_pool_configuration
+    global _shared_bound
+    search_pool_configuration = get_search_pool_configuration()
+    if _search_pool is not None and _search_pool_configuration != search_pool_configuration:
+        logger.debug("Restarting the search processes because the configuration has changed")
+        shutdown_search_pool()
+
+    if _search_pool is None:
+        logger.debug("Starting {} search processes".format(config.search_processes))
+        _shared_bound = multiprocessing.Value('d', float('-inf'))
+        _search_pool = create_process_pool(
+            config.search_processes,
+            initialize_search_process,
+            (
+                config.pokemon_mode,
+                {attribute: getattr(config, attribute) for attribute in SEARCH_CONFIG_ATTRIBUTES},
+                Scoring.POKEMON_ALIVE_STATIC,
+                _shared_bound
+            )
+        )
+        _search_pool_configuration = search_pool_configuration
+    return _search_pool
+
+
+def shutdown_search_pool():
+    global _search_pool
+    global _search_pool_configuration
+    if _search_pool is not None:
+        _search_pool.shutdown()
+        _search_pool = None
+        _search_pool_configuration = None
+
+
+def search_state(state, user_options, opponent_options, depth, prune, transposition_table=None, deadline=None, instruction_cache=None, history_table=None):
+    mutator = StateMutator(state)
+    logger.debug("Searching through the state: {}".format(mutator.state))
+    if deadline is None:
+        return get_payoff_matrix(mutator, user_options, opponent_options, depth=depth, prune=prune, transposition_table=transposition_table, instruction_cache=instruction_cache, history_table=history_table)
+
+    scores, completed_depth = iterative_deepening_payoff_matrix(mutator, user_options, opponent_options, deadline, prune=prune, transposition_table=transposition_table, instruction_cache=instruction_cache, history_table=history_table)
+    logger.debug("Completed a search to depth {}".format(completed_depth))
+    return scores
+
+
+def search_state_in_process(state, user_options, opponent_options, depth, prune, time_budget):
+    # the time budget is converted to a deadline when the search actually starts
+    # searches can wait in the pool's queue before a process is available to run them
+    if time_budget is not None:
+        deadline = time.time() + time_budget
+    else:
+        deadline = None
+
+    transposition_table = TranspositionTable(config.transposition_table_size)
+    instruction_cache = InstructionCache(config.instruction_cache_size)
+    return search_state(state, user_options, opponent_options, depth, prune, transposition_table=transposition_table, deadline=deadline, instruction_cache=instruction_cache, history_table=HistoryTable())
+
+
+def search_payoff_row_in_process(state, user_move, opponent_options, depth, prune):
+    # `depth` is the remaining depth after this turn
+    mutator = StateMutator(state)
+    transposition_table = TranspositionTable(config.transposition_table_size)
+    instruction_cache = InstructionCache(config.instruction_cache_size)
+    row_scores, worst_score_for_this_row, _ = get_payoff_row(
+        mutator,
+        user_move,
+        opponent_options,
+        depth,
+        prune,
+        _shared_bound.value,
+        transposition_table=transposition_table,
+        shared_bound=_shared_bound,
+        instruction_cache=instruction_cache,
+        history_table=HistoryTable()
+    )
+
+    with _shared_bound.get_lock():
+        if worst_score_for_this_row > _shared_bound.value:
+            _shared_bound.value = worst_score_for_this_row
+
+    return row_scores
+
+
+def get_payoff_matrix_root_split(mutator, user_options, opponent_options, depth=2, prune=True):
+    """
+    The same as `get_payoff_matrix`, but each of the bot's options is searched in a separate process
+    The processes share the best worst-case score found so far so that pruning still happens
+
+    The result is identical to `get_payoff_matrix` when prune=False
+    """
+    terminal_payoff_matrix = get_terminal_payoff_matrix(mutator, user_options, opponent_options, depth)
+    if terminal_payoff_matrix is not None:
+        return terminal_payoff_matrix
+
+    pool = get_search_pool()
+    with _root_split_lock:
+        _shared_bound.value = float('-inf')
+        futures = [
+            pool.submit(search_payoff_row_in_process, mutator.state, user_move, opponent_options, depth - 1, prune)
+            for user_move in user_options
+        ]
+
+        state_scores = dict()
+        for f in futures:
+            state_scores.update(f.result())
+
+    # the rows were searched separately, so the bounds that matter for the whole matrix are resolved here
+    if any(isinstance(score, ScoreBound) for score in state_scores.values()):
+        transposition_table = TranspositionTable(config.transposition_table_size)
+        instruction_cache = InstructionCache(config.instruction_cache_size)
+
+        def search_exactly(move_pair, score_bound):
+            return search_chance_node(mutator, move_pair[0], move_pair[1], depth - 1, prune, transposition_table=transposition_table, instruction_cache=instruction_cache, resume_from=score_bound)
+
+        resolve_score_bounds(state_scores, search_exactly)
+
+    return state_scores
+
+
+def search_states(searches, depth, prune=True, time_budget=None, history_table=None):
+    """
+    :param searches: a list of (State, user_options, opponent_options) to get the payoff matrix of
+    :param depth: the depth to search to when there is no time budget
+    :param prune: specify whether or not to prune the tree
+    :param time_budget: if given, the number of seconds all of the searches may take using iterative deepening
+    :param history_table: a HistoryTable to keep between decisions - searches in other processes use a new one each and do not update it
+    :return: a list of payoff matrices in the same order as `searches`
+    """
+    return list(iter_search_states(searches, depth, prune=prune, time_budget=time_budget, history_table=history_table))
+
+
+def iter_search_states(searches, depth, prune=True, time_budget=None, history_table=None, number_of_searches=None):
+    """
+    The same as `search_states`, but the payoff matrices are yielded one at a time as the searches finish
+    `searches` can be any iterable and is only consumed as fast as the searches are done,
+    so the states do not all have to exist at the same time
+
+    :param number_of_searches: the length of `searches` - required when it is not a list
+    """
+    if number_of_searches is None:
+        number_of_searches = len(searches)
+
+    # a single state is split up by the bot's options instead
+    if config.search_processes > 1 and number_of_searches == 1 and time_budget is None:
+        for state, user_options, opponent_options in searches:
+            yield get_payoff_matrix_root_split(StateMutator(state), user_options, opponent_options, depth=depth, prune=prune)
+        return
+
+    if config.search_processes > 1 and number_of_searches > 1:
+        pool = get_search_pool()
+
+        if time_budget is not None:
+            time_budget = time_budget * min(1, config.search_processes / number_of_searches)
+
+        # enough searches are queued to keep every process busy, and the results are yielded in order
+        futures = deque()
+        for state, user_options, opponent_options in searches:
+            futures.append(pool.submit(search_state_in_process, state, user_options, opponent_options, depth, prune, time_budget))
+            if len(futures) >= 2 * config.search_processes:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+        return
+
+    if time_budget is not None:
+        decision_deadline = time.time() + time_budget
+    else:
+        decision_deadline = None
+
+    # the hash of a state includes the opponent's set so the table and the cache can be shared between all of the searches
+    transposition_table = TranspositionTable(config.transposition_table_size)
+    instruction_cache = InstructionCache(config.instruction_cache_size)
+    search_statistics.reset()
+    if history_table is None:
+        history_table = HistoryTable()
+
+    for i, (state, user_options, opponent_options) in enumerate(searches):
+        # each remaining search gets an equal share of the time that is left
+        if decision_deadline is not None:
+            deadline = time.time() + (decision_deadline - time.time()) / max(1, number_of_searches - i)
+        else:
+            deadline = None
+
+        yield search_state(state, user_options, opponent_options, depth, prune, transposition_table=transposition_table, deadline=deadline, instruction_cache=instruction_cache, history_table=history_table)
+
+    logger.debug("Transposition table hits: {}, misses: {}".format(transposition_table.hits, transposition_table.misses))
+    logger.debug("Instruction cache hits: {}, misses: {}".format(instruction_cache.hits, instruction_cache.misses))
+    logger.debug("Nodes searched: {}, chance nodes cut off: {}, score bounds resolved: {}".format(search_statistics.nodes, search_statistics.chance_node_cutoffs, search_statistics.score_bounds_resolved))
+    logger.debug("Damage cache hits: {}, misses: {}".format(damage_cache.hits, damage_cache.misses))
@@ -1,7 +1,10 @@
 import math
+import time
+from operator import attrgetter
 from collections import defaultdict
 
 import constants
+import config
 
 from .evaluate import evaluate
 from .find_state_instructions import get_all_state_instructions
@@ -9,6 +12,125 @@ from .find_state_instructions import get_all_state_instructions
 
 WON_BATTLE = 100
 
+# iterative deepening stops here even if there is time remaining
+MAX_ITERATIVE_DEEPENING_DEPTH = 10
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class ScoreBound(float):
+    """A score from a chance node that was cut off before all of its outcomes were searched
+       It is only a bound on the real score - see `resolve_score_bounds` for when that leads to the same decision
+       It keeps how far the search got so that the rest of the outcomes can be searched later"""
+    __slots__ = ('score', 'remaining_percentage', 'outcomes_searched')
+
+    def __new__(cls, bound, score=0, remaining_percentage=1, outcomes_searched=0):
+        score_bound = super().__new__(cls, bound)
+        score_bound.score = score
+        score_bound.remaining_percentage = remaining_percentage
+        score_bound.outcomes_searched = outcomes_searched
+        return score_bound
+
+
+class UpperScoreBound(ScoreBound):
+    """The real score is at most this, and is below the best worst-case score of the rows before it"""
+    __slots__ = ()
+
+
+class LowerScoreBound(ScoreBound):
+    """The real score is at least this, and is not below the worst score before it in its row"""
+    __slots__ = ()
+
+
+class SearchStatistics:
+    """Counts of the work done by the searches in this process"""
+
+    def __init__(self):
+        self.nodes = 0
+        self.chance_node_cutoffs = 0
+        self.score_bounds_resolved = 0
+
+    def reset(self):
+        self.nodes = 0
+        self.chance_node_cutoffs = 0
+        self.score_bounds_resolved = 0
+
+
+search_statistics = SearchStatistics()
+
+
+class HistoryTable:
+    """Counts how often each option has caused a row to be pruned, weighted by the depth it happened at
+       The options that cause the most prunes are searched first so that the next prune happens as early as possible
+       The same table is used for every node in a search and can be kept between turns
+
+       Like `move_item_to_front_of_list`, the order changes which scores are pruned (nan), and so which of the
+       opponent's moves are known to give the bot a choice - a table kept between turns can change the move chosen"""
+
+    def __init__(self):
+        self.scores = defaultdict(int)
+
+    def record_prune(self, option, depth):
+        # a prune closer to the root skips a larger part of the tree
+        self.scores[option] += (depth + 1) ** 2
+
+    def order(self, options):
+        # options that have never caused a prune keep their order
+        return sorted(options, key=lambda x: self.scores.get(x, 0), reverse=True)
+
+    def age(self):
+        # older prunes count for less than the ones in the current turn
+        for option in self.scores:
+            self.scores[option] //= 2
+
+    def clear(self):
+        self.scores.clear()
+
+
+def get_opponent_decisions(score_lookup):
+    """
+    Finds the opponent's moves that give the bot a choice, i.e. the ones that do not have the same score for every move of the bot
+    Scores that were never searched (nan) are ignored
+    :return: the opponent's moves that give the bot a choice,
+             and the ones that might - their ScoreBounds could be equal to the rest of their scores or could not be
+    """
+    # the scores of an opponent's move can only all be the same if one value is within every one of them
+    # an exact score is only its own value, and a bound is everything on one side of it
+    ranges = dict()
+    for (_, opponent_move), score in score_lookup.items():
+        if math.isnan(score):
+            continue
+
+        if isinstance(score, UpperScoreBound):
+            lowest, highest = float('-inf'), score
+        elif isinstance(score, LowerScoreBound):
+            lowest, highest = score, float('inf')
+        elif isinstance(score, ScoreBound):
+            lowest, highest = float('-inf'), float('inf')
+        else:
+            lowest, highest = score, score
+
+        if opponent_move not in ranges:
+            ranges[opponent_move] = [lowest, highest, 1, isinstance(score, ScoreBound)]
+        else:
+            score_range = ranges[opponent_move]
+            score_range[0] = max(score_range[0], lowest)
+            score_range[1] = min(score_range[1], highest)
+            score_range[2] += 1
+            score_range[3] = score_range[3] or isinstance(score, ScoreBound)
+
+    opponent_decisions = set()
+    undecided_opponent_moves = set()
+    for opponent_move, (lowest, highest, number_of_scores, has_bounds) in ranges.items():
+        if lowest > highest:
+            opponent_decisions.add(opponent_move)
+        elif has_bounds and number_of_scores > 1:
+            undecided_opponent_moves.add(opponent_move)
+
+    return opponent_decisions, undecided_opponent_moves
+
 
 def remove_guaranteed_opponent_moves(score_lookup):
     """This method removes enemy moves from the score-lookup that do not give the bot a choice.
@@ -23,14 +145,10 @@ def remove_guaranteed_opponent_moves(score_lookup):
         return score_lookup
 
     # find the opponent's moves where the bot has a choice
-    opponent_move_scores = dict()
-    opponent_decisions = set()
-    for k, score in score_lookup.items():
-        opponent_move = k[1]
-        if opponent_move not in opponent_move_scores:
-            opponent_move_scores[opponent_move] = score
-        elif opponent_move in opponent_move_scores and score != opponent_move_scores[opponent_move] and not math.isnan(score):
-            opponent_decisions.add(opponent_move)
+    # a search replaces the bounds that this depends on with exact scores, see `resolve_score_bounds`,
+    # so an opponent's move that might give the bot a choice only comes from a score_lookup made some other way
+    opponent_decisions, undecided_opponent_moves = get_opponent_decisions(score_lookup)
+    opponent_decisions |= undecided_opponent_moves
 
     # re-create score_lookup with only the opponent's move acquired above
     new_opponent_decisions = dict()
@@ -53,6 +171,57 @@ def pick_safest(score_lookup):
     safest = max(worst_case, key=lambda x: worst_case[x][1])
     return worst_case[safest]
 
+
+class WorstCaseScores:
+    """
+    The worst case of each of the bot's moves over any number of payoff matrices, which are added one at a time
+    `pick_safest()` gives the same result as `pick_safest` on all of the payoff matrices merged together,
+    with each matrix's opponent moves made unique by a prefix, without the merged matrix ever existing
+    """
+
+    def __init__(self):
+        # the worst case of every score, and of only the scores for opponent moves that give the bot a choice
+        # see `remove_guaranteed_opponent_moves`
+        self.worst_case = dict()
+        self.worst_case_of_decisions = dict()
+
+        self.user_moves = set()
+        self.number_of_opponent_moves = 0
+
+    @staticmethod
+    def update(worst_case, move_pair, score, prefix):
+        # a move's worst case starts at infinity, so a nan score is never the worst case
+        worst_score = worst_case.setdefault(move_pair[0], (tuple(), float('inf')))[1]
+        if worst_score > score:
+            worst_case[move_pair[0]] = (move_pair[0], "{}_{}".format(move_pair[1], prefix)), score
+
+    def add(self, score_lookup, prefix):
+        opponent_moves = set()
+        for move_pair, score in score_lookup.items():
+            opponent_moves.add(move_pair[1])
+            self.update(self.worst_case, move_pair, score, prefix)
+
+        # the same as `remove_guaranteed_opponent_moves`
+        opponent_decisions, undecided_opponent_moves = get_opponent_decisions(score_lookup)
+        opponent_decisions |= undecided_opponent_moves
+
+        self.user_moves.update(self.worst_case)
+        self.number_of_opponent_moves += len(opponent_moves)
+
+        for move_pair, score in score_lookup.items():
+            if move_pair[1] in opponent_decisions:
+                self.update(self.worst_case_of_decisions, move_pair, score, prefix)
+
+    def pick_safest(self):
+        if len(self.user_moves) == 1 or self.number_of_opponent_moves == 1 or not self.worst_case_of_decisions:
+            worst_case = self.worst_case
+        else:
+            worst_case = self.worst_case_of_decisions
+
+        safest = max(worst_case, key=lambda x: worst_case[x][1])
+        return worst_case[safest]
+
+
 # Altered pick safest to be from the opponent's perspective
 def pick_opponent_safest(score_lookup):
     worst_case = defaultdict(lambda: (tuple(), float('-inf')))
@@ -71,85 +240,293 @@ def move_item_to_front_of_list(l, item):
     return [l[i] for i in all_indicies]
 
 
-def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=True):
+def get_terminal_payoff_matrix(mutator, user_options, opponent_options, depth):
+    """Returns the payoff matrix for a state that does not need to be searched, otherwise None"""
+    winner = mutator.state.battle_is_finished()
+    if winner:
+        return {(constants.DO_NOTHING_MOVE, constants.DO_NOTHING_MOVE): evaluate(mutator.state) + WON_BATTLE*depth*winner}
+
+    # if the battle is not over, but the opponent has no moves - we want to return the user options as moves
+    # this is a special case in a random battle where the opponent's pokemon has fainted, but the opponent still
+    # has reserves left that are unseen
+    if opponent_options == [constants.DO_NOTHING_MOVE] and mutator.state.opponent.active.hp == 0:
+        return {(user_option, constants.DO_NOTHING_MOVE): evaluate(mutator.state) for user_option in user_options}
+
+    return None
+
+
+def get_evaluation_bounds(mutator, depth):
+    """The lowest and highest score that a state `depth` turns from the end of the search can have"""
+    lowest, highest = mutator.evaluation_bounds
+    if config.evaluation_lower_bound is not None:
+        lowest = config.evaluation_lower_bound
+    if config.evaluation_upper_bound is not None:
+        highest = config.evaluation_upper_bound
+
+    # a finished battle is given a bonus for each turn that was left
+    return lowest - WON_BATTLE*depth, highest + WON_BATTLE*depth
+
+
+def search_chance_node(mutator, user_move, opponent_move, depth, prune, upper_cutoff=float('-inf'), lower_cutoff=float('inf'), transposition_table=None, deadline=None, instruction_cache=None, history_table=None, resume_from=None):
+    """
+    Scores a pair of moves - the expected score of the random outcomes that they lead to
+    The outcomes are searched from the most to the least likely, so that the ones left when the search is cut off are unlikely
+    :param depth: the remaining depth after this turn
+    :param upper_cutoff: the search stops if the score is certain to be below this - an UpperScoreBound is returned
+    :param lower_cutoff: the search stops if the score is certain to be at least this - a LowerScoreBound is returned
+    :param resume_from: an optional ScoreBound from an earlier search of these moves - only the outcomes it did not search are searched
+    """
+    lowest, highest = get_evaluation_bounds(mutator, depth)
+
+    if resume_from is not None:
+        score, remaining_percentage, outcomes_searched = resume_from.score, resume_from.remaining_percentage, resume_from.outcomes_searched
+    else:
+        score, remaining_percentage, outcomes_searched = 0, 1, 0
+    state_instructions = get_all_state_instructions(mutator, user_move, opponent_move, instruction_cache=instruction_cache)
+    state_instructions = sorted(state_instructions, key=attrgetter('percentage'), reverse=True)
+    for i in range(outcomes_searched, len(state_instructions)):
+        instructions = state_instructions[i]
+        mutator.apply(instructions.instructions)
+        search_statistics.nodes += 1
+        if depth == 0:
+            safest_score = mutator.evaluation
+
+        else:
+            safest_score = None
+            if transposition_table is not None:
+                safest_score = transposition_table.get(mutator.hash, depth)
+
+            if safest_score is None:
+                next_turn_user_options, next_turn_opponent_options = mutator.state.get_all_options()
+                try:
+                    # only the safest row's worst case is used, so the other rows can be cut off sooner
+                    safest = pick_safest(get_payoff_matrix(mutator, next_turn_user_options, next_turn_opponent_options, depth=depth, prune=prune, transposition_table=transposition_table, deadline=deadline, instruction_cache=instruction_cache, history_table=history_table, exact_rows=False))
+                except SearchTimeout:
+                    # the state must be returned to how it was before the search started
+                    mutator.reverse(instructions.instructions)
+                    raise
+                safest_score = safest[1]
+                if transposition_table is not None:
+                    transposition_table.store(mutator.hash, depth, safest_score)
+
+        score += safest_score * instructions.percentage
+        remaining_percentage -= instructions.percentage
+        mutator.reverse(instructions.instructions)
+
+        # stop once the outcomes that are left cannot change the result
+        if prune and i < len(state_instructions) - 1:
+            if score + remaining_percentage * highest < upper_cutoff:
+                search_statistics.chance_node_cutoffs += 1
+                return UpperScoreBound(score + remaining_percentage * highest, score, remaining_percentage, i + 1)
+            elif score + remaining_percentage * lowest >= lower_cutoff:
+                search_statistics.chance_node_cutoffs += 1
+                return LowerScoreBound(score + remaining_percentage * lowest, score, remaining_percentage, i + 1)
+
+    return score
+
+
+def get_payoff_row(mutator, user_move, opponent_options, depth, prune, best_score, transposition_table=None, deadline=None, shared_bound=None, instruction_cache=None, history_table=None, exact_rows=True):
+    """
+    Scores one of the bot's options against each of the opponent's options
+    :param depth: the remaining depth after this turn
+    :param best_score: the best worst-case score of the rows that have already been searched
+    :param shared_bound: an optional object with a `value` that is the best_score of searches running in other processes
+    :param history_table: an optional HistoryTable that records the opponent's options that cause a prune
+    :param exact_rows: if False, a score that makes this row's worst case lower than best_score may be an UpperScoreBound
+    :return: the scores for this row, the worst score in the row, and the opponent options in the order they should be tried next
+    """
+    row_scores = dict()
+    worst_score_for_this_row = float('inf')
+    skip = False
+
+    # opponent_options can change during the loop
+    # using opponent_options[:] makes a copy when iterating to ensure no funny-business
+    for j, opponent_move in enumerate(opponent_options[:]):
+        if skip:
+            row_scores[(user_move, opponent_move)] = float('nan')
+            continue
+
+        # a score is cut off when it is either:
+        #   - certain to be below best_score, so this row is pruned either way
+        #   - certain to not be below the worst score in this row, so it does not change the row's worst case
+        score = search_chance_node(
+            mutator,
+            user_move,
+            opponent_move,
+            depth,
+            prune,
+            upper_cutoff=float('-inf') if exact_rows else best_score,
+            lower_cutoff=worst_score_for_this_row,
+            transposition_table=transposition_table,
+            deadline=deadline,
+            instruction_cache=instruction_cache,
+            history_table=history_table
+        )
+
+        row_scores[(user_move, opponent_move)] = score
+
+        if score < worst_score_for_this_row:
+            worst_score_for_this_row = score
+
+        if shared_bound is not None and shared_bound.value > best_score:
+            best_score = shared_bound.value
+
+        if prune and score < best_score:
+            skip = True
+
+            # MOST of the time in pokemon, an opponent's move that causes a prune will cause a prune elsewhere
+            # move this item to the front of the list to prune faster
+            opponent_options = move_item_to_front_of_list(opponent_options, opponent_move)
+            if history_table is not None:
+                history_table.record_prune(opponent_move, depth)
+
+    return row_scores, worst_score_for_this_row, opponent_options
+
+
+def resolve_score_bounds(score_lookup, search_exactly):
+    """
+    Replaces the ScoreBounds in a payoff matrix that could make `pick_safest` or `WorstCaseScores` give a different result
+    than the exact scores with the exact scores. These are:
+      - the bounds of the opponent's moves that they cannot tell give the bot a choice or not
+      - the LowerScoreBounds, of the opponent's moves that give the bot a choice, that could be the worst score of their row
+    An UpperScoreBound is in a row that is pruned because of it, which is never the safest row either way
+    :param search_exactly: a function that takes a pair of moves and their ScoreBound, and searches the rest of their outcomes
+    :return: score_lookup
+    """
+    def resolve(move_pair):
+        score_lookup[move_pair] = search_exactly(move_pair, score_lookup[move_pair])
+        search_statistics.score_bounds_resolved += 1
+
+    _, undecided_opponent_moves = get_opponent_decisions(score_lookup)
+    for move_pair, score in list(score_lookup.items()):
+        if move_pair[1] in undecided_opponent_moves and isinstance(score, ScoreBound):
+            resolve(move_pair)
+
+    opponent_decisions, _ = get_opponent_decisions(score_lookup)
+    worst_scores = dict()
+    lower_bounds = []
+    for move_pair, score in score_lookup.items():
+        if move_pair[1] not in opponent_decisions:
+            continue
+        elif isinstance(score, LowerScoreBound):
+            lower_bounds.append((score, move_pair))
+        elif not math.isnan(score) and score < worst_scores.get(move_pair[0], float('inf')):
+            worst_scores[move_pair[0]] = score
+
+    # the lowest bounds are resolved first because each exact score can make the bounds above it irrelevant
+    for score, move_pair in sorted(lower_bounds):
+        if score < worst_scores.get(move_pair[0], float('inf')):
+            resolve(move_pair)
+            worst_scores[move_pair[0]] = min(score_lookup[move_pair], worst_scores.get(move_pair[0], float('inf')))
+
+    return score_lookup
+
+
+def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=True, transposition_table=None, deadline=None, instruction_cache=None, history_table=None, exact_rows=True):
     """
     :param mutator: a StateMutator object representing the state of the battle
     :param user_options: options for the bot
     :param opponent_options: options for the opponent
     :param depth: the remaining depth before the state is evaluated
     :param prune: specify whether or not to prune the tree
+    :param transposition_table: an optional TranspositionTable used to avoid searching the same state twice
+    :param deadline: an optional time.time() value - SearchTimeout is raised if the search is still running after it
+    :param instruction_cache: an optional InstructionCache used to avoid generating the same instructions twice
+    :param history_table: an optional HistoryTable used to order the opponent's options
+    :param exact_rows: if False, only the safest row's worst case is exact - the matrix can only be used by `pick_safest`
     :return: a dictionary representing the potential move combinations and their associated scores
+             scores may be ScoreBounds, but only ones that lead to the same decision as the exact scores
     """
+    if deadline is not None and time.time() > deadline:
+        raise SearchTimeout()
 
-    winner = mutator.state.battle_is_finished()
-    if winner:
-        return {(constants.DO_NOTHING_MOVE, constants.DO_NOTHING_MOVE): evaluate(mutator.state) + WON_BATTLE*depth*winner}
+    terminal_payoff_matrix = get_terminal_payoff_matrix(mutator, user_options, opponent_options, depth)
+    if terminal_payoff_matrix is not None:
+        return terminal_payoff_matrix
 
     depth -= 1
 
-    # if the battle is not over, but the opponent has no moves - we want to return the user options as moves
-    # this is a special case in a random battle where the opponent's pokemon has fainted, but the opponent still
-    # has reserves left that are unseen
-    if opponent_options == [constants.DO_NOTHING_MOVE] and mutator.state.opponent.active.hp == 0:
-        return {(user_option, constants.DO_NOTHING_MOVE): evaluate(mutator.state) for user_option in user_options}
+    if history_table is not None:
+        opponent_options = history_table.order(opponent_options)
 
     state_scores = dict()
 
     best_score = float('-inf')
     for i, user_move in enumerate(user_options):
-        worst_score_for_this_row = float('inf')
-        skip = False
+        row_scores, worst_score_for_this_row, opponent_options = get_payoff_row(
+            mutator,
+            user_move,
+            opponent_options,
+            depth,
+            prune,
+            best_score,
+            transposition_table=transposition_table,
+            deadline=deadline,
+            instruction_cache=instruction_cache,
+            history_table=history_table,
+            exact_rows=exact_rows
+        )
+        state_scores.update(row_scores)
 
-        # opponent_options can change during the loop
-        # using opponent_options[:] makes a copy when iterating to ensure no funny-business
-        for j, opponent_move in enumerate(opponent_options[:]):
-            if skip:
-                state_scores[(user_move, opponent_move)] = float('nan')
-                continue
+        if worst_score_for_this_row > best_score:
+            best_score = worst_score_for_this_row
 
-            score = 0
-            state_instructions = get_all_state_instructions(mutator, user_move, opponent_move)
-            if depth == 0:
-                for instructions in state_instructions:
-                    mutator.apply(instructions.instructions)
-                    t_score = evaluate(mutator.state)
-                    score += (t_score * instructions.percentage)
-                    mutator.reverse(instructions.instructions)
+    if any(isinstance(score, ScoreBound) for score in state_scores.values()):
+        def search_exactly(move_pair, score_bound):
+            return search_chance_node(mutator, move_pair[0], move_pair[1], depth, prune, transposition_table=transposition_table, deadline=deadline, instruction_cache=instruction_cache, history_table=history_table, resume_from=score_bound)
 
-            else:
-                for instructions in state_instructions:
-                    this_percentage = instructions.percentage
-                    mutator.apply(instructions.instructions)
-                    next_turn_user_options, next_turn_opponent_options = mutator.state.get_all_options()
-                    safest = pick_safest(get_payoff_matrix(mutator, next_turn_user_options, next_turn_opponent_options, depth=depth, prune=prune))
-                    score += safest[1] * this_percentage
-                    mutator.reverse(instructions.instructions)
+        resolve_score_bounds(state_scores, search_exactly)
 
-            state_scores[(user_move, opponent_move)] = score
+    return state_scores
 
-            if score < worst_score_for_this_row:
-                worst_score_for_this_row = score
 
-            if prune and score < best_score:
-                skip = True
+def order_options_from_scores(score_lookup, user_options, opponent_options):
+    """Orders the options using the scores from a previous, shallower search
+       The bot's options are ordered from best to worst worst-case score
+       The opponent's options are ordered by how well they do against the bot's best option
+       Searching in this order lets pruning happen as early as possible"""
+    worst_case = dict()
+    for (user_move, opponent_move), score in score_lookup.items():
+        if not math.isnan(score) and score < worst_case.get(user_move, float('inf')):
+            worst_case[user_move] = score
 
-                # MOST of the time in pokemon, an opponent's move that causes a prune will cause a prune elsewhere
-                # move this item to the front of the list to prune faster
-                opponent_options = move_item_to_front_of_list(opponent_options, opponent_move)
+    user_options = sorted(user_options, key=lambda x: worst_case.get(x, float('-inf')), reverse=True)
 
-        if worst_score_for_this_row > best_score:
-            best_score = worst_score_for_this_row
+    best_user_move = user_options[0]
+    opponent_options = sorted(opponent_options, key=lambda x: score_lookup.get((best_user_move, x), float('inf')))
 
-    return state_scores
+    return user_options, opponent_options
+
+
+def iterative_deepening_payoff_matrix(mutator, user_options, opponent_options, deadline, prune=True, transposition_table=None, instruction_cache=None, history_table=None, max_depth=MAX_ITERATIVE_DEEPENING_DEPTH):
+    """
+    Searches to a depth of 1, 2, 3, ... until `deadline` passes
+    The results of each completed search are used to order the options of the next search
+
+    The first search is always allowed to complete
+    :return: the payoff matrix of the deepest search that completed and the depth of that search
+    """
+    scores = get_payoff_matrix(mutator, user_options, opponent_options, depth=1, prune=prune, transposition_table=transposition_table, instruction_cache=instruction_cache, history_table=history_table)
+    depth = 1
+    while depth < max_depth:
+        user_options, opponent_options = order_options_from_scores(scores, user_options, opponent_options)
+        try:
+            scores = get_payoff_matrix(mutator, user_options, opponent_options, depth=depth + 1, prune=prune, transposition_table=transposition_table, deadline=deadline, instruction_cache=instruction_cache, history_table=history_table)
+        except SearchTimeout:
+            break
+        depth += 1
+
+    return scores, depth
 
 # Altered version of payoff matrix getter that generates one from the opponent's perspective
-def get_opponent_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=True):
+def get_opponent_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=True, history_table=None):
     """
     :param mutator: a StateMutator object representing the state of the battle
     :param user_options: options for the bot
     :param opponent_options: options for the opponent
     :param depth: the remaining depth before the state is evaluated
     :param prune: specify whether or not to prune the tree
+    :param history_table: an optional HistoryTable used to order the bot's options
     :return: a dictionary representing the potential move combinations and their associated scores
     """
 
@@ -165,6 +542,9 @@ def get_opponent_payoff_matrix(mutator, user_options, opponent_options, depth=2,
     if user_options == [constants.DO_NOTHING_MOVE] and mutator.state.self.active.hp == 0:
         return {(constants.DO_NOTHING_MOVE, opponent_option): evaluate(mutator.state) for opponent_option in opponent_options}
 
+    if history_table is not None:
+        user_options = history_table.order(user_options)
+
     state_scores = dict()
 
     best_score = float('-inf')
@@ -185,7 +565,7 @@ def get_opponent_payoff_matrix(mutator, user_options, opponent_options, depth=2,
             if depth == 0:
                 for instructions in state_instructions:
                     mutator.apply(instructions.instructions)
-                    t_score = evaluate(mutator.state)
+                    t_score = mutator.evaluation
                     score += (t_score * instructions.percentage)
                     mutator.reverse(instructions.instructions)
 
@@ -194,7 +574,7 @@ def get_opponent_payoff_matrix(mutator, user_options, opponent_options, depth=2,
                     this_percentage = instructions.percentage
                     mutator.apply(instructions.instructions)
                     next_turn_user_options, next_turn_opponent_options = mutator.state.get_all_options()
-                    safest = pick_opponent_safest(get_opponent_payoff_matrix(mutator, next_turn_user_options, next_turn_opponent_options, depth=depth, prune=prune))
+                    safest = pick_opponent_safest(get_opponent_payoff_matrix(mutator, next_turn_user_options, next_turn_opponent_options, depth=depth, prune=prune, history_table=history_table))
                     score += safest[1] * this_percentage
                     mutator.reverse(instructions.instructions)
 
@@ -209,6 +589,8 @@ def get_opponent_payoff_matrix(mutator, user_options, opponent_options, depth=2,
                 # MOST of the time in pokemon, an opponent's move that causes a prune will cause a prune elsewhere
                 # move this item to the front of the list to prune faster
                 user_options = move_item_to_front_of_list(user_options, user_move)
+                if history_table is not None:
+                    history_table.record_prune(user_move, depth)
 
         if worst_score_for_this_row < best_score:
             best_score = worst_score_for_this_row
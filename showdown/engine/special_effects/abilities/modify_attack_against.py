@@ -107,7 +107,7 @@ def thickfat(attacking_move, attacking_pokemon, defending_pokemon):
 
 
 def solidrock(attacking_move, attacking_pokemon, defending_pokemon):
-    if is_super_effective(attacking_move[constants.TYPE], defending_pokemon.types):
+    if is_super_effective(attacking_move[constants.TYPE], defending_pokemon):
         attacking_move = attacking_move.copy()
         attacking_move[constants.BASE_POWER] *= (3/4)
     return attacking_move
@@ -169,7 +169,7 @@ def fluffy(attacking_move, attacking_pokemon, defending_pokemon):
 
 
 def magicbounce(attacking_move, attacking_pokemon, defending_pokemon):
-    if attacking_move[constants.FLAGS].get(constants.REFLECTABLE):
+    if constants.REFLECTABLE in attacking_move[constants.FLAGS]:
         attacking_move = attacking_move.copy()
         attacking_move[constants.TARGET] = constants.SELF
 
@@ -193,7 +193,7 @@ def roughskin(attacking_move, attacking_pokemon, defending_pokemon):
 
 
 def wonderguard(attacking_move, attacking_pokemon, defending_pokemon):
-    if not is_super_effective(attacking_move[constants.TYPE], defending_pokemon.types):
+    if not is_super_effective(attacking_move[constants.TYPE], defending_pokemon):
         attacking_move = attacking_move.copy()
         attacking_move[constants.BASE_POWER] = 0
     return attacking_move
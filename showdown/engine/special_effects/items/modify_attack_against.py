@@ -32,7 +32,7 @@ def airballoon(attacking_move, attacking_pokemon, defending_pokemon):
 
 
 def weaknesspolicy(attacking_move, attacking_pokemon, defending_pokemon):
-    if attacking_move[constants.CATEGORY] in constants.DAMAGING_CATEGORIES and is_super_effective(attacking_move[constants.TYPE], defending_pokemon.types):
+    if attacking_move[constants.CATEGORY] in constants.DAMAGING_CATEGORIES and is_super_effective(attacking_move[constants.TYPE], defending_pokemon):
         attacking_move = attacking_move.copy()
         attacking_move[constants.BOOSTS] = {
             constants.ATTACK: 2,
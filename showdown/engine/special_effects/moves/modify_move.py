@@ -41,8 +41,8 @@ def hex(attacking_move, defending_move, attacking_pokemon, defending_pokemon, fi
 
 def foulplay(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
     attacking_move = attacking_move.copy()
-    attacking_move[constants.BASE_POWER] *= defending_pokemon.calculate_boosted_stats()[constants.ATTACK] / \
-                                            attacking_pokemon.calculate_boosted_stats()[constants.ATTACK]
+    attacking_move[constants.BASE_POWER] *= defending_pokemon.boosted_stat(constants.ATTACK) / \
+                                            attacking_pokemon.boosted_stat(constants.ATTACK)
     return attacking_move
 
 
@@ -57,7 +57,7 @@ def storedpower(attacking_move, defending_move, attacking_pokemon, defending_pok
 
 
 def psyshock(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
-    defending_stats = defending_pokemon.calculate_boosted_stats()
+    defending_stats = defending_pokemon.get_boosted_stats()
     attacking_move = attacking_move.copy()
     attacking_move[constants.BASE_POWER] *= (defending_stats[constants.SPECIAL_DEFENSE] / defending_stats[constants.DEFENSE])
     return attacking_move
@@ -80,14 +80,14 @@ def avalanche(attacking_move, defending_move, attacking_pokemon, defending_pokem
 def gyroball(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
     # power = (25 × TargetSpeed ÷ UserSpeed) + 1
     attacking_move = attacking_move.copy()
-    attacker_speed = attacking_pokemon.calculate_boosted_stats()[constants.SPEED]
-    defender_speed = defending_pokemon.calculate_boosted_stats()[constants.SPEED]
+    attacker_speed = attacking_pokemon.boosted_stat(constants.SPEED)
+    defender_speed = defending_pokemon.boosted_stat(constants.SPEED)
     attacking_move[constants.BASE_POWER] = min(150, (25 * defender_speed / attacker_speed) + 1)
     return attacking_move
 
 
 def electroball(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
-    speed_ratio = defending_pokemon.calculate_boosted_stats()[constants.SPEED] / attacking_pokemon.calculate_boosted_stats()[constants.SPEED]
+    speed_ratio = defending_pokemon.boosted_stat(constants.SPEED) / attacking_pokemon.boosted_stat(constants.SPEED)
 
     attacking_move = attacking_move.copy()
     if speed_ratio < 0.25:
@@ -177,8 +177,7 @@ def blizzard(attacking_move, defending_move, attacking_pokemon, defending_pokemo
 def solarbeam(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
     if weather == constants.SUN:
         attacking_move = attacking_move.copy()
-        attacking_move[constants.FLAGS] = attacking_move[constants.FLAGS].copy()
-        attacking_move[constants.FLAGS].pop(constants.CHARGE, None)
+        attacking_move[constants.FLAGS] = frozenset(f for f in attacking_move[constants.FLAGS] if f != constants.CHARGE)
     return attacking_move
 
 
@@ -195,7 +194,7 @@ def strengthsap(attacking_move, defending_move, attacking_pokemon, defending_pok
         constants.ATTACK: -1
     }
     attacking_move[constants.HEAL] = [
-        defending_pokemon.calculate_boosted_stats()[constants.ATTACK],
+        defending_pokemon.boosted_stat(constants.ATTACK),
         attacking_pokemon.maxhp
     ]
     attacking_move[constants.HEAL_TARGET] = constants.SELF
@@ -297,7 +296,7 @@ def clangoroussoul(attacking_move, defending_move, attacking_pokemon, defending_
 
 def bodypress(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
     attacking_move = attacking_move.copy()
-    boosted_stats = attacking_pokemon.calculate_boosted_stats()
+    boosted_stats = attacking_pokemon.get_boosted_stats()
     attacking_move[constants.BASE_POWER] *= (boosted_stats[constants.DEFENSE] / boosted_stats[constants.ATTACK])
     return attacking_move
 
@@ -0,0 +1,119 @@
+import hashlib
+from collections import OrderedDict
+
+import constants
+
+
+BOOST_ATTRIBUTES = (
+    constants.ATTACK_BOOST,
+    constants.DEFENSE_BOOST,
+    constants.SPECIAL_ATTACK_BOOST,
+    constants.SPECIAL_DEFENSE_BOOST,
+    constants.SPEED_BOOST,
+    constants.ACCURACY_BOOST,
+    constants.EVASION_BOOST
+)
+
+_zobrist_keys = dict()
+
+
+def zobrist_key(*component):
+    # keys are derived from the component itself rather than from a random generator
+    # this keeps them identical across processes regardless of the order they are first requested in
+    try:
+        return _zobrist_keys[component]
+    except KeyError:
+        key = int.from_bytes(hashlib.blake2b(repr(component).encode(), digest_size=8).digest(), 'little')
+        _zobrist_keys[component] = key
+        return key
+
+
+def pokemon_stats(pkmn):
+    return pkmn.maxhp, pkmn.attack, pkmn.defense, pkmn.special_attack, pkmn.special_defense, pkmn.speed
+
+
+def zobrist_hash_pokemon(side_name, pkmn):
+    # the attributes that no instruction can change are combined into a single key
+    h = zobrist_key(
+        side_name,
+        pkmn.id,
+        pkmn.level,
+        pkmn.ability,
+        pkmn.nature,
+        tuple(pkmn.evs),
+        tuple((m[constants.ID], m.get(constants.CURRENT_PP)) for m in pkmn.moves)
+    )
+    h ^= zobrist_key(side_name, pkmn.id, constants.HITPOINTS, pkmn.hp)
+    h ^= zobrist_key(side_name, pkmn.id, constants.STATUS, pkmn.status)
+    h ^= zobrist_key(side_name, pkmn.id, constants.ITEM, pkmn.item)
+    h ^= zobrist_key(side_name, pkmn.id, constants.TYPES, tuple(pkmn.types))
+    h ^= zobrist_key(side_name, pkmn.id, constants.STATS, pokemon_stats(pkmn))
+    for attribute in BOOST_ATTRIBUTES:
+        h ^= zobrist_key(side_name, pkmn.id, attribute, getattr(pkmn, attribute))
+    for volatile_status in pkmn.volatile_status:
+        h ^= zobrist_key(side_name, pkmn.id, constants.VOLATILE_STATUS, volatile_status)
+    for move in pkmn.moves:
+        if move[constants.DISABLED]:
+            h ^= zobrist_key(side_name, pkmn.id, constants.DISABLED, move[constants.ID])
+    return h
+
+
+def zobrist_hash_side(side_name, side):
+    h = zobrist_key(side_name, constants.ACTIVE, side.active.id)
+    h ^= zobrist_hash_pokemon(side_name, side.active)
+    for pkmn in side.reserve.values():
+        h ^= zobrist_hash_pokemon(side_name, pkmn)
+    h ^= zobrist_key(side_name, constants.WISH, side.wish)
+
+    # a side-condition with a count of 0 is the same as it not being present at all
+    for condition, count in side.side_conditions.items():
+        if count:
+            h ^= zobrist_key(side_name, constants.SIDE_CONDITIONS, condition, count)
+    return h
+
+
+def zobrist_hash(state):
+    """Computes the hash of an entire State from scratch
+       A StateMutator keeps this value up to date as instructions are applied and reversed"""
+    h = zobrist_hash_side(constants.SELF, state.self)
+    h ^= zobrist_hash_side(constants.OPPONENT, state.opponent)
+    h ^= zobrist_key(constants.WEATHER, state.weather)
+    h ^= zobrist_key(constants.FIELD, state.field)
+    if state.trick_room:
+        h ^= zobrist_key(constants.TRICK_ROOM)
+    return h
+
+
+class TranspositionTable:
+    """A bounded lookup of already-searched states
+       Entries are keyed by a state's zobrist hash and hold the depth that was searched along with the resulting score
+       When the table is full the oldest entry is discarded"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, state_hash, depth):
+        # a score from a different depth is not comparable because the evaluation of a finished battle depends on the depth
+        entry = self.entries.get(state_hash)
+        if entry is not None and entry[0] == depth:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        return None
+
+    def store(self, state_hash, depth, score):
+        self.entries[state_hash] = (depth, score)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
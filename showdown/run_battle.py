@@ -1,8 +1,5 @@
 import importlib
 import json
-import asyncio
-import concurrent.futures
-from copy import deepcopy
 import logging
 
 import data
@@ -13,6 +10,7 @@ from showdown.engine.evaluate import Scoring
 from showdown.battle import Pokemon
 from showdown.battle import LastUsedMove
 from showdown.battle_modifier import async_update_battle
+from showdown.decision_pool import async_make_decision
 
 from showdown.websocket_client import PSWebsocketClient
 
@@ -24,15 +22,7 @@ def battle_is_finished(battle_tag, msg):
 
 
 async def async_pick_move(battle):
-    battle_copy = deepcopy(battle)
-    if battle_copy.request_json:
-        battle_copy.user.from_json(battle_copy.request_json)
-
-    loop = asyncio.get_event_loop()
-    with concurrent.futures.ThreadPoolExecutor() as pool:
-        best_move = await loop.run_in_executor(
-            pool, battle_copy.find_best_move
-        )
+    best_move = await async_make_decision(battle)
     choice = best_move[0]
     if constants.SWITCH_STRING in choice:
         battle.user.last_used_move = LastUsedMove(battle.user.active.name, "switch {}".format(choice.split()[-1]), battle.turn)
@@ -42,7 +32,7 @@ async def async_pick_move(battle):
 
 
 async def handle_team_preview(battle, ps_websocket_client):
-    battle_copy = deepcopy(battle)
+    battle_copy = battle.clone()
     battle_copy.user.active = Pokemon.get_dummy()
     battle_copy.opponent.active = Pokemon.get_dummy()
 
@@ -8,6 +8,8 @@ from showdown.battle import Battle
 from showdown.battle import Battler
 from showdown.battle import Pokemon
 from showdown.battle import Move
+from showdown.battle import select_determinizations
+from showdown.battle import PossibleSets
 
 
 # so we can instantiate a Battle object for testing
@@ -1351,3 +1353,415 @@ class TestBattle(unittest.TestCase):
         )
 
         self.assertEqual(expected_options, self.battle.get_all_options())
+
+
+class TestBattleClone(unittest.TestCase):
+    def setUp(self):
+        self.battle = Battle(None)
+        self.battle.user.active = Pokemon('pikachu', 100)
+        self.battle.user.active.moves = [Move('thunderbolt'), Move('voltswitch')]
+        self.battle.user.reserve = [Pokemon('caterpie', 100)]
+        self.battle.opponent.active = Pokemon('charmander', 100)
+        self.battle.opponent.active.moves = [Move('flamethrower')]
+        self.battle.opponent.reserve = [Pokemon('squirtle', 100)]
+        self.battle.request_json = {constants.SIDE: {}}
+
+    def test_clone_gives_the_same_state(self):
+        self.battle.opponent.side_conditions[constants.SPIKES] = 1
+        self.battle.opponent.active.boosts[constants.ATTACK] = 2
+        self.battle.user.active.volatile_statuses.append(constants.SUBSTITUTE)
+        self.assertEqual(repr(self.battle.create_state()), repr(self.battle.clone().create_state()))
+
+    def test_modifying_a_cloned_pokemon_does_not_modify_the_original(self):
+        battle_copy = self.battle.clone()
+        battle_copy.user.active.boosts[constants.SPEED] = 1
+        battle_copy.user.active.stats[constants.ATTACK] = 1
+        battle_copy.user.active.volatile_statuses.append(constants.SUBSTITUTE)
+        battle_copy.user.active.moves[0].disabled = True
+        battle_copy.user.active.moves.append(Move('tackle'))
+        battle_copy.user.reserve[0].hp = 0
+
+        self.assertEqual(0, self.battle.user.active.boosts[constants.SPEED])
+        self.assertNotEqual(1, self.battle.user.active.stats[constants.ATTACK])
+        self.assertEqual([], self.battle.user.active.volatile_statuses)
+        self.assertFalse(self.battle.user.active.moves[0].disabled)
+        self.assertEqual(2, len(self.battle.user.active.moves))
+        self.assertNotEqual(0, self.battle.user.reserve[0].hp)
+
+    def test_modifying_a_cloned_battler_does_not_modify_the_original(self):
+        battle_copy = self.battle.clone()
+        battle_copy.opponent.side_conditions[constants.STEALTH_ROCK] = 1
+        battle_copy.opponent.reserve.clear()
+        battle_copy.opponent.active = Pokemon('bulbasaur', 100)
+
+        self.assertEqual(0, self.battle.opponent.side_conditions[constants.STEALTH_ROCK])
+        self.assertEqual(1, len(self.battle.opponent.reserve))
+        self.assertEqual('charmander', self.battle.opponent.active.name)
+
+    def test_clone_shares_the_request_json(self):
+        self.assertIs(self.battle.request_json, self.battle.clone().request_json)
+
+    def test_clone_works_without_an_active_pokemon(self):
+        self.battle.user.active = None
+        self.assertIsNone(self.battle.clone().user.active)
+
+    def test_snapshot_gives_the_same_state(self):
+        self.battle.opponent.side_conditions[constants.SPIKES] = 1
+        self.battle.opponent.active.boosts[constants.ATTACK] = 2
+        self.battle.user.active.volatile_statuses.append(constants.SUBSTITUTE)
+        self.assertEqual(repr(self.battle.create_state()), repr(Battle.from_snapshot(self.battle.snapshot()).create_state()))
+
+    def test_snapshot_shares_nothing_with_the_battle(self):
+        battle_copy = Battle.from_snapshot(self.battle.snapshot())
+        battle_copy.request_json[constants.SIDE][constants.ID] = 'p1'
+        battle_copy.opponent.reserve[0].hp = 0
+
+        self.assertEqual({constants.SIDE: {}}, self.battle.request_json)
+        self.assertNotEqual(0, self.battle.opponent.reserve[0].hp)
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_snapshot_keeps_the_possible_sets_but_not_their_results(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.opponent.active.get_possible_sets().get_items(self.battle.opponent.active)
+
+        battle_copy = Battle.from_snapshot(self.battle.snapshot())
+
+        self.assertEqual([['choicespecs', 75]], battle_copy.opponent.active.get_possible_sets().items)
+        self.assertEqual(dict(), battle_copy.opponent.active.get_possible_sets()._results)
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_decision_state_only_has_the_possible_sets_of_new_formes(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.opponent.active.get_possible_sets()
+        known_formes = self.battle.get_possible_sets_formes()
+        self.battle.opponent.reserve[0].get_possible_sets()
+
+        decision_state = self.battle.get_decision_state(known_formes)
+
+        self.assertEqual([[], ['squirtle']], [list(possible_sets) for possible_sets in decision_state['possible_sets']])
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_setting_the_decision_state_keeps_the_battles_own_possible_sets(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75]],
+            'moves': [['fireblast', 90]],
+        }
+        possible_sets = self.battle.opponent.active.get_possible_sets()
+        battle_copy = Battle.from_snapshot(self.battle.snapshot())
+        known_formes = battle_copy.get_possible_sets_formes()
+        battle_copy.opponent.active.possible_sets.clear()
+        battle_copy.opponent.active.get_possible_sets()
+        battle_copy.opponent.reserve[0].get_possible_sets()
+
+        self.battle.set_decision_state(battle_copy.get_decision_state(known_formes))
+
+        self.assertIs(possible_sets, self.battle.opponent.active.possible_sets['charmander'])
+        self.assertEqual('squirtle', self.battle.opponent.reserve[0].possible_sets['squirtle'].pokemon_name)
+
+
+class TestPrepareBattles(unittest.TestCase):
+    def setUp(self):
+        self.battle = Battle(None)
+        self.battle.user.active = Pokemon('pikachu', 100)
+        self.battle.user.active.moves = [Move('thunderbolt'), Move('voltswitch')]
+        self.battle.user.reserve = [Pokemon('caterpie', 100)]
+        self.battle.opponent.active = Pokemon('charmander', 100)
+        self.battle.opponent.active.moves = [Move('flamethrower')]
+        self.battle.opponent.reserve = [Pokemon('squirtle', 100)]
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_prepare_battles_gives_each_battle_its_own_opponent_active_pokemon(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 50], ['lifeorb', 50]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        battles = self.battle.prepare_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+
+        self.assertEqual(4, len(battles))
+        self.assertEqual(4, len({id(b.opponent.active) for b in battles}))
+        self.assertEqual(
+            {('modest', 'choicespecs'), ('modest', 'lifeorb'), ('timid', 'choicespecs'), ('timid', 'lifeorb')},
+            {(b.opponent.active.nature, b.opponent.active.item) for b in battles}
+        )
+        self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
+        self.assertEqual(1, len(self.battle.opponent.active.moves))
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_possible_sets_of_a_guessed_mega_evolution_are_kept_on_the_battle(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60]],
+            'abilities': [['thickfat', 100]],
+            'items': [['venusaurite', 100]],
+            'moves': [['gigadrain', 90]],
+        }
+        self.battle.battle_type = constants.RANDOM_BATTLE
+        self.battle.generation = 'gen7'
+        self.battle.opponent.active = Pokemon('venusaur', 100)
+
+        self.battle.prepare_battles(join_moves_together=True)
+        possible_sets = self.battle.opponent.active.possible_sets['venusaurmega']
+        self.battle.prepare_battles(join_moves_together=True)
+
+        self.assertEqual('venusaur', self.battle.opponent.active.name)
+        self.assertIs(possible_sets, self.battle.opponent.active.possible_sets['venusaurmega'])
+        self.assertEqual(1, get_pokemon_sets_mock.call_count)
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_prepare_battles_weights_each_battle_by_usage(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75], ['lifeorb', 25]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        battles = self.battle.prepare_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+
+        probabilities = {(b.opponent.active.nature, b.opponent.active.item): b.probability for b in battles}
+        self.assertAlmostEqual(0.45, probabilities[('modest', 'choicespecs')])
+        self.assertAlmostEqual(0.15, probabilities[('modest', 'lifeorb')])
+        self.assertAlmostEqual(0.3, probabilities[('timid', 'choicespecs')])
+        self.assertAlmostEqual(0.1, probabilities[('timid', 'lifeorb')])
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_prepare_battles_keeps_only_the_most_likely_battles(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75], ['lifeorb', 25]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        battles = self.battle.prepare_battles(guess_mega_evo_opponent=False, join_moves_together=True, max_battles=2)
+
+        self.assertEqual(
+            [('modest', 'choicespecs', 0.6), ('timid', 'choicespecs', 0.4)],
+            [(b.opponent.active.nature, b.opponent.active.item, round(b.probability, 6)) for b in battles]
+        )
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_generate_battles_gives_the_same_battles_as_prepare_battles(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75], ['lifeorb', 25]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        battles = self.battle.prepare_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+        determinizations = self.battle.generate_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+
+        self.assertEqual(len(battles), len(determinizations))
+        self.assertEqual(
+            [(b.opponent.active.nature, b.opponent.active.item, b.probability) for b in battles],
+            [(b.opponent.active.nature, b.opponent.active.item, b.probability) for b in determinizations]
+        )
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_generate_battles_creates_each_battle_while_iterating(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75], ['lifeorb', 25]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        determinizations = self.battle.generate_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+
+        with mock.patch.object(determinizations, 'create_battle', wraps=determinizations.create_battle) as create_battle_mock:
+            battles = iter(determinizations)
+            self.assertEqual(0, create_battle_mock.call_count)
+            next(battles)
+            self.assertEqual(1, create_battle_mock.call_count)
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_generate_battles_gives_the_battle_itself_when_there_are_no_sets(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.side_effect = KeyError
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        determinizations = self.battle.generate_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+
+        self.assertEqual(1, len(determinizations))
+        self.assertEqual(1, len(list(determinizations)))
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_create_searches_gives_the_same_searches_as_each_battle(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75], ['lifeorb', 25]],
+            'moves': [['fireblast', 90], ['willowisp', 30]],
+        }
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+        self.battle.opponent.last_used_move = LastUsedMove('charmander', 'flamethrower', 0)
+
+        determinizations = self.battle.generate_battles(guess_mega_evo_opponent=False)
+
+        expected_searches = [(repr(b.create_state()), b.get_all_options()) for b in determinizations]
+        searches = [(repr(state), (user_options, opponent_options)) for state, user_options, opponent_options in determinizations.create_searches()]
+        self.assertEqual(expected_searches, searches)
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_create_searches_only_gives_each_search_its_own_opponent_active_pokemon(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {
+            'spreads': [['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]],
+            'abilities': [['blaze', 100]],
+            'items': [['choicespecs', 75], ['lifeorb', 25]],
+            'moves': [['fireblast', 90]],
+        }
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        determinizations = self.battle.generate_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+        states = [state for state, _, _ in determinizations.create_searches()]
+
+        self.assertEqual(4, len({id(s.opponent.active) for s in states}))
+        self.assertEqual(1, len({id(s.self) for s in states}))
+        self.assertEqual(1, len({id(s.opponent.reserve) for s in states}))
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_create_searches_gives_the_battles_state_when_there_are_no_sets(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.side_effect = KeyError
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+
+        determinizations = self.battle.generate_battles(guess_mega_evo_opponent=False, join_moves_together=True)
+        searches = list(determinizations.create_searches())
+
+        self.assertEqual(1, len(searches))
+        self.assertEqual(repr(determinizations.battle.create_state()), repr(searches[0][0]))
+        self.assertEqual([1], determinizations.probabilities)
+
+
+class TestPossibleSets(unittest.TestCase):
+    def setUp(self):
+        self.get_pokemon_sets_patch = mock.patch('showdown.battle.get_pokemon_sets')
+        self.addCleanup(self.get_pokemon_sets_patch.stop)
+        self.get_pokemon_sets_mock = self.get_pokemon_sets_patch.start()
+        self.get_pokemon_sets_mock.return_value = {
+            'spreads': [['timid', '0,0,0,252,4,252', 40], ['modest', '0,0,0,252,4,252', 60]],
+            'abilities': [['blaze', 100]],
+            'items': [['lifeorb', 25], ['choicespecs', 75]],
+            'moves': [['fireblast', 90], ['flamethrower', 80]],
+        }
+        self.pokemon = Pokemon('charmander', 100)
+        self.possible_sets = self.pokemon.get_possible_sets()
+
+    def test_usage_statistics_are_sorted_once_when_created(self):
+        self.assertEqual([['modest', '0,0,0,252,4,252', 60], ['timid', '0,0,0,252,4,252', 40]], self.possible_sets.spreads)
+        self.assertEqual([['choicespecs', 75], ['lifeorb', 25]], self.possible_sets.items)
+
+    def test_pokemon_keeps_its_possible_sets(self):
+        self.assertIs(self.possible_sets, self.pokemon.get_possible_sets())
+        self.assertEqual(1, self.get_pokemon_sets_mock.call_count)
+
+    def test_clones_share_the_possible_sets(self):
+        self.assertIs(self.possible_sets, self.pokemon.clone().get_possible_sets())
+
+    def test_forme_change_makes_new_possible_sets(self):
+        self.pokemon.forme_change('charmeleon')
+        self.assertEqual('charmeleon', self.pokemon.get_possible_sets().pokemon_name)
+
+    def test_forme_change_keeps_the_possible_sets_of_the_previous_forme(self):
+        self.pokemon.forme_change('charmeleon')
+        self.pokemon.forme_change('charmander')
+        self.assertIs(self.possible_sets, self.pokemon.get_possible_sets())
+
+    def test_possible_sets_of_a_forme_guessed_on_a_clone_are_kept(self):
+        clone = self.pokemon.clone()
+        clone.forme_change('charmeleon')
+        possible_sets = clone.get_possible_sets()
+
+        self.assertIs(possible_sets, self.pokemon.possible_sets['charmeleon'])
+        self.assertIs(possible_sets, self.pokemon.clone().possible_sets['charmeleon'])
+
+    def test_ranked_sets_are_kept_while_nothing_new_is_revealed(self):
+        ranked_sets = self.possible_sets.get_ranked_sets(self.pokemon, constants.STANDARD_BATTLE, True)
+        self.assertIs(ranked_sets, self.possible_sets.get_ranked_sets(self.pokemon, constants.STANDARD_BATTLE, True))
+
+    def test_ranked_sets_are_ranked_from_most_to_least_likely(self):
+        _, possible_sets, weights, ranking = self.possible_sets.get_ranked_sets(self.pokemon, constants.STANDARD_BATTLE, True)
+        self.assertEqual(
+            [('modest', 'choicespecs'), ('timid', 'choicespecs'), ('modest', 'lifeorb'), ('timid', 'lifeorb')],
+            [(possible_sets[i][0][0][0], possible_sets[i][0][1]) for i in ranking]
+        )
+
+    def test_ruling_out_an_item_updates_the_ranked_sets(self):
+        self.possible_sets.get_ranked_sets(self.pokemon, constants.STANDARD_BATTLE, True)
+        self.pokemon.can_have_choice_item = False
+
+        _, possible_sets, weights, ranking = self.possible_sets.get_ranked_sets(self.pokemon, constants.STANDARD_BATTLE, True)
+
+        self.assertEqual({'lifeorb'}, {s[0][1] for s in possible_sets})
+
+    def test_revealing_a_move_updates_the_expected_moves(self):
+        expected_moves, _, _, _ = self.possible_sets.get_ranked_sets(self.pokemon, constants.STANDARD_BATTLE, True)
+        self.assertEqual(['fireblast', 'flamethrower'], expected_moves)
+
+        self.pokemon.add_move('fireblast')
+        expected_moves, _, _, _ = self.possible_sets.get_ranked_sets(self.pokemon, constants.STANDARD_BATTLE, True)
+
+        self.assertEqual(['flamethrower'], expected_moves)
+
+    def test_revealing_the_item_leaves_only_that_item(self):
+        self.pokemon.item = 'lifeorb'
+        self.assertEqual(['lifeorb'], self.possible_sets.get_items(self.pokemon))
+
+    def test_clones_with_different_items_do_not_share_results(self):
+        clone = self.pokemon.clone()
+        clone.item = 'lifeorb'
+
+        self.assertEqual(['lifeorb'], self.possible_sets.get_items(clone))
+        self.assertEqual(['choicespecs', 'lifeorb'], self.possible_sets.get_items(self.pokemon))
+
+    def test_pokemon_without_sets_raises_key_error(self):
+        self.get_pokemon_sets_mock.side_effect = KeyError
+        with self.assertRaises(KeyError):
+            PossibleSets('squirtle')
+
+
+class TestSelectDeterminizations(unittest.TestCase):
+    def test_selects_everything_by_default(self):
+        self.assertEqual([0, 1, 2, 3], select_determinizations([0.1, 0.4, 0.2, 0.3]))
+
+    def test_selects_the_most_likely_in_their_original_order(self):
+        self.assertEqual([1, 3], select_determinizations([0.1, 0.4, 0.2, 0.3], max_battles=2))
+
+    def test_stops_once_the_probability_mass_is_covered(self):
+        self.assertEqual([1, 3], select_determinizations([0.1, 0.4, 0.2, 0.3], probability_mass=0.7))
+
+    def test_does_not_stop_before_the_probability_mass_is_covered(self):
+        self.assertEqual([1, 2, 3], select_determinizations([0.1, 0.4, 0.2, 0.3], probability_mass=0.75))
+
+    def test_always_selects_at_least_one(self):
+        self.assertEqual([1], select_determinizations([0.1, 0.4, 0.2, 0.3], probability_mass=0))
+
+    def test_ties_keep_their_original_order(self):
+        self.assertEqual([0, 1], select_determinizations([0.5, 0.5, 0.5], max_battles=2))
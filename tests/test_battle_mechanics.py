@@ -11421,6 +11421,37 @@ class TestRemoveDuplicateInstructions(unittest.TestCase):
 
         self.assertEqual(expected_instructions, new_instructions)
 
+    def test_keeps_the_position_of_the_first_of_each_duplicate(self):
+        instructions = [
+            TransposeInstruction(0.25, [(constants.MUTATOR_DAMAGE, constants.SELF, 5)], False),
+            TransposeInstruction(0.25, [(constants.MUTATOR_DAMAGE, constants.SELF, 6)], False),
+            TransposeInstruction(0.25, [(constants.MUTATOR_DAMAGE, constants.SELF, 6)], False),
+            TransposeInstruction(0.25, [(constants.MUTATOR_DAMAGE, constants.SELF, 5)], False),
+        ]
+
+        new_instructions = remove_duplicate_instructions(instructions)
+
+        expected_instructions = [
+            TransposeInstruction(0.5, [(constants.MUTATOR_DAMAGE, constants.SELF, 5)], False),
+            TransposeInstruction(0.5, [(constants.MUTATOR_DAMAGE, constants.SELF, 6)], False),
+        ]
+
+        self.assertEqual(expected_instructions, new_instructions)
+
+    def test_combines_instructions_that_contain_lists(self):
+        instructions = [
+            TransposeInstruction(0.5, [(constants.MUTATOR_CHANGE_TYPE, constants.SELF, ['water'], ['normal'])], False),
+            TransposeInstruction(0.5, [(constants.MUTATOR_CHANGE_TYPE, constants.SELF, ['water'], ['normal'])], False),
+        ]
+
+        new_instructions = remove_duplicate_instructions(instructions)
+
+        expected_instructions = [
+            TransposeInstruction(1.0, [(constants.MUTATOR_CHANGE_TYPE, constants.SELF, ['water'], ['normal'])], False),
+        ]
+
+        self.assertEqual(expected_instructions, new_instructions)
+
 
 class TestUserMovesFirst(unittest.TestCase):
     def setUp(self):
@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 import json
 from collections import defaultdict
 
@@ -288,6 +289,37 @@ class TestSwitchOrDrag(unittest.TestCase):
 
         self.assertEqual(new_pkmn, self.battle.opponent.active)
 
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_switch_starts_tracking_the_opponents_possible_sets(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {'spreads': [], 'abilities': [], 'items': [], 'moves': []}
+        split_msg = ['', 'switch', 'p2a: weedle', 'Weedle, L100, M', '100/100']
+        switch_or_drag(self.battle, split_msg)
+
+        self.assertEqual('weedle', self.battle.opponent.active.possible_sets['weedle'].pokemon_name)
+
+    @mock.patch('showdown.battle.get_pokemon_sets')
+    def test_switch_keeps_the_possible_sets_of_an_already_seen_pokemon(self, get_pokemon_sets_mock):
+        get_pokemon_sets_mock.return_value = {'spreads': [], 'abilities': [], 'items': [], 'moves': []}
+        already_seen_pokemon = Pokemon('weedle', 100)
+        possible_sets = already_seen_pokemon.get_possible_sets()
+        self.battle.opponent.reserve.append(already_seen_pokemon)
+        split_msg = ['', 'switch', 'p2a: weedle', 'Weedle, L100, M', '100/100']
+        switch_or_drag(self.battle, split_msg)
+
+        self.assertIs(possible_sets, self.battle.opponent.active.possible_sets['weedle'])
+
+    def test_switch_into_a_pokemon_without_sets_does_not_track_them(self):
+        split_msg = ['', 'switch', 'p2a: weedle', 'Weedle, L100, M', '100/100']
+        switch_or_drag(self.battle, split_msg)
+
+        self.assertEqual(dict(), self.battle.opponent.active.possible_sets)
+
+    def test_switch_does_not_track_the_users_possible_sets(self):
+        split_msg = ['', 'switch', 'p1a: weedle', 'Weedle, L100, M', '100/100']
+        switch_or_drag(self.battle, split_msg)
+
+        self.assertEqual(dict(), self.battle.user.active.possible_sets)
+
     def test_switch_resets_toxic_count_for_opponent(self):
         self.battle.opponent.side_conditions[constants.TOXIC_COUNT] = 1
         split_msg = ['', 'switch', 'p2a: weedle', 'Weedle, L100, M', '100/100']
@@ -4,6 +4,14 @@ from collections import defaultdict
 import constants
 from showdown.engine.damage_calculator import _calculate_damage
 from showdown.engine.damage_calculator import calculate_damage
+from showdown.engine.damage_calculator import get_move
+from showdown.engine.damage_calculator import damage_cache
+from showdown.engine.damage_calculator import _calculate_damage_rolls
+from showdown.engine.damage_calculator import pokemon_type_indicies
+from showdown.engine.damage_calculator import damage_multipication_array
+from showdown.engine.damage_calculator import type_effectiveness_modifier
+from showdown.engine.damage_calculator import pokemon_type_effectiveness_modifier
+from showdown.engine.move_table import compiled_moves
 from showdown.engine.objects import State
 from showdown.engine.objects import Side
 from showdown.engine.objects import Pokemon
@@ -331,3 +339,125 @@ class TestCalculateDamage(unittest.TestCase):
         )
 
         self.assertNotEqual(0, damage_amounts[0])
+
+    def test_calculating_damage_of_a_charge_move_does_not_modify_the_move_table(self):
+        calculate_damage(
+            self.state,
+            constants.OPPONENT,
+            'solarbeam',
+            'splash'
+        )
+
+        self.assertIn(constants.CHARGE, compiled_moves['solarbeam'][constants.FLAGS])
+
+
+class TestGetMove(unittest.TestCase):
+    def test_move_name_returns_the_compiled_move(self):
+        self.assertIs(compiled_moves['tackle'], get_move('tackle'))
+
+    def test_move_dictionary_is_returned_as_is(self):
+        move = {constants.ID: 'tackle'}
+        self.assertIs(move, get_move(move))
+
+    def test_unknown_move_returns_none(self):
+        self.assertIsNone(get_move('notamove'))
+
+    def test_compiled_move_flags_are_a_frozenset(self):
+        self.assertEqual(frozenset([constants.CONTACT, constants.PROTECT, 'mirror']), get_move('tackle')[constants.FLAGS])
+
+
+class TestDamageCache(unittest.TestCase):
+    def setUp(self):
+        self.charizard = Pokemon.from_state_pokemon_dict(StatePokemon("charizard", 100).to_dict())
+        self.venusaur = Pokemon.from_state_pokemon_dict(StatePokemon("venusaur", 100).to_dict())
+        damage_cache.clear()
+
+    def test_second_calculation_with_the_same_inputs_is_a_hit(self):
+        first_damage = _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+        second_damage = _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+
+        self.assertEqual(first_damage, second_damage)
+        self.assertEqual(1, damage_cache.hits)
+        self.assertEqual(1, damage_cache.misses)
+
+    def test_changing_a_boost_is_a_miss(self):
+        unboosted_damage = _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+        self.charizard.special_attack_boost = 2
+        boosted_damage = _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+
+        self.assertEqual(0, damage_cache.hits)
+        self.assertGreater(boosted_damage[0], unboosted_damage[0])
+
+    def test_changing_a_boost_the_move_does_not_use_is_a_hit(self):
+        _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+        self.charizard.attack_boost = 2
+        _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+
+        self.assertEqual(1, damage_cache.hits)
+
+    def test_changing_the_conditions_is_a_miss(self):
+        _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+        _calculate_damage(self.charizard, self.venusaur, 'fireblast', conditions={constants.WEATHER: constants.SUN})
+
+        self.assertEqual(0, damage_cache.hits)
+
+    def test_returned_list_can_be_modified_without_changing_the_cache(self):
+        damage = _calculate_damage(self.charizard, self.venusaur, 'fireblast')
+        damage.append(0)
+
+        self.assertNotEqual(damage, _calculate_damage(self.charizard, self.venusaur, 'fireblast'))
+
+    def test_cached_damage_is_identical_to_calculating_it_again(self):
+        moves = ['fireblast', 'earthquake', 'sludgebomb', 'hydropump', 'solarbeam', 'thousandarrows', 'psychic']
+        conditions = [
+            {},
+            {constants.WEATHER: constants.SUN, constants.REFLECT: 1},
+            {constants.WEATHER: constants.SAND, constants.LIGHT_SCREEN: 1},
+            {constants.TERRAIN: constants.PSYCHIC_TERRAIN, constants.AURORA_VEIL: 1},
+        ]
+        calc_types = ['average', 'min_max_average', 'all']
+        self.venusaur.volatile_status.add(constants.ROOST)
+
+        # the first pass fills the cache and the second pass only has hits
+        for _ in range(2):
+            for move in moves:
+                for condition in conditions:
+                    for calc_type in calc_types:
+                        for attacker, defender in [(self.charizard, self.venusaur), (self.venusaur, self.charizard)]:
+                            attacking_move = get_move(move)
+                            if attacking_move[constants.CATEGORY] == constants.PHYSICAL:
+                                attack, defense = constants.ATTACK, constants.DEFENSE
+                            else:
+                                attack, defense = constants.SPECIAL_ATTACK, constants.SPECIAL_DEFENSE
+                            expected_damage = _calculate_damage_rolls(attacker, defender, attacking_move, attack, defense, condition, calc_type)
+
+                            self.assertEqual(expected_damage, _calculate_damage(attacker, defender, move, conditions=condition, calc_type=calc_type))
+
+        self.assertEqual(damage_cache.misses, damage_cache.hits)
+
+
+class TestTypeEffectivenessModifier(unittest.TestCase):
+    def test_every_type_combination_matches_multiplying_each_type(self):
+        for attacking_type, attacking_type_index in pokemon_type_indicies.items():
+            for first_type, first_type_index in pokemon_type_indicies.items():
+                expected_modifier = damage_multipication_array[attacking_type_index][first_type_index]
+                self.assertEqual(expected_modifier, type_effectiveness_modifier(attacking_type, [first_type]))
+                for second_type, second_type_index in pokemon_type_indicies.items():
+                    expected_dual_type_modifier = expected_modifier * damage_multipication_array[attacking_type_index][second_type_index]
+                    self.assertEqual(expected_dual_type_modifier, type_effectiveness_modifier(attacking_type, [first_type, second_type]))
+
+    def test_pokemon_with_three_types(self):
+        self.assertEqual(8, type_effectiveness_modifier('fire', ['grass', 'bug', 'steel']))
+
+    def test_pokemon_with_no_types(self):
+        self.assertEqual(1, type_effectiveness_modifier('fire', []))
+
+    def test_types_can_be_a_tuple(self):
+        self.assertEqual(4, type_effectiveness_modifier('fire', ('grass', 'steel')))
+
+    def test_pokemon_modifier_matches_the_modifier_of_its_types(self):
+        pkmn = Pokemon.from_state_pokemon_dict(StatePokemon("venusaur", 100).to_dict())
+        for types in [['grass', 'poison'], ['grass'], ['grass', 'bug', 'steel'], []]:
+            pkmn.types = types
+            for attacking_type in pokemon_type_indicies:
+                self.assertEqual(type_effectiveness_modifier(attacking_type, types), pokemon_type_effectiveness_modifier(attacking_type, pkmn))
@@ -2,7 +2,14 @@ import unittest
 from unittest import mock
 
 from showdown.engine.select_best_move import pick_safest
+from showdown.engine.select_best_move import WorstCaseScores
+from showdown.engine.select_best_move import ScoreBound
+from showdown.engine.select_best_move import UpperScoreBound
+from showdown.engine.select_best_move import LowerScoreBound
+from showdown.battle_bots.safest.main import prefix_opponent_move
 from showdown.battle_bots.nash_equilibrium.main import get_weighted_choices_from_multiple_score_lookups
+from showdown.battle_bots.nash_equilibrium.main import solve_zero_sum_game
+from showdown.battle_bots.nash_equilibrium.main import find_nash_equilibrium
 
 
 class TestPickSafest(unittest.TestCase):
@@ -55,6 +62,120 @@ class TestPickSafest(unittest.TestCase):
 
         self.assertEqual(expected_result, safest)
 
+    def test_score_bounds_that_could_be_the_same_as_the_other_scores_give_the_opponent_a_choice(self):
+        # the real score of ('c', 'y') could be -500, so 'y' is not known to be guaranteed
+        score_lookup = {
+            ("a", "x"): 100,
+            ("a", "y"): -500,
+            ("c", "x"): 200,
+            ("c", "y"): ScoreBound(-400),
+        }
+
+        safest = pick_safest(score_lookup)
+        expected_result = (("c", "y"), -400)
+
+        self.assertEqual(expected_result, safest)
+
+    def test_upper_score_bound_below_the_other_scores_gives_the_opponent_a_choice(self):
+        score_lookup = {
+            ("a", "x"): 100,
+            ("a", "y"): -500,
+            ("c", "x"): 200,
+            ("c", "y"): UpperScoreBound(-600),
+        }
+
+        safest = pick_safest(score_lookup)
+        expected_result = (("a", "y"), -500)
+
+        self.assertEqual(expected_result, safest)
+
+    def test_lower_score_bound_above_the_other_scores_gives_the_opponent_a_choice(self):
+        score_lookup = {
+            ("a", "x"): 100,
+            ("a", "y"): -500,
+            ("c", "x"): 200,
+            ("c", "y"): LowerScoreBound(-400),
+        }
+
+        safest = pick_safest(score_lookup)
+        expected_result = (("c", "y"), -400)
+
+        self.assertEqual(expected_result, safest)
+
+
+class TestWorstCaseScores(unittest.TestCase):
+    def assertSameAsMergedPickSafest(self, score_lookups):
+        merged_score_lookup = dict()
+        worst_case_scores = WorstCaseScores()
+        for i, score_lookup in enumerate(score_lookups):
+            merged_score_lookup.update(prefix_opponent_move(score_lookup, str(i)))
+            worst_case_scores.add(score_lookup, str(i))
+
+        self.assertEqual(pick_safest(merged_score_lookup), worst_case_scores.pick_safest())
+
+    def test_one_score_lookup(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("a", "y"): -100, ("c", "x"): 200, ("c", "y"): -200},
+        ])
+
+    def test_worst_case_is_taken_over_every_score_lookup(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("a", "y"): -100, ("c", "x"): 200, ("c", "y"): -50},
+            {("a", "x"): 100, ("a", "y"): -20, ("c", "x"): -300, ("c", "y"): 50},
+        ])
+
+    def test_opponent_moves_that_do_not_give_a_choice_are_ignored(self):
+        # 'y' has the same score for every user move in the first lookup
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("a", "y"): -500, ("c", "x"): 200, ("c", "y"): -500},
+            {("a", "x"): 100, ("a", "y"): 90, ("c", "x"): 50, ("c", "y"): 40},
+        ])
+        worst_case_scores = WorstCaseScores()
+        worst_case_scores.add({("a", "x"): 100, ("a", "y"): -500, ("c", "x"): 200, ("c", "y"): -500}, "0")
+        self.assertEqual((("c", "x_0"), 200), worst_case_scores.pick_safest())
+
+    def test_every_opponent_move_is_used_when_none_give_a_choice(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("a", "y"): -500, ("c", "x"): 100, ("c", "y"): -500},
+            {("a", "x"): 10, ("c", "x"): 10},
+        ])
+
+    def test_single_user_move(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("a", "y"): -100},
+            {("a", "x"): 30, ("a", "y"): 30},
+        ])
+
+    def test_single_opponent_move(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("c", "x"): 100},
+        ])
+
+    def test_nan_scores(self):
+        nan = float('nan')
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): nan, ("a", "y"): 20, ("c", "x"): 50, ("c", "y"): 20},
+            {("a", "x"): 10, ("a", "y"): nan, ("c", "x"): 10, ("c", "y"): 30},
+        ])
+
+    def test_score_bounds(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("a", "y"): -500, ("c", "x"): 200, ("c", "y"): ScoreBound(-400)},
+            {("a", "x"): ScoreBound(10), ("a", "y"): 20, ("c", "x"): 50, ("c", "y"): 20},
+        ])
+
+    def test_typed_score_bounds(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 100, ("a", "y"): -500, ("c", "x"): 200, ("c", "y"): LowerScoreBound(-400)},
+            {("a", "x"): UpperScoreBound(10), ("a", "y"): 20, ("c", "x"): 50, ("c", "y"): 20},
+        ])
+
+    def test_ties_are_broken_the_same_way(self):
+        self.assertSameAsMergedPickSafest([
+            {("a", "x"): 10, ("a", "y"): 20, ("c", "x"): 20, ("c", "y"): 10},
+            {("c", "x"): 10, ("c", "y"): 20, ("a", "x"): 20, ("a", "y"): 10},
+        ])
+
 
 class TestGetWeightedChoices(unittest.TestCase):
     def setUp(self):
@@ -89,6 +210,23 @@ class TestGetWeightedChoices(unittest.TestCase):
 
         self.assertEqual(expected_choices, choices)
 
+    def test_weights_each_score_lookup_by_its_probability(self):
+        self.find_nash_mock.side_effect = [
+            (['a', 'b'], ['c', 'd'], [1, 0], [0, 1], None),
+            (['a', 'b'], ['c', 'd'], [0, 1], [0, 1], None),
+        ]
+        sl = {
+            ('a', 'c'): 10,
+            ('a', 'd'): 10,
+            ('b', 'c'): -10,
+            ('b', 'd'): -10,
+        }
+
+        choices = get_weighted_choices_from_multiple_score_lookups([sl, sl], weights=[0.75, 0.25])
+        expected_choices = [('a', 0.75), ('b', 0.25)]
+
+        self.assertEqual(expected_choices, choices)
+
     def test_returns_correct_values_for_score_lookups_with_different_moves(self):
         self.find_nash_mock.side_effect = [
             (['a', 'b'], ['c', 'd'], [1, 0], [0, 1], None),
@@ -165,3 +303,53 @@ class TestGetWeightedChoices(unittest.TestCase):
         expected_choices = [('a', 0.75), ('b', 0.25)]
 
         self.assertEqual(expected_choices, choices)
+
+
+class TestSolveZeroSumGame(unittest.TestCase):
+    def test_matching_pennies_is_an_even_split(self):
+        row_percentages, col_percentages, value = solve_zero_sum_game([[1, -1], [-1, 1]])
+
+        for percentage in list(row_percentages) + list(col_percentages):
+            self.assertAlmostEqual(0.5, percentage)
+        self.assertAlmostEqual(0, value)
+
+    def test_rock_paper_scissors_is_an_even_split(self):
+        row_percentages, col_percentages, value = solve_zero_sum_game([[0, -1, 1], [1, 0, -1], [-1, 1, 0]])
+
+        for percentage in list(row_percentages) + list(col_percentages):
+            self.assertAlmostEqual(1/3, percentage)
+        self.assertAlmostEqual(0, value)
+
+    def test_dominated_option_is_never_chosen(self):
+        row_percentages, col_percentages, value = solve_zero_sum_game([[10, 20], [-10, -20]])
+
+        self.assertEqual([1, 0], list(row_percentages))
+        self.assertEqual([1, 0], list(col_percentages))
+        self.assertEqual(10, value)
+
+    def test_neither_player_can_improve_on_the_equilibrium(self):
+        matrix = [[30, -10, 5], [-20, 40, 0], [10, 10, -50]]
+        row_percentages, col_percentages, value = solve_zero_sum_game(matrix)
+
+        for row in range(3):
+            self.assertLessEqual(sum(matrix[row][col] * col_percentages[col] for col in range(3)), value + 1e-9)
+        for col in range(3):
+            self.assertGreaterEqual(sum(matrix[row][col] * row_percentages[row] for row in range(3)), value - 1e-9)
+
+
+class TestFindNashEquilibrium(unittest.TestCase):
+    def test_linear_program_solver_returns_choices_and_percentages(self):
+        score_lookup = {
+            ('a', 'c'): 10,
+            ('a', 'd'): -10,
+            ('b', 'c'): -10,
+            ('b', 'd'): 10,
+        }
+        with mock.patch('config.equilibrium_solver', 'linear_program'):
+            bot_choices, opponent_choices, bot_percentages, opponent_percentages, score = find_nash_equilibrium(score_lookup)
+
+        self.assertEqual(['a', 'b'], list(bot_choices))
+        self.assertEqual(['c', 'd'], list(opponent_choices))
+        for percentage in bot_percentages:
+            self.assertAlmostEqual(0.5, percentage)
+        self.assertAlmostEqual(0, score)
@@ -0,0 +1,198 @@
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import unittest
+
+import config
+import constants
+import data
+from showdown.battle import Battle
+from showdown.battle import Pokemon
+from showdown.battle import Move
+from showdown.decision_pool import async_make_decision
+from showdown.decision_pool import get_decision_pool
+from showdown.decision_pool import start_decision_pool
+from showdown.decision_pool import shutdown_decision_pool
+from showdown.decision_pool import submit_decision
+from showdown.decision_pool import make_decision
+from showdown.run_battle import async_pick_move
+from showdown.battle_bots.safest.main import BattleBot as SafestBot
+
+
+class LastMoveBot(Battle):
+    def find_best_move(self):
+        self.user.active.moves.pop(0)
+        return ["/choose move {}".format(self.user.active.moves[-1].name), str(self.rqid)]
+
+
+class SlowBot(Battle):
+    finished_path = None
+
+    def find_best_move(self):
+        time.sleep(0.5)
+        if self.finished_path is not None:
+            open(self.finished_path, 'w').close()
+        return ["/choose move {}".format(self.user.active.moves[-1].name), str(self.rqid)]
+
+
+class LearningBot(Battle):
+    decision_state_attributes = ('decisions_made',)
+    decisions_made = 0
+
+    def find_best_move(self):
+        self.decisions_made += 1
+        self.opponent.active.get_possible_sets()
+        return ["/choose move {}".format(self.user.active.moves[-1].name), str(self.rqid)]
+
+
+class TestDecisionPool(unittest.TestCase):
+    def setUp(self):
+        self.original_decision_executor = config.decision_executor
+        self.original_decision_timeout_ms = config.decision_timeout_ms
+        self.original_pokemon_sets = data.pokemon_sets
+
+    def tearDown(self):
+        config.decision_executor = self.original_decision_executor
+        config.decision_timeout_ms = self.original_decision_timeout_ms
+        data.pokemon_sets = self.original_pokemon_sets
+        shutdown_decision_pool()
+
+    def create_battle(self, battle_class):
+        battle = battle_class(None)
+        battle.rqid = 1
+        battle.user.active = Pokemon('pikachu', 100)
+        battle.user.active.moves = [Move('thunderbolt'), Move('voltswitch')]
+        battle.opponent.active = Pokemon('charmander', 100)
+        battle.opponent.active.moves = [Move('flamethrower')]
+        return battle
+
+    def make_decision(self, battle):
+        return asyncio.get_event_loop().run_until_complete(async_make_decision(battle))
+
+    def test_thread_executor_makes_the_bots_decision(self):
+        config.decision_executor = 'thread'
+        self.assertEqual(["/choose move voltswitch", "1"], self.make_decision(self.create_battle(LastMoveBot)))
+
+    def test_process_executor_makes_the_bots_decision(self):
+        config.decision_executor = 'process'
+        self.assertEqual(["/choose move voltswitch", "1"], self.make_decision(self.create_battle(LastMoveBot)))
+
+    def test_decision_does_not_change_the_battle(self):
+        for executor in ['thread', 'process']:
+            config.decision_executor = executor
+            start_decision_pool()
+            battle = self.create_battle(LastMoveBot)
+            self.make_decision(battle)
+            self.assertEqual(2, len(battle.user.active.moves))
+
+    def test_what_the_bot_learned_is_kept_on_the_battle(self):
+        data.pokemon_sets = {
+            'charmander': {
+                'spreads': [['modest', '0,0,0,252,4,252', 60]],
+                'abilities': [['blaze', 100]],
+                'items': [['choicespecs', 75]],
+                'moves': [['fireblast', 90]],
+            }
+        }
+        for executor in ['thread', 'process']:
+            config.decision_executor = executor
+            start_decision_pool()
+            battle = self.create_battle(LearningBot)
+            self.make_decision(battle)
+            self.make_decision(battle)
+
+            self.assertEqual(2, battle.decisions_made)
+            self.assertEqual('charmander', battle.opponent.active.possible_sets['charmander'].pokemon_name)
+
+    def test_safest_bot_searches_with_the_history_table_on_the_battle(self):
+        data.pokemon_sets = {
+            'charmander': {
+                'spreads': [['modest', '0,0,0,252,4,252', 60]],
+                'abilities': [['blaze', 100]],
+                'items': [['choicespecs', 75]],
+                'moves': [['flamethrower', 90], ['dragonpulse', 80]],
+            },
+            'squirtle': {
+                'spreads': [['modest', '0,0,0,252,4,252', 60]],
+                'abilities': [['torrent', 100]],
+                'items': [['leftovers', 75]],
+                'moves': [['surf', 90]],
+            }
+        }
+        for executor in ['thread', 'process']:
+            config.decision_executor = executor
+            start_decision_pool()
+            battle = self.create_battle(SafestBot)
+            battle.battle_type = constants.STANDARD_BATTLE
+            battle.generation = 'gen7'
+            battle.user.reserve = [Pokemon('caterpie', 100)]
+            battle.user.reserve[0].moves = [Move('tackle')]
+            battle.opponent.reserve = [Pokemon('squirtle', 100)]
+
+            loop = asyncio.get_event_loop()
+            loop.run_until_complete(async_pick_move(battle))
+            self.assertTrue(battle.history_table.scores)
+
+            # an option that is never searched is only aged by the next decision
+            battle.history_table.scores['not-an-option'] = 8
+            loop.run_until_complete(async_pick_move(battle))
+            self.assertEqual(4, battle.history_table.scores['not-an-option'])
+
+    def test_pool_is_kept_between_decisions(self):
+        config.decision_executor = 'process'
+        pool = get_decision_pool()
+        self.make_decision(self.create_battle(LastMoveBot))
+        self.make_decision(self.create_battle(LastMoveBot))
+        self.assertIs(pool, get_decision_pool())
+
+    def test_invalid_executor_raises_value_error(self):
+        config.decision_executor = 'invalid'
+        with self.assertRaises(ValueError):
+            start_decision_pool()
+
+    def test_shutdown_cancels_decisions_that_have_not_started(self):
+        config.decision_executor = 'thread'
+
+        async def submit_decisions():
+            pool = get_decision_pool()
+            return [submit_decision(pool, make_decision, self.create_battle(SlowBot)) for _ in range(2)]
+
+        loop = asyncio.get_event_loop()
+        first_decision, second_decision = loop.run_until_complete(submit_decisions())
+        shutdown_decision_pool()
+        loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertFalse(first_decision.cancelled())
+        self.assertTrue(second_decision.cancelled())
+
+    def test_decision_that_times_out_uses_the_first_option(self):
+        config.decision_executor = 'thread'
+        config.decision_timeout_ms = 50
+        self.assertEqual(["/choose move thunderbolt", "1"], self.make_decision(self.create_battle(SlowBot)))
+
+    def test_decision_that_times_out_replaces_the_pool(self):
+        config.decision_executor = 'process'
+        config.decision_timeout_ms = 50
+        pool = get_decision_pool()
+        self.make_decision(self.create_battle(SlowBot))
+        self.assertIsNot(pool, get_decision_pool())
+
+    def test_decision_process_that_times_out_is_stopped(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        config.decision_executor = 'process'
+        config.decision_timeout_ms = 50
+        battle = self.create_battle(SlowBot)
+        battle.finished_path = os.path.join(directory, 'finished')
+
+        self.make_decision(battle)
+        time.sleep(1)
+
+        self.assertFalse(os.path.exists(battle.finished_path))
+
+    def test_decision_within_the_timeout_is_used(self):
+        config.decision_executor = 'thread'
+        config.decision_timeout_ms = 5000
+        self.assertEqual(["/choose move voltswitch", "1"], self.make_decision(self.create_battle(LastMoveBot)))
@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+from collections import defaultdict
+
+from showdown.battle import Pokemon as StatePokemon
+from showdown.engine.objects import State
+from showdown.engine.objects import Side
+from showdown.engine.objects import Pokemon
+from showdown.engine.objects import StateMutator
+from showdown.engine.objects import TransposeInstruction
+from showdown.engine.evaluate import evaluate
+from showdown.battle_bots.mcts.main import monte_carlo_tree_search
+from showdown.battle_bots.mcts.main import sample_instructions
+
+
+def create_pokemon(name, level, moves):
+    pkmn = StatePokemon(name, level)
+    for m in moves:
+        pkmn.add_move(m)
+    return Pokemon.from_state_pokemon_dict(pkmn.to_dict())
+
+
+class TestMonteCarloTreeSearch(unittest.TestCase):
+    def setUp(self):
+        self.state = State(
+            Side(
+                create_pokemon("raichu", 73, ['thunderbolt', 'surf', 'focusblast', 'nastyplot']),
+                {
+                    "xatu": create_pokemon("xatu", 81, ['psychic', 'roost']),
+                    "starmie": create_pokemon("starmie", 81, ['surf', 'thunderwave']),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            Side(
+                create_pokemon("aromatisse", 81, ['moonblast', 'calmmind', 'wish']),
+                {
+                    "yveltal": create_pokemon("yveltal", 73, ['darkpulse', 'oblivionwing', 'uturn']),
+                    "toxapex": create_pokemon("toxapex", 73, ['scald', 'toxic', 'recover']),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            None,
+            None,
+            False
+        )
+        self.mutator = StateMutator(self.state)
+        self.user_options, self.opponent_options = self.state.get_all_options()
+
+    def test_runs_the_given_number_of_iterations(self):
+        root = monte_carlo_tree_search(self.mutator, self.user_options, self.opponent_options, iterations=50)
+
+        self.assertEqual(50, root.visits)
+        self.assertEqual(50, sum(root.user_visits.values()))
+        self.assertEqual(50, sum(root.opponent_visits.values()))
+
+    def test_every_option_is_tried_before_any_option_is_tried_twice(self):
+        root = monte_carlo_tree_search(self.mutator, self.user_options, self.opponent_options, iterations=len(self.user_options))
+
+        self.assertEqual({option: 1 for option in self.user_options}, dict(root.user_visits))
+
+    def test_state_is_unchanged_after_search(self):
+        original_hash = self.mutator.hash
+        original_evaluation = evaluate(self.state)
+        monte_carlo_tree_search(self.mutator, self.user_options, self.opponent_options, iterations=200)
+
+        self.assertEqual(original_hash, self.mutator.hash)
+        self.assertEqual(original_evaluation, evaluate(self.state))
+
+    def test_expired_deadline_runs_one_iteration(self):
+        root = monte_carlo_tree_search(self.mutator, self.user_options, self.opponent_options, deadline=0)
+
+        self.assertEqual(1, root.visits)
+
+    def test_raises_value_error_without_a_budget(self):
+        with self.assertRaises(ValueError):
+            monte_carlo_tree_search(self.mutator, self.user_options, self.opponent_options)
+
+
+class TestSampleInstructions(unittest.TestCase):
+    def setUp(self):
+        self.state_instructions = [
+            TransposeInstruction(0.25, [], False),
+            TransposeInstruction(0.75, [], False),
+        ]
+
+    @mock.patch('showdown.battle_bots.mcts.main.random')
+    def test_picks_first_outcome_inside_its_percentage(self, random_mock):
+        random_mock.random.return_value = 0.2
+        index, _ = sample_instructions(self.state_instructions)
+
+        self.assertEqual(0, index)
+
+    @mock.patch('showdown.battle_bots.mcts.main.random')
+    def test_picks_second_outcome_after_first_percentage(self, random_mock):
+        random_mock.random.return_value = 0.3
+        index, _ = sample_instructions(self.state_instructions)
+
+        self.assertEqual(1, index)
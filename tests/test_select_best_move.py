@@ -1,13 +1,77 @@
+import pickle
 import unittest
+from unittest import mock
 from collections import defaultdict
 
+import config
 import constants
 from showdown.engine.objects import State
 from showdown.engine.objects import Side
 from showdown.engine.objects import Pokemon
+from showdown.engine.objects import StateMutator
+from showdown.engine.select_best_move import get_payoff_matrix
+from showdown.engine.select_best_move import get_payoff_row
+from showdown.engine.select_best_move import pick_safest
+from showdown.engine.select_best_move import iterative_deepening_payoff_matrix
+from showdown.engine.select_best_move import order_options_from_scores
+from showdown.engine.select_best_move import SearchTimeout
+from showdown.engine.select_best_move import search_statistics
+from showdown.engine.select_best_move import HistoryTable
+from showdown.engine.select_best_move import get_evaluation_bounds
+from showdown.engine.select_best_move import ScoreBound
+from showdown.engine.select_best_move import UpperScoreBound
+from showdown.engine.select_best_move import LowerScoreBound
+from showdown.engine.select_best_move import search_chance_node
+from showdown.engine.select_best_move import get_opponent_decisions
+from showdown.engine.select_best_move import remove_guaranteed_opponent_moves
+from showdown.engine.select_best_move import resolve_score_bounds
+from showdown.engine.evaluate import evaluate
+from showdown.engine.evaluate import evaluation_bounds
+from showdown.engine.transposition_table import TranspositionTable
+from showdown.engine.transposition_table import zobrist_hash
+from showdown.engine.find_state_instructions import InstructionCache
+from showdown.engine.find_state_instructions import get_all_state_instructions
+from showdown.engine.search_pool import search_states
+from showdown.engine.search_pool import iter_search_states
+from showdown.engine.search_pool import shutdown_search_pool
+from showdown.engine.search_pool import get_search_pool
+from showdown.engine.search_pool import get_payoff_matrix_root_split
 from showdown.battle import Pokemon as StatePokemon
 
 
+def create_pokemon(name, level, moves):
+    pkmn = StatePokemon(name, level)
+    for m in moves:
+        pkmn.add_move(m)
+    return Pokemon.from_state_pokemon_dict(pkmn.to_dict())
+
+
+def create_search_state():
+    return State(
+        Side(
+            create_pokemon("raichu", 73, ['thunderbolt', 'surf', 'focusblast', 'nastyplot']),
+            {
+                "xatu": create_pokemon("xatu", 81, ['psychic', 'roost']),
+                "starmie": create_pokemon("starmie", 81, ['surf', 'thunderwave']),
+            },
+            (0, 0),
+            defaultdict(lambda: 0)
+        ),
+        Side(
+            create_pokemon("aromatisse", 81, ['moonblast', 'calmmind', 'wish']),
+            {
+                "yveltal": create_pokemon("yveltal", 73, ['darkpulse', 'oblivionwing', 'uturn']),
+                "toxapex": create_pokemon("toxapex", 73, ['scald', 'toxic', 'recover']),
+            },
+            (0, 0),
+            defaultdict(lambda: 0)
+        ),
+        None,
+        None,
+        False
+    )
+
+
 class TestGetAllOptions(unittest.TestCase):
     def setUp(self):
         self.state = State(
@@ -465,3 +529,555 @@ class TestGetAllOptions(unittest.TestCase):
         options = self.state.get_all_options()
 
         self.assertEqual(expected_options, options)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def setUp(self):
+        self.table = TranspositionTable(max_entries=2)
+
+    def test_returns_stored_score_for_the_same_depth(self):
+        self.table.store(123, 1, 50)
+
+        self.assertEqual(50, self.table.get(123, 1))
+
+    def test_returns_none_for_a_different_depth(self):
+        self.table.store(123, 1, 50)
+
+        self.assertIsNone(self.table.get(123, 2))
+
+    def test_oldest_entry_is_removed_when_table_is_full(self):
+        self.table.store(1, 1, 10)
+        self.table.store(2, 1, 20)
+        self.table.store(3, 1, 30)
+
+        self.assertEqual(2, len(self.table))
+        self.assertIsNone(self.table.get(1, 1))
+        self.assertEqual(30, self.table.get(3, 1))
+
+    def test_hits_and_misses_are_counted(self):
+        self.table.store(1, 1, 10)
+        self.table.get(1, 1)
+        self.table.get(2, 1)
+
+        self.assertEqual(1, self.table.hits)
+        self.assertEqual(1, self.table.misses)
+
+
+class TestChanceNodePruning(unittest.TestCase):
+    def setUp(self):
+        self.state = create_search_state()
+        self.mutator = StateMutator(self.state)
+        self.user_options, self.opponent_options = self.state.get_all_options()
+        self.original_bounds = config.evaluation_lower_bound, config.evaluation_upper_bound
+        self.cutoffs_before = search_statistics.chance_node_cutoffs
+
+    def tearDown(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = self.original_bounds
+
+    def test_evaluation_bounds_contain_the_evaluation(self):
+        lowest, highest = evaluation_bounds(self.state)
+
+        self.assertLess(lowest, evaluate(self.state))
+        self.assertGreater(highest, evaluate(self.state))
+
+    def test_fainted_pokemon_does_not_widen_the_evaluation_bounds(self):
+        original_bounds = evaluation_bounds(self.state)
+        self.state.opponent.reserve['toxapex'].hp = 0
+
+        lowest, highest = evaluation_bounds(self.state)
+        self.assertGreater(lowest, original_bounds[0])
+        self.assertLess(highest, original_bounds[1])
+
+    def test_configured_bounds_are_widened_by_the_won_battle_bonus(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -300, 300
+
+        self.assertEqual((-500, 500), get_evaluation_bounds(self.mutator, 2))
+
+    def test_pruning_chance_nodes_gives_the_same_decision(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = float('-inf'), float('inf')
+        search_statistics.reset()
+        expected_safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2))
+        expected_nodes = search_statistics.nodes
+        self.assertEqual(0, search_statistics.chance_node_cutoffs)
+
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -300, 300
+        search_statistics.reset()
+        safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2))
+
+        self.assertEqual(expected_safest, safest)
+        self.assertGreater(search_statistics.chance_node_cutoffs, 0)
+        self.assertLess(search_statistics.nodes, expected_nodes)
+
+    def test_default_bounds_cut_off_chance_nodes_without_changing_the_decision(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = float('-inf'), float('inf')
+        expected_score_lookup = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2)
+
+        config.evaluation_lower_bound, config.evaluation_upper_bound = self.original_bounds
+        search_statistics.reset()
+        score_lookup = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2)
+
+        self.assertGreater(search_statistics.chance_node_cutoffs, 0)
+        self.assertEqual(pick_safest(expected_score_lookup), pick_safest(score_lookup))
+        self.assertEqual(
+            remove_guaranteed_opponent_moves(expected_score_lookup).keys(),
+            remove_guaranteed_opponent_moves(score_lookup).keys()
+        )
+
+    def test_scores_of_cut_off_chance_nodes_are_score_bounds(self):
+        # no outcome can be better than 300, so a row that must reach 301 is cut off after its first outcome
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -300, 300
+        row_scores, _, _ = get_payoff_row(self.mutator, 'thunderbolt', self.opponent_options, 0, True, 301, exact_rows=False)
+
+        self.assertIsInstance(row_scores[('thunderbolt', self.opponent_options[0])], UpperScoreBound)
+
+    def test_exact_rows_are_not_cut_off_for_being_below_the_best_score(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -300, 300
+        row_scores, _, _ = get_payoff_row(self.mutator, 'thunderbolt', self.opponent_options, 0, True, 301)
+
+        self.assertNotIsInstance(row_scores[('thunderbolt', self.opponent_options[0])], ScoreBound)
+
+    def test_chance_node_is_cut_off_once_it_cannot_be_below_the_lower_cutoff(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -300, 300
+        score = search_chance_node(self.mutator, 'thunderbolt', 'moonblast', 0, True, lower_cutoff=-1000)
+
+        self.assertIsInstance(score, LowerScoreBound)
+        self.assertEqual(1, search_statistics.chance_node_cutoffs - self.cutoffs_before)
+
+    def test_chance_node_searches_the_most_likely_outcome_first(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -300, 300
+        state_instructions = get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast')
+        most_likely = max(state_instructions, key=lambda i: i.percentage)
+        self.mutator.apply(most_likely.instructions)
+        most_likely_evaluation = self.mutator.evaluation
+        self.mutator.reverse(most_likely.instructions)
+
+        score = search_chance_node(self.mutator, 'thunderbolt', 'moonblast', 0, True, lower_cutoff=-1000)
+
+        remaining_percentage = 1 - most_likely.percentage
+        self.assertAlmostEqual(most_likely_evaluation * most_likely.percentage - 300 * remaining_percentage, score)
+
+    def test_resuming_a_cut_off_chance_node_gives_the_expected_score(self):
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -300, 300
+        expected_score = search_chance_node(self.mutator, 'thunderbolt', 'moonblast', 0, True)
+        score_bound = search_chance_node(self.mutator, 'thunderbolt', 'moonblast', 0, True, lower_cutoff=-1000)
+
+        score = search_chance_node(self.mutator, 'thunderbolt', 'moonblast', 0, True, resume_from=score_bound)
+
+        self.assertNotIsInstance(score, ScoreBound)
+        self.assertAlmostEqual(expected_score, score)
+
+    def test_chance_node_without_pruning_is_the_expected_score(self):
+        state_instructions = get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast')
+        expected_score = 0
+        for instructions in state_instructions:
+            self.mutator.apply(instructions.instructions)
+            expected_score += self.mutator.evaluation * instructions.percentage
+            self.mutator.reverse(instructions.instructions)
+
+        score = search_chance_node(self.mutator, 'thunderbolt', 'moonblast', 0, False, lower_cutoff=-1000)
+
+        self.assertAlmostEqual(expected_score, score)
+
+    def test_pruning_chance_nodes_with_tight_bounds_gives_the_same_decision(self):
+        # the bot's pokemon is low enough that some of the opponent's moves do not give it a choice
+        self.state.self.active.hp = self.state.self.active.maxhp // 4
+        self.state.opponent.active.hp = self.state.opponent.active.maxhp // 2
+
+        config.evaluation_lower_bound, config.evaluation_upper_bound = float('-inf'), float('inf')
+        expected_safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2))
+
+        config.evaluation_lower_bound, config.evaluation_upper_bound = -150, 150
+        search_statistics.reset()
+        safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2))
+
+        self.assertEqual(expected_safest, safest)
+        self.assertGreater(search_statistics.chance_node_cutoffs, 0)
+
+
+class TestResolveScoreBounds(unittest.TestCase):
+    def setUp(self):
+        self.exact_scores = {
+            ("a", "x"): 100,
+            ("a", "y"): -500,
+            ("c", "x"): 200,
+            ("c", "y"): -500,
+        }
+        self.searched = []
+
+    def search_exactly(self, move_pair, score_bound):
+        self.searched.append(move_pair)
+        return self.exact_scores[move_pair]
+
+    def test_bounds_that_decide_whether_the_opponent_has_a_choice_are_resolved(self):
+        score_lookup = dict(self.exact_scores)
+        score_lookup[("c", "y")] = LowerScoreBound(-600)
+
+        resolve_score_bounds(score_lookup, self.search_exactly)
+
+        self.assertEqual([("c", "y")], self.searched)
+        self.assertEqual(self.exact_scores, score_lookup)
+
+    def test_lower_bound_that_could_be_the_worst_score_of_its_row_is_resolved(self):
+        self.exact_scores[("c", "y")] = -400
+        score_lookup = dict(self.exact_scores)
+        score_lookup[("c", "y")] = LowerScoreBound(-450)
+
+        resolve_score_bounds(score_lookup, self.search_exactly)
+
+        self.assertEqual([("c", "y")], self.searched)
+        self.assertEqual(self.exact_scores, score_lookup)
+
+    def test_lower_bound_above_the_worst_score_of_its_row_is_kept(self):
+        self.exact_scores[("c", "y")] = -400
+        score_lookup = dict(self.exact_scores)
+        score_lookup[("c", "x")] = LowerScoreBound(150)
+
+        resolve_score_bounds(score_lookup, self.search_exactly)
+
+        self.assertEqual([], self.searched)
+        self.assertIsInstance(score_lookup[("c", "x")], LowerScoreBound)
+
+    def test_upper_bound_below_every_other_score_of_its_column_is_kept(self):
+        self.exact_scores[("c", "y")] = -600
+        score_lookup = dict(self.exact_scores)
+        score_lookup[("c", "y")] = UpperScoreBound(-550)
+
+        resolve_score_bounds(score_lookup, self.search_exactly)
+
+        self.assertEqual([], self.searched)
+        self.assertEqual(pick_safest(self.exact_scores), pick_safest(score_lookup))
+
+    def test_opponent_decisions_are_the_moves_whose_scores_must_differ(self):
+        score_lookup = {
+            ("a", "x"): 100,
+            ("a", "y"): -500,
+            ("a", "z"): -10,
+            ("c", "x"): 200,
+            ("c", "y"): UpperScoreBound(-450),
+            ("c", "z"): float('nan'),
+        }
+
+        opponent_decisions, undecided_opponent_moves = get_opponent_decisions(score_lookup)
+
+        self.assertEqual({"x"}, opponent_decisions)
+        self.assertEqual({"y"}, undecided_opponent_moves)
+
+
+class TestHistoryTable(unittest.TestCase):
+    def setUp(self):
+        self.state = create_search_state()
+        self.mutator = StateMutator(self.state)
+        self.user_options, self.opponent_options = self.state.get_all_options()
+
+    def test_options_that_caused_more_prunes_are_ordered_first(self):
+        table = HistoryTable()
+        table.record_prune('b', 0)
+        table.record_prune('c', 1)
+
+        self.assertEqual(['c', 'b', 'a', 'd'], table.order(['a', 'b', 'c', 'd']))
+
+    def test_aging_halves_the_scores(self):
+        table = HistoryTable()
+        table.record_prune('a', 1)
+        table.age()
+
+        self.assertEqual(2, table.scores['a'])
+
+    def test_history_table_gives_the_same_decision(self):
+        expected_safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2))
+
+        table = HistoryTable()
+        safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, history_table=table))
+
+        self.assertEqual(expected_safest, safest)
+        self.assertGreater(len(table.scores), 0)
+
+    def test_history_table_changes_which_scores_are_pruned(self):
+        scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=1)
+
+        table = HistoryTable()
+        table.record_prune('switch toxapex', 3)
+        scores_with_history = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=1, history_table=table)
+
+        self.assertNotEqual(
+            {k for k, v in scores.items() if v != v},
+            {k for k, v in scores_with_history.items() if v != v}
+        )
+
+
+class TestGetPayoffMatrixWithTranspositionTable(unittest.TestCase):
+    def setUp(self):
+        self.state = create_search_state()
+        self.mutator = StateMutator(self.state)
+        self.user_options, self.opponent_options = self.state.get_all_options()
+
+    def test_transposition_table_gives_the_same_scores_without_pruning(self):
+        expected_scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=False)
+
+        table = TranspositionTable()
+        scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=False, transposition_table=table)
+
+        self.assertEqual(expected_scores, scores)
+        self.assertGreater(table.hits, 0)
+
+    def test_transposition_table_gives_the_same_scores_with_pruning(self):
+        expected_scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=True)
+        scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=True, transposition_table=TranspositionTable())
+
+        self.assertEqual(
+            {k: v for k, v in expected_scores.items() if v == v},
+            {k: v for k, v in scores.items() if v == v}
+        )
+
+    def test_state_is_unchanged_after_search_with_transposition_table(self):
+        original_hash = self.mutator.hash
+        get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, transposition_table=TranspositionTable())
+
+        self.assertEqual(original_hash, self.mutator.hash)
+
+
+class TestInstructionCache(unittest.TestCase):
+    def setUp(self):
+        self.state = create_search_state()
+        self.mutator = StateMutator(self.state)
+        self.user_options, self.opponent_options = self.state.get_all_options()
+        self.original_damage_calc_type = config.damage_calc_type
+
+    def tearDown(self):
+        config.damage_calc_type = self.original_damage_calc_type
+
+    def test_least_recently_used_entry_is_removed_when_cache_is_full(self):
+        cache = InstructionCache(max_entries=2)
+        cache.store('a', [1])
+        cache.store('b', [2])
+        cache.get('a')
+        cache.store('c', [3])
+
+        self.assertEqual([1], cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(2, len(cache))
+
+    def test_second_lookup_of_the_same_state_and_moves_is_a_hit(self):
+        cache = InstructionCache()
+        expected_instructions = get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast')
+        get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast', instruction_cache=cache)
+        instructions = get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast', instruction_cache=cache)
+
+        self.assertEqual(expected_instructions, instructions)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_changing_the_state_is_a_miss(self):
+        cache = InstructionCache()
+        get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast', instruction_cache=cache)
+        self.mutator.apply_one((constants.MUTATOR_DAMAGE, constants.OPPONENT, 10))
+        get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast', instruction_cache=cache)
+
+        self.assertEqual(0, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_changing_the_damage_calc_type_is_a_miss(self):
+        cache = InstructionCache()
+        config.damage_calc_type = 'average'
+        get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast', instruction_cache=cache)
+        config.damage_calc_type = 'min'
+        get_all_state_instructions(self.mutator, 'thunderbolt', 'moonblast', instruction_cache=cache)
+
+        self.assertEqual(0, cache.hits)
+
+    def test_instruction_cache_gives_the_same_scores_without_pruning(self):
+        expected_scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=False)
+
+        cache = InstructionCache()
+        scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=False, instruction_cache=cache)
+
+        self.assertEqual(expected_scores, scores)
+        self.assertGreater(cache.hits, 0)
+
+
+class TestIterativeDeepening(unittest.TestCase):
+    def setUp(self):
+        self.state = create_search_state()
+        self.mutator = StateMutator(self.state)
+        self.user_options, self.opponent_options = self.state.get_all_options()
+
+    def test_expired_deadline_returns_the_depth_one_search(self):
+        expected_scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=1, prune=False)
+        scores, depth = iterative_deepening_payoff_matrix(self.mutator, self.user_options, self.opponent_options, deadline=0, prune=False)
+
+        self.assertEqual(1, depth)
+        self.assertEqual(expected_scores, scores)
+
+    def test_stops_at_max_depth_with_the_same_decision_as_a_fixed_depth_search(self):
+        expected_safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2))
+        scores, depth = iterative_deepening_payoff_matrix(self.mutator, self.user_options, self.opponent_options, deadline=float('inf'), max_depth=2)
+
+        self.assertEqual(2, depth)
+        self.assertEqual(expected_safest, pick_safest(scores))
+
+    @mock.patch('showdown.engine.select_best_move.time')
+    def test_search_timeout_part_way_through_leaves_the_state_unchanged(self, mock_time):
+        # the deadline passes after the first few nodes have been searched
+        mock_time.time.side_effect = [0, 0, 0, 0, 0, 10] + [10] * 100
+        original_hash = self.mutator.hash
+        with self.assertRaises(SearchTimeout):
+            get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=3, deadline=5)
+
+        self.assertEqual(original_hash, self.mutator.hash)
+
+    def test_order_options_puts_best_user_option_and_its_worst_case_first(self):
+        score_lookup = {
+            ('a', 'x'): 10,
+            ('a', 'y'): 5,
+            ('b', 'x'): 20,
+            ('b', 'y'): 30,
+            ('c', 'x'): float('nan'),
+            ('c', 'y'): 0,
+        }
+
+        user_options, opponent_options = order_options_from_scores(score_lookup, ['a', 'b', 'c'], ['y', 'x'])
+
+        self.assertEqual(['b', 'a', 'c'], user_options)
+        self.assertEqual(['x', 'y'], opponent_options)
+
+
+class TestSearchStates(unittest.TestCase):
+    def setUp(self):
+        self.original_search_processes = config.search_processes
+        self.searches = list()
+        for opponent_item in ['leftovers', 'lifeorb']:
+            state = create_search_state()
+            state.opponent.active.item = opponent_item
+            user_options, opponent_options = state.get_all_options()
+            self.searches.append((state, user_options, opponent_options))
+
+    def tearDown(self):
+        config.search_processes = self.original_search_processes
+        shutdown_search_pool()
+
+    def test_state_can_be_pickled(self):
+        state = self.searches[0][0]
+        state.self.side_conditions[constants.REFLECT] = 1
+
+        unpickled_state = pickle.loads(pickle.dumps(state))
+
+        self.assertEqual(zobrist_hash(state), zobrist_hash(unpickled_state))
+        self.assertEqual(0, unpickled_state.self.side_conditions[constants.LIGHT_SCREEN])
+
+    def test_serial_search_returns_one_payoff_matrix_per_state(self):
+        config.search_processes = 1
+        list_of_scores = search_states(self.searches, 1, prune=False)
+
+        expected_scores = [
+            get_payoff_matrix(StateMutator(state), user_options, opponent_options, depth=1, prune=False)
+            for state, user_options, opponent_options in self.searches
+        ]
+        self.assertEqual(expected_scores, list_of_scores)
+
+    def test_search_processes_give_the_same_results_as_a_serial_search(self):
+        config.search_processes = 1
+        expected_scores = search_states(self.searches, 2, prune=False)
+
+        config.search_processes = 2
+        list_of_scores = search_states(self.searches, 2, prune=False)
+
+        self.assertEqual(expected_scores, list_of_scores)
+
+    def test_serial_search_updates_the_history_table(self):
+        config.search_processes = 1
+        table = HistoryTable()
+        search_states(self.searches, 1, history_table=table)
+
+        self.assertGreater(len(table.scores), 0)
+
+    def test_search_processes_do_not_update_the_history_table(self):
+        config.search_processes = 2
+        table = HistoryTable()
+        search_states(self.searches, 1, history_table=table)
+
+        self.assertEqual(0, len(table.scores))
+
+    def test_searches_are_only_consumed_as_they_are_searched(self):
+        config.search_processes = 1
+        searches = iter(self.searches)
+        list_of_scores = iter_search_states(searches, 1, prune=False, number_of_searches=len(self.searches))
+
+        next(list_of_scores)
+
+        self.assertEqual(len(self.searches) - 1, len(list(searches)))
+
+    def test_iterating_gives_the_same_results_as_a_list_of_searches(self):
+        config.search_processes = 1
+        expected_scores = search_states(self.searches, 1, prune=False)
+
+        list_of_scores = iter_search_states(iter(self.searches), 1, prune=False, number_of_searches=len(self.searches))
+
+        self.assertEqual(expected_scores, list(list_of_scores))
+
+    def test_iterating_with_search_processes_gives_the_same_results(self):
+        config.search_processes = 1
+        expected_scores = search_states(self.searches, 2, prune=False)
+
+        config.search_processes = 2
+        list_of_scores = iter_search_states(iter(self.searches), 2, prune=False, number_of_searches=len(self.searches))
+
+        self.assertEqual(expected_scores, list(list_of_scores))
+
+    def test_search_pool_is_kept_while_the_configuration_is_the_same(self):
+        config.search_processes = 2
+
+        self.assertIs(get_search_pool(), get_search_pool())
+
+    def test_search_pool_is_started_again_when_the_configuration_changes(self):
+        original_damage_calc_type = config.damage_calc_type
+        config.search_processes = 2
+        config.damage_calc_type = 'average'
+        search_pool = get_search_pool()
+        try:
+            config.damage_calc_type = 'min'
+            self.assertIsNot(search_pool, get_search_pool())
+
+            expected_scores = [
+                get_payoff_matrix(StateMutator(state), user_options, opponent_options, depth=1, prune=False)
+                for state, user_options, opponent_options in self.searches
+            ]
+            self.assertEqual(expected_scores, search_states(self.searches, 1, prune=False))
+        finally:
+            config.damage_calc_type = original_damage_calc_type
+
+
+class TestGetPayoffMatrixRootSplit(unittest.TestCase):
+    def setUp(self):
+        self.original_search_processes = config.search_processes
+        config.search_processes = 2
+        self.state = create_search_state()
+        self.mutator = StateMutator(self.state)
+        self.user_options, self.opponent_options = self.state.get_all_options()
+
+    def tearDown(self):
+        config.search_processes = self.original_search_processes
+        shutdown_search_pool()
+
+    def test_returns_the_same_scores_as_a_serial_search_without_pruning(self):
+        expected_scores = get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=False)
+        scores = get_payoff_matrix_root_split(self.mutator, self.user_options, self.opponent_options, depth=2, prune=False)
+
+        self.assertEqual(expected_scores, scores)
+
+    def test_returns_the_same_safest_decision_as_a_serial_search_with_pruning(self):
+        expected_safest = pick_safest(get_payoff_matrix(self.mutator, self.user_options, self.opponent_options, depth=2, prune=True))
+        safest = pick_safest(get_payoff_matrix_root_split(self.mutator, self.user_options, self.opponent_options, depth=2, prune=True))
+
+        self.assertEqual(expected_safest, safest)
+
+    def test_finished_battle_is_not_sent_to_the_search_processes(self):
+        self.state.opponent.active.hp = 0
+        for pkmn in self.state.opponent.reserve.values():
+            pkmn.hp = 0
+        self.state.opponent.reserve.update({str(i): create_pokemon("pikachu", 100, []) for i in range(3)})
+        for pkmn in self.state.opponent.reserve.values():
+            pkmn.hp = 0
+
+        scores = get_payoff_matrix_root_split(self.mutator, self.user_options, self.opponent_options, depth=2)
+
+        self.assertEqual([(constants.DO_NOTHING_MOVE, constants.DO_NOTHING_MOVE)], list(scores.keys()))
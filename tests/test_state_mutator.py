@@ -8,6 +8,9 @@ from showdown.engine.objects import State
 from showdown.engine.objects import Side
 from showdown.engine.objects import Pokemon
 from showdown.engine.objects import StateMutator
+from showdown.engine.transposition_table import zobrist_hash
+from showdown.engine.evaluate import evaluate
+from showdown.engine.damage_calculator import type_combination_indicies
 
 
 class TestStatemutator(unittest.TestCase):
@@ -684,6 +687,20 @@ class TestStatemutator(unittest.TestCase):
         self.mutator.reverse(list_of_instructions)
         self.assertEqual(['normal'], self.state.self.active.types)
 
+    def test_change_types_updates_the_type_combination_index(self):
+        self.state.self.active.types = ['normal']
+        instruction = (
+            constants.MUTATOR_CHANGE_TYPE,
+            constants.SELF,
+            ['water', 'grass'],
+            self.state.self.active.types
+        )
+        self.mutator.apply([instruction])
+        self.assertEqual(type_combination_indicies[('water', 'grass')], self.state.self.active.type_combination_index)
+
+        self.mutator.reverse([instruction])
+        self.assertEqual(type_combination_indicies[('normal',)], self.state.self.active.type_combination_index)
+
     def test_changing_item(self):
         self.state.self.active.item = 'some_item'
         instruction = (
@@ -860,3 +877,236 @@ class TestStatemutator(unittest.TestCase):
         self.assertEqual(3, self.state.self.active.special_attack)
         self.assertEqual(4, self.state.self.active.special_defense)
         self.assertEqual(5, self.state.self.active.speed)
+
+    def test_boosting_updates_the_cached_boosted_stats(self):
+        attack = self.state.self.active.boosted_stat(constants.ATTACK)
+        instruction = (
+            constants.MUTATOR_BOOST,
+            constants.SELF,
+            constants.ATTACK,
+            2
+        )
+        self.mutator.apply([instruction])
+        self.assertEqual(attack * 2, self.state.self.active.boosted_stat(constants.ATTACK))
+
+        self.mutator.reverse([instruction])
+        self.assertEqual(attack, self.state.self.active.boosted_stat(constants.ATTACK))
+
+    def test_unboosting_updates_the_cached_boosted_stats(self):
+        speed = self.state.self.active.boosted_stat(constants.SPEED)
+        instruction = (
+            constants.MUTATOR_UNBOOST,
+            constants.SELF,
+            constants.SPEED,
+            1
+        )
+        self.mutator.apply([instruction])
+        self.assertEqual(speed * 2 / 3, self.state.self.active.boosted_stat(constants.SPEED))
+
+    def test_changing_stats_updates_the_cached_boosted_stats(self):
+        self.state.self.active.get_boosted_stats()
+        instruction = (
+            constants.MUTATOR_CHANGE_STATS,
+            constants.SELF,
+            (10, 1, 2, 3, 4, 5),
+            (
+                self.state.self.active.maxhp,
+                self.state.self.active.attack,
+                self.state.self.active.defense,
+                self.state.self.active.special_attack,
+                self.state.self.active.special_defense,
+                self.state.self.active.speed
+            )
+        )
+        self.mutator.apply([instruction])
+        self.assertEqual(
+            {
+                constants.ATTACK: 1,
+                constants.DEFENSE: 2,
+                constants.SPECIAL_ATTACK: 3,
+                constants.SPECIAL_DEFENSE: 4,
+                constants.SPEED: 5
+            },
+            self.state.self.active.get_boosted_stats()
+        )
+
+    def test_setting_a_boost_directly_updates_the_cached_boosted_stats(self):
+        defense = self.state.self.active.boosted_stat(constants.DEFENSE)
+        self.state.self.active.defense_boost = -1
+        self.assertEqual(defense * 2 / 3, self.state.self.active.boosted_stat(constants.DEFENSE))
+
+    def test_calculate_boosted_stats_returns_a_copy_of_the_cached_boosted_stats(self):
+        boosted_stats = self.state.self.active.calculate_boosted_stats()
+        boosted_stats[constants.ATTACK] = 0
+        self.assertNotEqual(0, self.state.self.active.boosted_stat(constants.ATTACK))
+
+
+class TestStateMutatorHash(unittest.TestCase):
+    def setUp(self):
+        self.state = State(
+            Side(
+                Pokemon.from_state_pokemon_dict(StatePokemon("pikachu", 100).to_dict()),
+                {
+                    "rattata": Pokemon.from_state_pokemon_dict(StatePokemon("rattata", 100).to_dict()),
+                    "charmander": Pokemon.from_state_pokemon_dict(StatePokemon("charmander", 100).to_dict()),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            Side(
+                Pokemon.from_state_pokemon_dict(StatePokemon("pikachu", 100).to_dict()),
+                {
+                    "squirtle": Pokemon.from_state_pokemon_dict(StatePokemon("squirtle", 100).to_dict()),
+                    "bulbasaur": Pokemon.from_state_pokemon_dict(StatePokemon("bulbasaur", 100).to_dict()),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            None,
+            None,
+            False
+        )
+        self.state.self.active.moves = [{constants.ID: 'thunderbolt', constants.DISABLED: False}]
+        self.mutator = StateMutator(self.state)
+        self.instructions = [
+            (constants.MUTATOR_DAMAGE, constants.SELF, 50),
+            (constants.MUTATOR_HEAL, constants.OPPONENT, 10),
+            (constants.MUTATOR_BOOST, constants.SELF, constants.ATTACK, 2),
+            (constants.MUTATOR_UNBOOST, constants.OPPONENT, constants.SPEED, 1),
+            (constants.MUTATOR_APPLY_STATUS, constants.OPPONENT, constants.BURN),
+            (constants.MUTATOR_APPLY_VOLATILE_STATUS, constants.SELF, constants.CONFUSION),
+            (constants.MUTATOR_SIDE_START, constants.OPPONENT, constants.STEALTH_ROCK, 1),
+            (constants.MUTATOR_WISH_START, constants.SELF, 100, 0),
+            (constants.MUTATOR_DISABLE_MOVE, constants.SELF, 'thunderbolt'),
+            (constants.MUTATOR_WEATHER_START, constants.SUN, None),
+            (constants.MUTATOR_FIELD_START, constants.ELECTRIC_TERRAIN, None),
+            (constants.MUTATOR_TOGGLE_TRICKROOM,),
+            (constants.MUTATOR_CHANGE_TYPE, constants.SELF, ['water'], ['electric']),
+            (constants.MUTATOR_CHANGE_ITEM, constants.SELF, None, 'unknown_item'),
+            (constants.MUTATOR_CHANGE_STATS, constants.SELF, (1, 2, 3, 4, 5, 6), (232, 167, 137, 157, 157, 237)),
+            (constants.MUTATOR_SWITCH, constants.SELF, 'pikachu', 'rattata'),
+            (constants.MUTATOR_SWITCH, constants.OPPONENT, 'pikachu', 'squirtle'),
+        ]
+
+    def test_hash_of_unmodified_state_is_the_full_hash(self):
+        self.assertEqual(zobrist_hash(self.state), self.mutator.hash)
+
+    def test_hash_after_applying_instructions_matches_full_hash(self):
+        self.mutator.apply(self.instructions)
+
+        self.assertEqual(zobrist_hash(self.state), self.mutator.hash)
+
+    def test_hash_is_restored_after_reversing_instructions(self):
+        original_hash = self.mutator.hash
+        self.mutator.apply(self.instructions)
+        self.mutator.reverse(self.instructions)
+
+        self.assertEqual(original_hash, self.mutator.hash)
+
+    def test_hash_is_correct_when_first_accessed_after_applying_instructions(self):
+        original_hash = zobrist_hash(self.state)
+        self.mutator.apply(self.instructions)
+        self.assertEqual(zobrist_hash(self.state), self.mutator.hash)
+
+        self.mutator.reverse(self.instructions)
+        self.assertEqual(original_hash, self.mutator.hash)
+
+    def test_same_state_reached_in_different_orders_has_the_same_hash(self):
+        instructions = [
+            (constants.MUTATOR_SWITCH, constants.SELF, 'pikachu', 'rattata'),
+            (constants.MUTATOR_SWITCH, constants.OPPONENT, 'pikachu', 'squirtle'),
+        ]
+        self.mutator.apply(instructions)
+        first_hash = self.mutator.hash
+        self.mutator.reverse(instructions)
+
+        self.mutator.apply(list(reversed(instructions)))
+
+        self.assertEqual(first_hash, self.mutator.hash)
+
+    def test_side_condition_that_ends_has_the_same_hash_as_no_side_condition(self):
+        original_hash = self.mutator.hash
+        self.mutator.apply([
+            (constants.MUTATOR_SIDE_START, constants.SELF, constants.REFLECT, 5),
+            (constants.MUTATOR_SIDE_END, constants.SELF, constants.REFLECT, 5),
+        ])
+
+        self.assertEqual(original_hash, self.mutator.hash)
+
+    def test_different_damage_amounts_have_different_hashes(self):
+        self.mutator.apply([(constants.MUTATOR_DAMAGE, constants.SELF, 50)])
+        first_hash = self.mutator.hash
+        self.mutator.apply([(constants.MUTATOR_DAMAGE, constants.SELF, 1)])
+
+        self.assertNotEqual(first_hash, self.mutator.hash)
+
+
+class TestStateMutatorEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.state = State(
+            Side(
+                Pokemon.from_state_pokemon_dict(StatePokemon("pikachu", 100).to_dict()),
+                {
+                    "rattata": Pokemon.from_state_pokemon_dict(StatePokemon("rattata", 100).to_dict()),
+                    "charmander": Pokemon.from_state_pokemon_dict(StatePokemon("charmander", 100).to_dict()),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            Side(
+                Pokemon.from_state_pokemon_dict(StatePokemon("pikachu", 100).to_dict()),
+                {
+                    "squirtle": Pokemon.from_state_pokemon_dict(StatePokemon("squirtle", 100).to_dict()),
+                    "bulbasaur": Pokemon.from_state_pokemon_dict(StatePokemon("bulbasaur", 100).to_dict()),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            None,
+            None,
+            False
+        )
+        self.mutator = StateMutator(self.state)
+        self.instructions = [
+            (constants.MUTATOR_DAMAGE, constants.SELF, 50),
+            (constants.MUTATOR_HEAL, constants.OPPONENT, 10),
+            (constants.MUTATOR_BOOST, constants.SELF, constants.ATTACK, 2),
+            (constants.MUTATOR_UNBOOST, constants.OPPONENT, constants.SPEED, 1),
+            (constants.MUTATOR_APPLY_STATUS, constants.OPPONENT, constants.BURN),
+            (constants.MUTATOR_APPLY_VOLATILE_STATUS, constants.SELF, constants.SUBSTITUTE),
+            (constants.MUTATOR_SIDE_START, constants.SELF, constants.SPIKES, 2),
+            (constants.MUTATOR_SIDE_START, constants.OPPONENT, constants.REFLECT, 1),
+            (constants.MUTATOR_CHANGE_STATS, constants.SELF, (300, 2, 3, 4, 5, 6), (232, 167, 137, 157, 157, 237)),
+            (constants.MUTATOR_SWITCH, constants.SELF, 'pikachu', 'rattata'),
+            (constants.MUTATOR_DAMAGE, constants.SELF, 500),
+            (constants.MUTATOR_SWITCH, constants.SELF, 'rattata', 'charmander'),
+            (constants.MUTATOR_SWITCH, constants.OPPONENT, 'pikachu', 'squirtle'),
+        ]
+
+    def test_evaluation_of_unmodified_state_is_the_full_evaluation(self):
+        self.assertEqual(evaluate(self.state), self.mutator.evaluation)
+
+    def test_evaluation_after_applying_instructions_matches_full_evaluation(self):
+        self.mutator.evaluation
+        self.mutator.apply(self.instructions)
+
+        self.assertEqual(evaluate(self.state), self.mutator.evaluation)
+
+    def test_evaluation_matches_full_evaluation_after_each_instruction(self):
+        self.mutator.evaluation
+        for instruction in self.instructions:
+            self.mutator.apply_one(instruction)
+            self.assertEqual(evaluate(self.state), self.mutator.evaluation)
+
+    def test_evaluation_is_restored_after_reversing_instructions(self):
+        original_evaluation = self.mutator.evaluation
+        self.mutator.apply(self.instructions)
+        self.mutator.evaluation
+        self.mutator.reverse(self.instructions)
+
+        self.assertEqual(original_evaluation, self.mutator.evaluation)
+
+    def test_evaluation_first_accessed_after_applying_instructions_matches_full_evaluation(self):
+        self.mutator.apply(self.instructions)
+
+        self.assertEqual(evaluate(self.state), self.mutator.evaluation)